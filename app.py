@@ -1,19 +1,24 @@
 # Updated with enhanced scheduling - v4 (fixed privacy + timing requirements)
 import streamlit as st
 import os
+import json
 import tempfile
 from pathlib import Path
 import shutil
 import sys
 import importlib
+import hashlib
 import yaml
 
-# Import main module and its functions
-import video_generation
-import moviepy.editor as mpe
+# video_generation (librosa, moviepy) and youtube_service (googleapiclient) are imported where a render,
+# analysis or upload happens, so the first paint doesn't wait on them
+import render_config
+from render_config import RenderConfig, rgb_to_hex, seconds_to_time_str, time_str_to_seconds
 
-# Import YouTube integration modules
-from youtube_service import YouTubeService, VideoMetadata
+from render_queue import RenderQueue
+from upload_store import UploadStore
+import media_probe
+import render_profiler
 
 st.set_page_config(
     page_title="YouTube Shorts Generator",
@@ -29,8 +34,7 @@ st.markdown("Create beautiful music visualization videos for YouTube Shorts")
 @st.cache_data
 def load_video_profiles():
     try:
-        with open('video_profiles.yaml', 'r') as file:
-            return yaml.safe_load(file)
+        return render_config.load_video_profiles('video_profiles.yaml')
     except FileNotFoundError:
         st.error("video_profiles.yaml not found")
         return {}
@@ -40,134 +44,70 @@ def load_video_profiles():
 
 profiles = load_video_profiles()
 
-# Helper function to get profile values
-def get_profile_value(profile_key, path, default=None):
-    """Get a value from the selected profile using dot notation path"""
-    if not profiles or profile_key not in profiles:
-        return default
-    
-    profile = profiles[profile_key]
-    keys = path.split('.')
-    value = profile
-    
-    try:
-        for key in keys:
-            value = value[key]
-        return value
-    except (KeyError, TypeError):
-        return default
-
 # Create tabs for different sections
 tab_input, tab_video, tab_background, tab_image, tab_waveform, tab_generate, tab_youtube = st.tabs([
     "Input/Output", "Video Settings", "Background", "Image", "Waveform", "Generate", "YouTube"
 ])
 
-# Function to run the main script with the provided parameters
-def generate_video(params):
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    try:
-        # Create output directory if it doesn't exist
-        output_dir = os.path.dirname(os.path.join(script_dir, params["OUTPUT_VIDEO_FILENAME"]))
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Ensure audio times are valid numbers
-        audio_start_time_sec = max(0, params["AUDIO_START_TIME"])
-        audio_end_time_sec = max(audio_start_time_sec + 1, params["AUDIO_END_TIME"])
-        
-        # Call the precompute_assets function from main.py with all necessary parameters
-        assets = video_generation.precompute_assets(
-            image_path=params["IMAGE_PATH"],
-            video_width=params["VIDEO_WIDTH"],
-            video_height=params["VIDEO_HEIGHT"],
-            background_mode=params["BACKGROUND_MODE"],
-            background_image_fit=params["BACKGROUND_IMAGE_FIT"],
-            background_blur_radius=params["BACKGROUND_BLUR_RADIUS"],
-            image_width_percentage=params["IMAGE_WIDTH_PERCENTAGE"],
-            image_corner_radius=params["IMAGE_CORNER_RADIUS"],
-            image_x_position=params["IMAGE_X_POSITION"],
-            image_y_position=params["IMAGE_Y_POSITION"],
-            shadow_darkness_factor=params["SHADOW_DARKNESS_FACTOR"],
-            shadow_blur_radius=params["SHADOW_BLUR_RADIUS"],
-            waveform_enabled=params["WAVEFORM_ENABLED"],
-            waveform_height_percentage=params["WAVEFORM_HEIGHT_PERCENTAGE"],
-            spacing_image_waveform=params["SPACING_IMAGE_WAVEFORM"],
-            audio_path=params["AUDIO_PATH"],
-            audio_start_time=audio_start_time_sec,
-            audio_end_time=audio_end_time_sec,
-            video_fps=params["VIDEO_FPS"],
-            waveform_analysis_mode=params["WAVEFORM_ANALYSIS_MODE"],
-            waveform_bar_count=params["WAVEFORM_BAR_COUNT"],
-            waveform_smoothing_factor=params["WAVEFORM_SMOOTHING_FACTOR"],
-            waveform_min_db=params["WAVEFORM_MIN_DB"],
-            waveform_max_db=params["WAVEFORM_MAX_DB"]
-        )
-        
-        # Calculate video duration
-        video_duration = params["AUDIO_END_TIME"] - params["AUDIO_START_TIME"]
-        if video_duration <= 0: video_duration = 1
-        
-        # Create a frame maker function that uses the assets and parameters
-        def frame_maker(t):
-            return video_generation.make_frame_for_moviepy(
-                t=t,
-                assets=assets,
-                video_fps=params["VIDEO_FPS"],
-                video_width=params["VIDEO_WIDTH"],
-                video_height=params["VIDEO_HEIGHT"],
-                background_mode=params["BACKGROUND_MODE"],
-                image_corner_radius=params["IMAGE_CORNER_RADIUS"],
-                shadow_offset_x=params["SHADOW_OFFSET_X"],
-                shadow_offset_y=params["SHADOW_OFFSET_Y"],
-                shadow_blur_radius=params["SHADOW_BLUR_RADIUS"],
-                waveform_enabled=params["WAVEFORM_ENABLED"],
-                waveform_color_mode=params["WAVEFORM_COLOR_MODE"],
-                waveform_color=params["WAVEFORM_COLOR"],
-                waveform_bar_count=params["WAVEFORM_BAR_COUNT"],
-                waveform_bar_spacing_ratio=params["WAVEFORM_BAR_SPACING_RATIO"]
-            )
-        
-        # Create the video clip using the frame maker function
-        video_clip = mpe.VideoClip(frame_maker, duration=video_duration)
-        
-        # Add audio if available
-        if os.path.exists(params["AUDIO_PATH"]):
-            audio_clip = mpe.AudioFileClip(params["AUDIO_PATH"])
-            actual_start = min(max(0, params["AUDIO_START_TIME"]), audio_clip.duration)
-            actual_end = min(max(actual_start, params["AUDIO_END_TIME"]), audio_clip.duration)
-            
-            if actual_start >= actual_end:
-                video_clip = video_clip.set_audio(None)
-            else:
-                trimmed_audio = audio_clip.subclip(actual_start, actual_end)
-                if trimmed_audio.duration < video_clip.duration:
-                    video_clip = video_clip.set_duration(trimmed_audio.duration)
-                elif trimmed_audio.duration > video_clip.duration:
-                    trimmed_audio = trimmed_audio.set_duration(video_clip.duration)
-                video_clip = video_clip.set_audio(trimmed_audio)
-        
-        # Write the result to a file
-        video_clip.write_videofile(
-            params["OUTPUT_VIDEO_FILENAME"],
-            fps=params["VIDEO_FPS"],
-            codec="libx264",
-            audio_codec="aac",
-            threads=4
-        )
-        
-        success = True
-        message = f"Video generated successfully: {params['OUTPUT_VIDEO_FILENAME']}"
-    except Exception as e:
-        success = False
-        message = f"Error generating video: {str(e)}"
-    
-    class Result:
-        def __init__(self, success, message):
-            self.returncode = 0 if success else 1
-            self.stdout = message if success else ""
-            self.stderr = "" if success else message
-    
-    return Result(success, message)
+# Precomputed assets are cached so previews and thumbnails only pay for compositing a frame
+# Keyed on the config's assets_hash: settings that only affect compositing reuse the cached assets
+@st.cache_resource(max_entries=4, show_spinner="Preparing preview assets...")
+def load_preview_assets(assets_hash, _config):
+    import video_generation
+    return video_generation.precompute_assets(_config)
+
+def render_preview_still(config, frame_idx, image_format="PNG"):
+    """Render a single frame of the video described by a RenderConfig to encoded image bytes"""
+    import video_generation
+    assets = load_preview_assets(config.assets_hash, config)
+    return video_generation.render_still(assets, config, frame_idx, image_format=image_format)
+
+# Uploaded inputs live in a content-addressed store: one write per distinct file and stable paths across reruns
+AUDIO_MIME_TYPES = {".wav": "audio/wav", ".mp3": "audio/mpeg", ".flac": "audio/flac"}
+
+@st.cache_resource
+def get_upload_store():
+    return UploadStore()
+
+# Paths used by this run of the script: storing one input never evicts another input of the same submission
+rerun_upload_paths = []
+
+def store_upload(uploaded_file):
+    """Stable path of an uploaded file; its bytes are hashed and written once per upload, not on every rerun"""
+    key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+    stored_uploads = st.session_state.setdefault('stored_uploads', {})
+    path = stored_uploads.get(key)
+    if path is None or not os.path.exists(path):
+        path = stored_uploads[key] = get_upload_store().put(uploaded_file.getvalue(), uploaded_file.name,
+                                                            keep=rerun_upload_paths)
+    rerun_upload_paths.append(path)
+    return path
+
+# Render queue shared by every session; RENDER_MAX_CONCURRENCY caps simultaneous renders on this server.
+# Once both inputs are uploaded (or on the first job, not at first paint) it warms up librosa/numba in the background
+# (RENDER_WARM_UP=0 disables; NUMBA_CACHE_DIR persists the JIT cache).
+@st.cache_resource
+def get_render_queue():
+    return RenderQueue(max_workers=int(os.getenv('RENDER_MAX_CONCURRENCY', '2')),
+                       warm=os.getenv('RENDER_WARM_UP', '1') != '0', upload_store=get_upload_store())
+
+render_queue = get_render_queue()
+if 'render_job_ids' not in st.session_state:
+    st.session_state.render_job_ids = []
+JOB_POLL_SECONDS = 1
+
+def has_active_render_jobs():
+    return any(render_queue.get(job_id) and render_queue.get(job_id).is_active for job_id in st.session_state.render_job_ids)
+
+# One YouTube client per credential, kept across reruns (it caches channel info and categories itself)
+def credentials_cache_key(credentials):
+    identity = credentials.refresh_token or credentials.token or ''
+    return hashlib.sha256(f"{credentials.client_id}:{identity}".encode()).hexdigest()
+
+@st.cache_resource(max_entries=16)
+def get_youtube_service(credentials_key, _credentials):
+    from youtube_service import YouTubeService
+    return YouTubeService(_credentials)
 
 # Input and Output settings
 with tab_input:
@@ -180,33 +120,25 @@ with tab_input:
                                          help="The image to be displayed in the video")
         
         if uploaded_image:
-            # Save the uploaded image to a temporary file
-            temp_image = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-            temp_image.write(uploaded_image.getvalue())
-            temp_image_path = temp_image.name
-            temp_image.close()
-            
+            image_path = store_upload(uploaded_image)
             st.image(uploaded_image, caption="Uploaded Image", width=300)
-            image_path = temp_image_path
         else:
             image_path = ""
     
     with col2:
-        uploaded_audio = st.file_uploader("Upload Audio", type=["wav", "mp3"], 
+        uploaded_audio = st.file_uploader("Upload Audio", type=["wav", "mp3", "flac"], 
                                          help="The audio file to be used in the video")
         
         if uploaded_audio:
-            # Save the uploaded audio to a temporary file
-            temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-            temp_audio.write(uploaded_audio.getvalue())
-            temp_audio_path = temp_audio.name
-            temp_audio.close()
-            
-            st.audio(uploaded_audio, format="audio/wav")
-            audio_path = temp_audio_path
+            audio_path = store_upload(uploaded_audio)
+            st.audio(uploaded_audio, format=AUDIO_MIME_TYPES.get(Path(audio_path).suffix, "audio/wav"))
         else:
             audio_path = ""
     
+    uploaded_lyrics = st.file_uploader("Upload Lyrics (optional)", type=["lrc", "srt"],
+                                      help="Timed lyrics or captions (LRC or SRT, timed to the full track) shown above or below the waveform")
+    lyrics_path = store_upload(uploaded_lyrics) if uploaded_lyrics else ""
+    
     # Profile selection dropdown
     st.subheader("Video Profile")
     profile_options = []
@@ -234,15 +166,23 @@ with tab_input:
     selected_profile_key = None
     if selected_profile_display in profile_options:
         selected_profile_key = profile_keys[profile_options.index(selected_profile_display)]
+    selected_profile = profiles.get(selected_profile_key) if profiles else None
+    
+    # Widget defaults come from the profile's validated config; a broken profile falls back to the built-in defaults
+    try:
+        profile_config = RenderConfig.from_profile(selected_profile, image_path, audio_path)
+    except ValueError as e:
+        st.error(f"Profile '{selected_profile_display}' is invalid ({e}); using default settings")
+        profile_config = RenderConfig.from_profile(None, image_path, audio_path)
     
     # Auto-calculate video length checkbox
-    default_use_audio_duration = get_profile_value(selected_profile_key, 'input_output.use_audio_duration', False)
+    default_use_audio_duration = render_config.get_profile_value(selected_profile, 'input_output.use_audio_duration', False)
     use_audio_duration = st.checkbox("Auto-calculate video length from audio duration", default_use_audio_duration,
                                     help="When enabled, automatically sets start time to 0 and end time to the full audio duration")
     
     # Time input in MM:SS format
-    default_start_time = get_profile_value(selected_profile_key, 'input_output.audio_start_time', "00:33")
-    default_end_time = get_profile_value(selected_profile_key, 'input_output.audio_end_time', "01:26")
+    default_start_time = seconds_to_time_str(profile_config.audio_start_time)
+    default_end_time = seconds_to_time_str(profile_config.audio_end_time)
     
     # Initialize session state for time values if not exists
     if 'audio_start_time_str' not in st.session_state:
@@ -260,8 +200,13 @@ with tab_input:
     # Calculate auto duration if enabled and audio is uploaded
     if use_audio_duration and uploaded_audio and audio_path:
         try:
-            import librosa
-            audio_duration = librosa.get_duration(path=audio_path)
+            # Header-only probe (cached per file); librosa only for files it can't parse
+            audio_info = media_probe.probe_audio(audio_path)
+            if audio_info:
+                audio_duration = audio_info["duration"]
+            else:
+                import librosa
+                audio_duration = librosa.get_duration(path=audio_path)
             minutes = int(audio_duration // 60)
             seconds = int(audio_duration % 60)
             calculated_start_time = "00:00"
@@ -284,23 +229,6 @@ with tab_input:
     st.session_state.audio_start_time_str = audio_start_time_str
     st.session_state.audio_end_time_str = audio_end_time_str
     
-    # Convert MM:SS to seconds
-    def time_str_to_seconds(time_str):
-        try:
-            # Handle different formats
-            if ":" in time_str:
-                parts = time_str.split(":")
-                if len(parts) == 2:  # MM:SS
-                    minutes, seconds = parts
-                    return int(minutes) * 60 + int(seconds)
-                elif len(parts) == 3:  # HH:MM:SS
-                    hours, minutes, seconds = parts
-                    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-            # Handle direct seconds input
-            return int(time_str)
-        except ValueError:
-            return 0  # Default to 0 if parsing fails
-    
     # Convert input strings to seconds
     audio_start_time = time_str_to_seconds(audio_start_time_str)
     audio_end_time = time_str_to_seconds(audio_end_time_str)
@@ -309,7 +237,7 @@ with tab_input:
     st.caption(f"Start time in seconds: {audio_start_time}")
     st.caption(f"End time in seconds: {audio_end_time}")
     
-    default_output_filename = get_profile_value(selected_profile_key, 'input_output.output_filename', "youtube_short.mp4")
+    default_output_filename = profile_config.output_filename
     output_filename = st.text_input("Output Video Filename", default_output_filename, 
                                   help="Name of the output video file")
 
@@ -318,13 +246,13 @@ with tab_video:
     st.header("Video Settings")
     
     # Single column layout for better vertical alignment
-    default_fps = get_profile_value(selected_profile_key, 'video.fps', 60)
+    default_fps = profile_config.video_fps
     video_fps = st.number_input("Video FPS", 24, 60, default_fps, 
                         help="Frames per second for the output video")
     
     st.markdown("Video Dimensions (9:16 aspect ratio for YouTube Shorts)")
-    default_width = get_profile_value(selected_profile_key, 'video.width', 1080)
-    default_height = get_profile_value(selected_profile_key, 'video.height', 1920)
+    default_width = profile_config.video_width
+    default_height = profile_config.video_height
     video_width = st.number_input("Video Width", 360, 1920, default_width, 
                                 help="Width of the output video")
     video_height = st.number_input("Video Height", 640, 3840, default_height, 
@@ -334,7 +262,7 @@ with tab_video:
 with tab_background:
     st.header("Background Settings")
     
-    default_bg_mode = get_profile_value(selected_profile_key, 'background.mode', "blur_image")
+    default_bg_mode = profile_config.background_mode
     bg_modes = ["blur_image", "solid"]
     bg_mode_index = bg_modes.index(default_bg_mode) if default_bg_mode in bg_modes else 0
     background_mode = st.selectbox("Background Mode", 
@@ -343,9 +271,11 @@ with tab_background:
                                  help="Options: 'solid', 'blur_image'")
     
     # Initialize all background variables to avoid NameError
-    default_blur_radius = get_profile_value(selected_profile_key, 'background.blur_radius', 50)
-    default_image_fit = get_profile_value(selected_profile_key, 'background.image_fit', "stretch")
-    default_bg_color = get_profile_value(selected_profile_key, 'background.color', "#000000")
+    default_blur_radius = profile_config.background_blur_radius
+    default_image_fit = profile_config.background_image_fit
+    default_bg_color = rgb_to_hex(profile_config.background_color)
+    default_bg_motion = profile_config.background_motion
+    default_bg_motion_zoom = profile_config.background_motion_zoom
     
     if background_mode == "blur_image":
         background_blur_radius = st.number_input("Background Blur Radius", 10, 100, default_blur_radius, 
@@ -357,6 +287,17 @@ with tab_background:
                                           fit_options,
                                           index=fit_index, 
                                           help="Options: 'stretch', 'crop', 'fill'")
+        
+        motion_options = list(render_config.BACKGROUND_MOTIONS)
+        motion_index = motion_options.index(default_bg_motion) if default_bg_motion in motion_options else 0
+        background_motion = st.selectbox("Background Motion",
+                                         motion_options,
+                                         index=motion_index,
+                                         help="'ken_burns' slowly zooms and pans the blurred background over the video")
+        background_motion_zoom = default_bg_motion_zoom
+        if background_motion == "ken_burns":
+            background_motion_zoom = st.number_input("Background Motion Zoom", 1.0, 2.0, default_bg_motion_zoom, step=0.01,
+                                                     help="How far the background zooms in by the end of the video")
         # Set defaults for variables not shown in this mode
         background_color = default_bg_color
     else:
@@ -365,51 +306,56 @@ with tab_background:
         # Set defaults for variables not shown in this mode
         background_blur_radius = default_blur_radius
         background_image_fit = default_image_fit
+        background_motion = default_bg_motion
+        background_motion_zoom = default_bg_motion_zoom
 
 # Image settings
 with tab_image:
     st.header("Image Settings")
     
-    default_img_width_pct = get_profile_value(selected_profile_key, 'image.width_percentage', 65)
+    default_img_width_pct = profile_config.image_width_percentage
     image_width_percentage = st.number_input("Image Width Percentage", 10, 100, default_img_width_pct, 
                                       help="Width of the image as a percentage of the video width")
     
-    default_corner_radius = get_profile_value(selected_profile_key, 'image.corner_radius', 30)
+    default_corner_radius = profile_config.image_corner_radius
     image_corner_radius = st.number_input("Image Corner Radius", 0, 100, default_corner_radius, 
                                    help="Set to 0 for no rounding")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        default_x_pos = get_profile_value(selected_profile_key, 'image.x_position', -1)
+        default_x_pos = profile_config.image_x_position
         image_x_position = st.number_input("Image X Position", -1, 1920, default_x_pos, 
                                          help="Top-left corner X for the image (-1 for auto-center)")
     
     with col2:
-        default_y_pos = get_profile_value(selected_profile_key, 'image.y_position', -1)
+        default_y_pos = profile_config.image_y_position
         image_y_position = st.number_input("Image Y Position", -1, 3840, default_y_pos, 
                                          help="Top-left corner Y for the image (-1 for auto-center)")
     
+    image_pulse_scale = st.number_input("Image Pulse Scale", 0.0, 0.5, profile_config.image_pulse_scale, step=0.01,
+                                        help="How much the image grows on beats (0.05 = 5%); 0 disables the pulse")
+    
     st.subheader("Shadow Properties")
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        default_shadow_x = get_profile_value(selected_profile_key, 'shadow.offset_x', 10)
+        default_shadow_x = profile_config.shadow_offset_x
         shadow_offset_x = st.number_input("Shadow Offset X", 0, 50, default_shadow_x, 
                                         help="Horizontal offset for shadow")
     
     with col2:
-        default_shadow_y = get_profile_value(selected_profile_key, 'shadow.offset_y', 10)
+        default_shadow_y = profile_config.shadow_offset_y
         shadow_offset_y = st.number_input("Shadow Offset Y", 0, 50, default_shadow_y, 
                                         help="Vertical offset for shadow")
     
     with col3:
-        default_shadow_blur = get_profile_value(selected_profile_key, 'shadow.blur_radius', 15)
+        default_shadow_blur = profile_config.shadow_blur_radius
         shadow_blur_radius = st.number_input("Shadow Blur Radius", 0, 50, default_shadow_blur, 
                                            help="Blur radius for shadow")
     
-    default_shadow_darkness = get_profile_value(selected_profile_key, 'shadow.darkness_factor', 0.5)
+    default_shadow_darkness = profile_config.shadow_darkness_factor
     shadow_darkness_factor = st.number_input("Shadow Darkness Factor", 0.0, 1.0, default_shadow_darkness, step=0.01, 
                                       help="For solid bg image shadow")
 
@@ -417,23 +363,39 @@ with tab_image:
 with tab_waveform:
     st.header("Waveform Animation Settings")
     
-    default_waveform_enabled = get_profile_value(selected_profile_key, 'waveform.enabled', True)
+    default_waveform_enabled = profile_config.waveform_enabled
     waveform_enabled = st.checkbox("Enable Waveform", default_waveform_enabled, 
                                   help="Whether to show the audio waveform visualization")
     
-    # Initialize default values for waveform-related variables from profile
-    waveform_analysis_mode = get_profile_value(selected_profile_key, 'waveform.analysis_mode', "melspectrogram")
-    waveform_color_mode = get_profile_value(selected_profile_key, 'waveform.color_mode', "contrast")
-    waveform_color = get_profile_value(selected_profile_key, 'waveform.color', "#FFFFFF")
-    waveform_height_percentage = get_profile_value(selected_profile_key, 'waveform.height_percentage', 15)
-    waveform_bar_count = get_profile_value(selected_profile_key, 'waveform.bar_count', 50)
-    waveform_bar_spacing_ratio = get_profile_value(selected_profile_key, 'waveform.bar_spacing_ratio', 0.2)
-    waveform_smoothing_factor = get_profile_value(selected_profile_key, 'waveform.smoothing_factor', 0.35)
-    spacing_image_waveform = get_profile_value(selected_profile_key, 'waveform.spacing_from_image', 215)
-    waveform_min_db = get_profile_value(selected_profile_key, 'waveform.min_db', -80.0)
-    waveform_max_db = get_profile_value(selected_profile_key, 'waveform.max_db', 0.0)
+    # Initialize default values for waveform-related variables from the profile config
+    waveform_style = profile_config.waveform_style
+    waveform_antialias = profile_config.waveform_antialias
+    waveform_analysis_mode = profile_config.waveform_analysis_mode
+    waveform_color_mode = profile_config.waveform_color_mode
+    waveform_color = rgb_to_hex(profile_config.waveform_color)
+    waveform_height_percentage = profile_config.waveform_height_percentage
+    waveform_bar_count = profile_config.waveform_bar_count
+    waveform_bar_spacing_ratio = profile_config.waveform_bar_spacing_ratio
+    waveform_smoothing_factor = profile_config.waveform_smoothing_factor
+    spacing_image_waveform = profile_config.spacing_image_waveform
+    waveform_min_db = profile_config.waveform_min_db
+    waveform_max_db = profile_config.waveform_max_db
     
     if waveform_enabled:
+        waveform_styles = ["bars", "mirrored", "line", "radial"]
+        style_index = waveform_styles.index(waveform_style) if waveform_style in waveform_styles else 0
+        waveform_style = st.selectbox("Waveform Style",
+                                     waveform_styles,
+                                     index=style_index,
+                                     help="'bars' and 'mirrored' draw bars (mirrored grows from the middle), 'line' a filled spectrum, 'radial' spokes around the image")
+        
+        antialias_factors = [1, 2, 3, 4]
+        waveform_antialias = st.selectbox("Waveform Anti-aliasing",
+                                         antialias_factors,
+                                         index=antialias_factors.index(waveform_antialias) if waveform_antialias in antialias_factors else 0,
+                                         format_func=lambda factor: "Off" if factor == 1 else f"{factor}x supersampling",
+                                         help="Draws only the waveform at a higher resolution for smooth edges; costs some render speed")
+        
         analysis_modes = ["melspectrogram", "rms"]
         analysis_index = analysis_modes.index(waveform_analysis_mode) if waveform_analysis_mode in analysis_modes else 0
         waveform_analysis_mode = st.selectbox("Waveform Analysis Mode", 
@@ -477,88 +439,229 @@ with tab_waveform:
             waveform_max_db = st.number_input("Waveform Max dB", -50.0, 0.0, waveform_max_db, step=0.1, 
                                        help="For melspectrogram normalization")
 
+    lyrics_position = profile_config.lyrics_position
+    lyrics_font_size = profile_config.lyrics_font_size
+    lyrics_color = rgb_to_hex(profile_config.lyrics_color)
+    lyrics_fade_seconds = profile_config.lyrics_fade_seconds
+    if lyrics_path:
+        st.subheader("Lyrics")
+        col1, col2 = st.columns(2)
+        with col1:
+            lyrics_positions = ["below", "above"]
+            lyrics_position = st.selectbox("Lyrics Position", lyrics_positions,
+                                           index=lyrics_positions.index(lyrics_position) if lyrics_position in lyrics_positions else 0,
+                                           help="Below the waveform (or image), or above the image")
+            lyrics_font_size = st.number_input("Lyrics Font Size", 12, 200, lyrics_font_size)
+        with col2:
+            lyrics_color = st.color_picker("Lyrics Color", lyrics_color)
+            lyrics_fade_seconds = st.number_input("Lyrics Fade (seconds)", 0.0, 2.0, lyrics_fade_seconds, step=0.05,
+                                                  help="Fade in/out time of each line")
+
 # Generate video
 with tab_generate:
     st.header("Generate Video")
     
+    # One validated config for the preview and the render; hex colors are converted to RGB by RenderConfig
+    try:
+        video_config = profile_config.replace(
+            image_path=image_path,
+            audio_path=audio_path,
+            audio_start_time=audio_start_time,
+            audio_end_time=audio_end_time,
+            output_filename=output_filename,
+            video_fps=video_fps,
+            video_width=video_width,
+            video_height=video_height,
+            background_mode=background_mode,
+            background_blur_radius=background_blur_radius,
+            background_image_fit=background_image_fit,
+            background_color=background_color,
+            background_motion=background_motion,
+            background_motion_zoom=background_motion_zoom,
+            image_width_percentage=image_width_percentage,
+            image_corner_radius=image_corner_radius,
+            image_x_position=image_x_position,
+            image_y_position=image_y_position,
+            image_pulse_scale=image_pulse_scale,
+            shadow_offset_x=shadow_offset_x,
+            shadow_offset_y=shadow_offset_y,
+            shadow_blur_radius=shadow_blur_radius,
+            shadow_darkness_factor=shadow_darkness_factor,
+            waveform_enabled=waveform_enabled,
+            waveform_analysis_mode=waveform_analysis_mode,
+            waveform_color_mode=waveform_color_mode,
+            waveform_style=waveform_style,
+            waveform_antialias=waveform_antialias,
+            waveform_color=waveform_color,
+            waveform_height_percentage=waveform_height_percentage,
+            waveform_bar_count=waveform_bar_count,
+            waveform_bar_spacing_ratio=waveform_bar_spacing_ratio,
+            waveform_smoothing_factor=waveform_smoothing_factor,
+            spacing_image_waveform=spacing_image_waveform,
+            waveform_min_db=waveform_min_db,
+            waveform_max_db=waveform_max_db,
+            lyrics_path=lyrics_path,
+            lyrics_position=lyrics_position,
+            lyrics_font_size=lyrics_font_size,
+            lyrics_color=lyrics_color,
+            lyrics_fade_seconds=lyrics_fade_seconds
+        )
+    except ValueError as e:
+        video_config = None
+        st.error(f"Invalid settings: {e}")
+    
+    # Live still preview straight from cached assets (no encoding)
+    if uploaded_image and uploaded_audio and video_config:
+        render_queue.start_warm_up()  # A render is now likely; warm up while the settings are tweaked
+        show_preview = st.checkbox("Show live preview", value=False,
+                                   help="Render a single frame with the current settings; updates as you change them")
+        if show_preview:
+            preview_duration = video_config.video_duration
+            preview_time = st.slider("Preview time (seconds into the video)", 0.0, float(preview_duration), 0.0, step=0.1)
+            try:
+                preview_bytes = render_preview_still(video_config, int(preview_time * video_fps))
+                st.image(preview_bytes, caption=f"Frame {int(preview_time * video_fps)}", width=360)
+            except Exception as e:
+                st.warning(f"Could not render preview: {e}")
+        
+        # Parameter sweep: stills of every combination of a few values, on one contact sheet
+        with st.expander("Parameter sweep (contact sheet)"):
+            sweep_fields = {"Bar count": ("waveform_bar_count", int), "Bar spacing ratio": ("waveform_bar_spacing_ratio", float),
+                            "Smoothing factor": ("waveform_smoothing_factor", float), "Waveform color": ("waveform_color", str)}
+            sweep_params = st.multiselect("Parameters to sweep", list(sweep_fields), default=["Bar count", "Smoothing factor"],
+                                          max_selections=3, help="Rows are combinations of all but the last parameter; columns are the last one")
+            sweep_values = {}
+            for label in sweep_params:
+                text = st.text_input(f"{label} values (comma-separated)", key=f"sweep_{sweep_fields[label][0]}",
+                                     placeholder="#FFFFFF, #FFD700" if sweep_fields[label][1] is str else "e.g. 32, 48, 64")
+                sweep_values[label] = [value.strip() for value in text.split(",") if value.strip()]
+            sweep_times = st.text_input("Sample times (seconds into the video, comma-separated)", "2, 10, 20")
+            if st.button("Render contact sheet"):
+                try:
+                    import param_sweep
+                    grid = {sweep_fields[label][0]: [sweep_fields[label][1](value) for value in values] for label, values in sweep_values.items()}
+                    sweep_config = video_config
+                    if "waveform_color" in grid: sweep_config = sweep_config.replace(waveform_color_mode="custom")
+                    frame_indices = [int(float(value) * video_fps) for value in sweep_times.split(",") if value.strip()]
+                    sweep_progress = st.progress(0.0)
+                    with st.spinner("Rendering sweep..."):
+                        sweep = param_sweep.render_contact_sheet(sweep_config, grid, frame_indices,
+                                                                 progress_callback=lambda done, total: sweep_progress.progress(done / total))
+                    st.image(sweep["png"], caption=f"{sweep['cells']} settings x {len(frame_indices) or 1} frames in {sweep['seconds']:.1f}s")
+                    st.download_button("Download contact sheet", sweep["png"], file_name="parameter_sweep.png", mime="image/png")
+                except ValueError as e:
+                    st.error(f"Invalid sweep: {e}")
+                except Exception as e:  # Unreadable image/audio (OSError, PIL errors) and analysis failures
+                    st.error(f"Could not render the sweep: {e}")
+        
+        # Render time and file size estimate from a few real composed and encoded frames. It runs on a render
+        # slot; this fragment polls for it, so the page stays responsive while it renders
+        estimate_future = render_queue.get_estimate(video_config)
+        if st.button("Estimate render time and size",
+                     help="Renders and encodes a few seconds of frames with these settings and extrapolates to the whole video"):
+            estimate_future = render_queue.estimate(video_config)
+        
+        def render_estimate_panel(future, polling):
+            if not future.done():
+                st.info("Estimating render time and size (rendering sample frames)...")
+                return
+            if polling:
+                st.rerun()  # Stop polling; the full rerun draws the result
+            if future.exception() is not None:
+                st.warning(f"Could not estimate the render: {future.exception()}")
+                return
+            estimate = future.result()
+            size_mb = estimate["estimated_bytes"] / 1024**2
+            size_text = f"{size_mb / 1024:.2f} GB" if size_mb >= 1024 else f"{size_mb:.1f} MB"
+            st.info(f"Estimated render time: {seconds_to_time_str(estimate['estimated_seconds'])}, "
+                    f"output size: about {size_text} ({estimate['total_frames']} frames, "
+                    f"{estimate['seconds_per_frame'] * 1000:.0f} ms per frame)")
+            from youtube_service import YouTubeService
+            size_ok, size_message = YouTubeService.check_video_size(estimate["estimated_bytes"])
+            if not size_ok:
+                st.error(f"The video would be too large to upload to YouTube. {size_message}")
+        
+        if estimate_future is not None:
+            estimate_pending = not estimate_future.done()
+            st.fragment(render_estimate_panel, run_every=JOB_POLL_SECONDS if estimate_pending else None)(estimate_future, estimate_pending)
+    
+    collect_timings = st.checkbox("Collect timing report", value=False,
+                                  help="Record per-stage and per-frame render timings (small overhead)")
+    
     if st.button("Generate YouTube Short", type="primary"):
         if not uploaded_image:
             st.error("Please upload an image")
         elif not uploaded_audio:
             st.error("Please upload an audio file")
+        elif video_config is None:
+            st.error("Fix the invalid settings before generating")
         else:
-            # Convert color picker hex to RGB tuple if needed
-            if background_mode == "solid":
-                bg_color = tuple(int(background_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+            job_id = render_queue.submit(video_config, collect_timings=collect_timings)
+            st.session_state.render_job_ids.append(job_id)
+            st.info(f"Render job #{job_id} queued")
+    
+    # Progress and results of this session's render jobs (most recent first). While a job is active only this
+    # fragment reruns, every JOB_POLL_SECONDS, instead of the whole page
+    def render_jobs_panel(polling):
+        collected = st.session_state.get('render_job_collected', 0)
+        for job_id in reversed(st.session_state.render_job_ids):
+            job = render_queue.get(job_id)
+            if job is None:
+                continue
+            output_name = os.path.basename(job.config.output_filename)
+            if job.status == "queued" and not render_queue.is_warm:
+                st.info(f"Job #{job_id} ({output_name}): waiting for the renderer to warm up")
+            elif job.status == "queued":
+                st.info(f"Job #{job_id} ({output_name}): waiting for a free render slot "
+                        f"({render_queue.queued_ahead(job_id)} job(s) ahead)")
+            elif job.status == "running":
+                st.write(f"**Job #{job_id}** ({output_name})")
+                st.progress(job.progress)
+                eta = f", ETA {job.eta_seconds:.0f}s" if job.eta_seconds is not None else ""
+                if job.total_frames:
+                    st.caption(f"{job.frames_done}/{job.total_frames} frames, {job.fps:.1f} fps{eta}")
+                else:
+                    st.caption("Preparing assets...")
+            elif job.status == "failed":
+                st.error(f"Job #{job_id}: {job.error}")
             else:
-                bg_color = (0, 0, 0)  # Default
-                
-            # Process waveform color
-            waveform_color_tuple = (255, 255, 255)  # Default
-            if waveform_enabled and waveform_color_mode == "custom":
-                waveform_color_tuple = tuple(int(waveform_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
-                
-            # Prepare parameters for the main script
-            params = {
-                "IMAGE_PATH": image_path,
-                "AUDIO_PATH": audio_path,
-                "AUDIO_START_TIME": audio_start_time,
-                "AUDIO_END_TIME": audio_end_time,
-                "OUTPUT_VIDEO_FILENAME": output_filename,
-                "VIDEO_FPS": video_fps,
-                "VIDEO_WIDTH": video_width,
-                "VIDEO_HEIGHT": video_height,
-                "BACKGROUND_MODE": background_mode,
-                "BACKGROUND_BLUR_RADIUS": background_blur_radius if background_mode == "blur_image" else 0,
-                "BACKGROUND_IMAGE_FIT": background_image_fit if background_mode == "blur_image" else "stretch",
-                "BACKGROUND_COLOR": bg_color,
-                "IMAGE_WIDTH_PERCENTAGE": image_width_percentage,
-                "IMAGE_CORNER_RADIUS": image_corner_radius,
-                "IMAGE_X_POSITION": image_x_position,
-                "IMAGE_Y_POSITION": image_y_position,
-                "SHADOW_OFFSET_X": shadow_offset_x,
-                "SHADOW_OFFSET_Y": shadow_offset_y,
-                "SHADOW_BLUR_RADIUS": shadow_blur_radius,
-                "SHADOW_DARKNESS_FACTOR": shadow_darkness_factor,
-                "WAVEFORM_ENABLED": waveform_enabled,
-                "WAVEFORM_ANALYSIS_MODE": waveform_analysis_mode,
-                "WAVEFORM_COLOR_MODE": waveform_color_mode,
-                "WAVEFORM_COLOR": waveform_color_tuple,
-                "WAVEFORM_HEIGHT_PERCENTAGE": waveform_height_percentage,
-                "WAVEFORM_BAR_COUNT": waveform_bar_count,
-                "WAVEFORM_BAR_SPACING_RATIO": waveform_bar_spacing_ratio,
-                "WAVEFORM_SMOOTHING_FACTOR": waveform_smoothing_factor,
-                "SPACING_IMAGE_WAVEFORM": spacing_image_waveform,
-                "WAVEFORM_MIN_DB": waveform_min_db,
-                "WAVEFORM_MAX_DB": waveform_max_db
-            }
-            
-            with st.spinner("Generating YouTube Short..."):
-                # Generate the video using main.py functions directly
-                result = generate_video(params)
-                
-                if result.returncode == 0:
-                    st.success(result.stdout)
-                    
-                    # Get the absolute path of the output video
-                    output_video_path = os.path.abspath(output_filename)
-                    
-                    # Display the video
-                    st.video(output_video_path)
-                    
-                    # Store generated video path for YouTube upload
+                output_video_path = job.result["output"]
+                if job_id > st.session_state.get('render_job_collected', 0):
+                    # Store the newest finished video for YouTube upload
+                    st.session_state.render_job_collected = job_id
                     st.session_state.generated_video_path = output_video_path
-                    
-                    # Provide a download button
+                    st.session_state.generated_video_config = job.config
+                st.success(f"Video generated successfully: {job.config.output_filename}")
+                st.video(output_video_path)
+            
+                if job.result.get("timings"):
+                    with st.expander(f"Timing report for job #{job_id}"):
+                        st.table(render_profiler.summary_rows(job.result["timings"]))
+                        st.download_button(
+                            label="Download timing report (JSON)",
+                            data=json.dumps(job.result["timings"], indent=2),
+                            file_name=f"render_timings_{job_id}.json",
+                            mime="application/json",
+                            key=f"timings_job_{job_id}"
+                        )
+            
+                # Provide a download button
+                if os.path.exists(output_video_path):
                     with open(output_video_path, "rb") as file:
                         st.download_button(
                             label="Download Video",
                             data=file,
-                            file_name=os.path.basename(output_filename),
-                            mime="video/mp4"
+                            file_name=output_name,
+                            mime="video/mp4",
+                            key=f"download_job_{job_id}"
                         )
-                else:
-                    st.error(result.stderr)
+        # A new finished video changes the YouTube tab, and once nothing is active the polling can stop: both need
+        # a full rerun
+        if st.session_state.get('render_job_collected', 0) != collected or (polling and not has_active_render_jobs()):
+            st.rerun()
+
+    polling = has_active_render_jobs()
+    st.fragment(render_jobs_panel, run_every=JOB_POLL_SECONDS if polling else None)(polling)
 
 # YouTube Upload and Scheduling
 with tab_youtube:
@@ -696,7 +799,7 @@ with tab_youtube:
         
         try:
             credentials = st.session_state.youtube_credentials
-            youtube_service = YouTubeService(credentials)
+            youtube_service = get_youtube_service(credentials_cache_key(credentials), credentials)
             
             # Get channel info
             try:
@@ -875,6 +978,21 @@ with tab_youtube:
                     is_shorts = True
                     st.info("Will be tagged as YouTube Short (#Shorts)")
                 
+                # Custom thumbnail rendered from a frame of the generated video
+                thumbnail_bytes = None
+                generated_config = st.session_state.get('generated_video_config')
+                if generated_config:
+                    use_frame_thumbnail = st.checkbox("Use a video frame as custom thumbnail", value=False,
+                                                      help="Renders a still from the generated video's settings (requires a verified channel)")
+                    if use_frame_thumbnail:
+                        thumb_duration = generated_config.video_duration
+                        thumb_time = st.slider("Thumbnail time (seconds into the video)", 0.0, float(thumb_duration), 0.0, step=0.1)
+                        try:
+                            thumbnail_bytes = render_preview_still(generated_config, int(thumb_time * generated_config.video_fps), image_format="JPEG")
+                            st.image(thumbnail_bytes, caption="Thumbnail preview", width=240)
+                        except Exception as e:
+                            st.warning(f"Could not render thumbnail: {e}")
+                
                 # Upload button (now in a separate form for submission)
                 with st.form("upload_submit_form"):
                     submitted = st.form_submit_button("🚀 Upload to YouTube", type="primary")
@@ -894,6 +1012,7 @@ with tab_youtube:
                                 st.error(error)
                         else:
                             # Prepare metadata
+                            from youtube_service import VideoMetadata
                             metadata = VideoMetadata()
                             metadata.title = title.strip()
                             metadata.description = description.strip()
@@ -916,6 +1035,14 @@ with tab_youtube:
                                             st.success("🎉 Video uploaded successfully!")
                                             st.balloons()
                                         
+                                        if thumbnail_bytes:
+                                            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_thumbnail:
+                                                temp_thumbnail.write(thumbnail_bytes)
+                                            try:
+                                                youtube_service.upload_thumbnail(result['video_id'], temp_thumbnail.name)
+                                            finally:
+                                                os.remove(temp_thumbnail.name)
+                                        
                                         col1, col2 = st.columns(2)
                                         with col1:
                                             st.write(f"**Title:** {result['title']}")
@@ -0,0 +1,191 @@
+# Headless batch renderer driven by a YAML/JSON job manifest
+#
+# Example manifest:
+#
+#   profiles_file: video_profiles.yaml   # optional, defaults to the repo's profiles
+#   defaults:                             # optional, merged into every job
+#     profile: default_profile
+#   jobs:
+#     - image: covers/track01.png
+#       audio: audio/track01.wav
+#       profile: default_profile
+#       start: "00:33"
+#       end: "01:26"
+#       output: out/track01_short.mp4     # optional; defaults to a per-job name next to the profile's output
+#       overrides:                        # optional dotted profile paths
+#         waveform.bar_count: 64
+#     - image: covers/track02.png         # several profiles from one decode and one analysis
+#       audio: audio/track02.wav
+#       profiles: [default_profile, visualizer_profile]
+#       segments:                         # optional per-profile start/end
+#         default_profile: {start: "00:33", end: "01:26"}
+#       output: out/track02.mp4           # -> out/track02_<profile>.mp4 (or outputs: {profile: path})
+#
+# Usage: python batch_render.py manifest.yaml --workers 2 --report report.json
+#        python batch_render.py manifest.yaml --workers 4 --processes --numba-cache-dir .numba_cache
+#
+# By default jobs run on a bounded thread pool inside one process, so jobs that reuse the same
+# image or audio segment share the decoded image and the audio analysis. With --processes each job
+# runs in one of --workers pre-warmed worker processes (see render_workers.py) instead.
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import yaml
+
+import render_config
+import video_generation
+from render_profiler import RenderProfiler
+from render_workers import WarmProcessPool
+
+def load_manifest(manifest_path):
+    """Load a job manifest from a .yaml/.yml or .json file"""
+    with open(manifest_path, 'r') as file:
+        if manifest_path.lower().endswith('.json'):
+            manifest = json.load(file)
+        else:
+            manifest = yaml.safe_load(file)
+    if isinstance(manifest, list):
+        manifest = {'jobs': manifest}
+    if not manifest or not manifest.get('jobs'):
+        raise ValueError(f"Manifest {manifest_path} has no jobs")
+    return manifest
+
+def build_job_config(job, profiles, base_dir, profile_key=None, index=None):
+    """Turn one manifest job (for one of its profiles) into the RenderConfig used by video_generation"""
+    profile_key = profile_key or job.get('profile', 'default_profile')
+    if profile_key not in profiles:
+        raise ValueError(f"Unknown profile '{profile_key}'")
+    profile = profiles[profile_key]
+    def resolve(path):
+        return path if os.path.isabs(path) else os.path.join(base_dir, path)
+    audio_path = resolve(job['audio'])
+
+    segment = job.get('segments', {}).get(profile_key, {})
+    start, end = segment.get('start', job.get('start')), segment.get('end', job.get('end'))
+    if start is None and end is None and render_config.get_profile_value(profile, 'input_output.use_audio_duration', False):
+        start, end = 0, video_generation.get_audio_duration(audio_path)
+
+    output = job.get('outputs', {}).get(profile_key)
+    if output is None and job.get('output'):
+        output = job['output']
+        if len(job.get('profiles', [])) > 1:
+            stem, ext = os.path.splitext(output)
+            output = f"{stem}_{profile_key}{ext or '.mp4'}"
+    config = render_config.RenderConfig.from_profile(
+        profile,
+        image_path=resolve(job['image']),
+        audio_path=audio_path,
+        audio_start_time=start,
+        audio_end_time=end,
+        output_filename=resolve(output) if output else None,
+        overrides=job.get('overrides')
+    )
+    if not output:
+        # Jobs without an output would all write the profile's one default file; name each after its job instead
+        stem, ext = os.path.splitext(config.output_filename)
+        audio_stem = os.path.splitext(os.path.basename(audio_path))[0]
+        job_tag = f"{index}_" if index is not None else ""
+        config = config.replace(output_filename=f"{stem}_{job_tag}{audio_stem}_{profile_key}_{config.content_hash[:8]}{ext or '.mp4'}")
+    return config
+
+def run_job(index, job, profiles, base_dir, collect_timings=False):
+    """Render one job (one entry per profile it names) and return its report entries; never raises"""
+    profile_keys = job.get('profiles') or [job.get('profile', 'default_profile')]
+    job_start = time.perf_counter()
+    try:
+        configs = [build_job_config(job, profiles, base_dir, profile_key, index) for profile_key in profile_keys]
+    except Exception as e:
+        print(f"[job {index}] Invalid job: {e}")
+        return [{'index': index, 'job': job, 'status': 'failed', 'error': f"{type(e).__name__}: {e}",
+                 'wall_seconds': time.perf_counter() - job_start}]
+
+    print(f"[job {index}] Rendering {', '.join(config.output_filename for config in configs)}")
+    if len(configs) > 1:
+        # One decode and one analysis shared by every profile of this job
+        results = video_generation.render_profiles(configs, logger=None, collect_timings=collect_timings)
+    else:
+        try:
+            profiler = RenderProfiler() if collect_timings else None
+            results = [video_generation.render_video(configs[0], logger=None, profiler=profiler)]
+        except Exception as e:
+            results = [{'output': configs[0].output_filename, 'error': f"{type(e).__name__}: {e}"}]
+
+    entries = []
+    for profile_key, result in zip(profile_keys, results):
+        entry = {'index': index, 'profile': profile_key, 'job': job, **result}
+        entry['status'] = 'failed' if 'error' in result else 'ok'
+        if 'error' in result: print(f"[job {index}] {profile_key} failed: {result['error']}")
+        entry['wall_seconds'] = time.perf_counter() - job_start
+        entries.append(entry)
+    return entries
+
+def run_manifest(manifest_path, workers=2, profiles_path=None, collect_timings=False, processes=False, numba_cache_dir=None):
+    """Run every job in a manifest on a bounded worker pool (threads, or warm processes) and return the report dict"""
+    manifest = load_manifest(manifest_path)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    profiles_path = profiles_path or manifest.get('profiles_file')
+    if profiles_path and not os.path.isabs(profiles_path):
+        profiles_path = os.path.join(base_dir, profiles_path)
+    profiles = render_config.load_video_profiles(profiles_path or render_config.DEFAULT_PROFILES_PATH)
+    defaults = manifest.get('defaults', {})
+    jobs = [{**defaults, **job} for job in manifest['jobs']]
+
+    batch_start = time.perf_counter()
+    pool = WarmProcessPool(max(1, workers), numba_cache_dir=numba_cache_dir) if processes else None
+    executor = pool or ThreadPoolExecutor(max_workers=max(1, workers))
+    jobs_start = time.perf_counter()
+    entries = []
+    first_job_latency = None
+    try:
+        futures = [executor.submit(run_job, i, job, profiles, base_dir, collect_timings) for i, job in enumerate(jobs)]
+        for future in as_completed(futures):
+            if first_job_latency is None:
+                first_job_latency = time.perf_counter() - jobs_start  # First job to finish, whichever it is
+            entries.extend(future.result())
+    finally:
+        executor.shutdown()
+    entries.sort(key=lambda entry: entry['index'])
+    return {
+        'manifest': os.path.abspath(manifest_path),
+        'workers': workers,
+        'processes': processes,
+        'warmup': pool.stats() if pool else None,
+        'first_job_latency_seconds': first_job_latency,
+        'jobs': entries,
+        'succeeded': sum(1 for entry in entries if entry['status'] == 'ok'),
+        'failed': sum(1 for entry in entries if entry['status'] != 'ok'),
+        'wall_seconds': time.perf_counter() - batch_start
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a batch of music shorts from a job manifest")
+    parser.add_argument('manifest', help="YAML or JSON manifest listing the jobs")
+    parser.add_argument('--workers', type=int, default=2, help="Maximum number of jobs rendered at once")
+    parser.add_argument('--profiles', default=None, help="Path to video_profiles.yaml (overrides the manifest)")
+    parser.add_argument('--report', default='render_report.json', help="Where to write the per-job timing/result report")
+    parser.add_argument('--timings', action='store_true', help="Include per-stage and per-frame timing breakdowns in the report")
+    parser.add_argument('--processes', action='store_true', help="Render in pre-warmed worker processes instead of threads")
+    parser.add_argument('--numba-cache-dir', default=None, help="Keep numba's compiled code here across runs (with --processes)")
+    args = parser.parse_args(argv)
+
+    report = run_manifest(args.manifest, workers=args.workers, profiles_path=args.profiles, collect_timings=args.timings,
+                          processes=args.processes, numba_cache_dir=args.numba_cache_dir)
+    with open(args.report, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    print(f"\n{'Job':<5}{'Profile':<22}{'Status':<8}{'Precompute':>12}{'Encode':>10}{'Total':>10}  Output")
+    for entry in report['jobs']:
+        print(f"{entry['index']:<5}{entry.get('profile', '-'):<22}{entry['status']:<8}{entry.get('precompute_seconds', 0):>11.1f}s"
+              f"{entry.get('encode_seconds', 0):>9.1f}s{entry['wall_seconds']:>9.1f}s  {entry.get('output', '-')}")
+    if report['warmup']:
+        print(f"\nWarmed {len(report['warmup']['workers'])} worker process(es) in {report['warmup']['warmup_seconds']:.1f}s")
+    print(f"First job finished {report['first_job_latency_seconds'] or 0:.1f}s after submission")
+    print(f"\n{report['succeeded']} succeeded, {report['failed']} failed in {report['wall_seconds']:.1f}s. Report: {args.report}")
+    return 0 if report['failed'] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
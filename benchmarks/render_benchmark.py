@@ -0,0 +1,276 @@
+# Reproducible render benchmark on synthetic inputs
+#
+# Generates deterministic cover images and audio (short/long, 44.1/96 kHz, mono/stereo), then for every
+# profile in video_profiles.yaml measures analyze_audio, precompute_assets, per-frame rendering (also with the
+# waveform anti-aliased, against the aliased path, and with a Ken Burns background against a static one) and a
+# short encode. Each case runs in a fresh process so
+# peak RSS is per case. Runs offline on a CPU-only box.
+#
+# Usage:
+#   python benchmarks/render_benchmark.py --output bench.json
+#   python benchmarks/render_benchmark.py --quick --baseline benchmarks/baseline.json --threshold 0.15
+#   python benchmarks/render_benchmark.py --save-baseline benchmarks/baseline.json
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import wave
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+from PIL import Image
+
+# Stage timings below this many seconds are too noisy to flag as regressions
+MIN_STAGE_SECONDS = 0.05
+
+def make_cover_image(path, size, seed=0):
+    """Write a deterministic square cover: smooth gradient plus shapes and noise (so blur/resize do real work)"""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:size, 0:size].astype(np.float32)
+    y, x = rows / size, cols / size
+    rgb = np.stack([255 * x, 255 * y, 255 * (1 - x) * y], axis=-1)
+    rgb += rng.normal(0, 12, rgb.shape)
+    for _ in range(12):
+        cx, cy = rng.uniform(0, size, 2)
+        r = rng.uniform(size / 20, size / 6)
+        rgb[(cols - cx) ** 2 + (rows - cy) ** 2 < r ** 2] = rng.uniform(0, 255, 3)
+    Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), "RGB").save(path)
+
+def make_audio(path, seconds, sample_rate, channels, seed=0):
+    """Write a deterministic 16-bit WAV: chord pad, bass at 120 BPM and decaying noise hits"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = sum(0.15 * np.sin(2 * np.pi * f * t) for f in (220.0, 277.18, 329.63))
+    beat_phase = (t * 2.0) % 1.0  # 120 BPM
+    signal += 0.4 * np.sin(2 * np.pi * 55.0 * t) * np.exp(-beat_phase * 6)
+    signal += 0.2 * rng.normal(0, 1, len(t)) * np.exp(-((t * 4.0) % 1.0) * 25)
+    signal = np.clip(signal / np.max(np.abs(signal)), -1, 1)
+    if channels == 2:
+        signal = np.stack([signal, np.roll(signal, sample_rate // 100)], axis=-1)
+    with wave.open(path, "wb") as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes((signal * 32767).astype("<i2").tobytes())
+
+def build_cases(profile_keys, image_sizes, durations, sample_rates, channel_counts):
+    return [
+        {"name": f"{profile}/img{image_size}/{duration}s_{sample_rate // 1000}k_{'stereo' if channels == 2 else 'mono'}",
+         "profile": profile, "image_size": image_size, "duration": duration,
+         "sample_rate": sample_rate, "channels": channels}
+        for profile, image_size, duration, sample_rate, channels
+        in itertools.product(profile_keys, image_sizes, durations, sample_rates, channel_counts)
+    ]
+
+def peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # ru_maxrss is KiB on Linux
+
+def compose_seconds(assets, config, frame_indices):
+    """Time composing frame_indices without the encoder or the profiler"""
+    import video_generation
+    assets.profiler = None
+    start = time.perf_counter()
+    for frame_idx in frame_indices:
+        video_generation.compose_frame(int(frame_idx), assets, config)
+    return time.perf_counter() - start
+
+def drop_caches(video_generation):
+    """Forget in-memory stages and on-disk analysis results, so the next stage timed does the real work"""
+    video_generation._stage_cache.clear()
+    shutil.rmtree(video_generation.ANALYSIS_CACHE_DIR, ignore_errors=True)
+
+def run_case(case, inputs_dir, frame_samples, encode_seconds, antialias_factors=()):
+    """Run one benchmark case; executed in a fresh worker process"""
+    import render_config
+    import video_generation
+    from render_profiler import RenderProfiler
+
+    # A private analysis cache per case: the synthetic audio is byte-identical across runs, so the shared
+    # on-disk cache would turn "cold" analysis into a file read after the first run
+    video_generation.ANALYSIS_CACHE_DIR = tempfile.mkdtemp(prefix="analysis_cache_", dir=inputs_dir)
+
+    profiles = render_config.load_video_profiles()
+    image_path = os.path.join(inputs_dir, f"cover_{case['image_size']}.png")
+    audio_path = os.path.join(inputs_dir, f"audio_{case['duration']}s_{case['sample_rate']}_{case['channels']}ch.wav")
+    config = render_config.RenderConfig.from_profile(
+        profiles[case["profile"]], image_path, audio_path,
+        audio_start_time=0, audio_end_time=case["duration"],
+        output_filename=os.path.join(inputs_dir, "out", f"{case['name'].replace('/', '_')}.mp4"))
+    result = {**case, "stages_seconds": {}}
+
+    # Audio analysis on its own (cold)
+    drop_caches(video_generation)
+    analysis_args = video_generation.analysis_args_for_render(config)
+    start = time.perf_counter()
+    video_generation.analyze_audio(**analysis_args)
+    result["stages_seconds"]["analyze_audio"] = time.perf_counter() - start
+
+    # Full precompute with stage breakdown; drop cached stages so it does the real work
+    drop_caches(video_generation)
+    profiler = RenderProfiler()
+    with profiler.activate():
+        start = time.perf_counter()
+        assets = video_generation.precompute_assets(config)
+        result["stages_seconds"]["precompute_assets"] = time.perf_counter() - start
+    for name, seconds in profiler.report()["stages_seconds"].items():
+        result["stages_seconds"][name] = seconds
+
+    # Per-frame rendering spread over the clip, no encoder
+    fps = config.video_fps
+    frame_count = int(case["duration"] * fps)
+    sample_indices = np.linspace(0, frame_count - 1, min(frame_samples, frame_count)).astype(int)
+    assets.profiler = RenderProfiler()
+    start = time.perf_counter()
+    for frame_idx in sample_indices:
+        video_generation.make_frame_for_moviepy(frame_idx / fps, assets, config)
+    render_seconds = time.perf_counter() - start
+    result["render_fps"] = len(sample_indices) / render_seconds
+    result["frame_stages_mean_ms"] = {name: stats["mean_ms"] for name, stats in assets.profiler.report()["frame_stages"].items()}
+
+    # Anti-aliased waveform: the same frames with the waveform supersampled, relative to the aliased path
+    if config.waveform_enabled:
+        def timed(factor):
+            factor_config = config.replace(waveform_antialias=factor)
+            return compose_seconds(video_generation.precompute_assets(factor_config), factor_config, sample_indices)
+        aliased_seconds = timed(1)
+        result["antialias"] = {}
+        for factor in antialias_factors:
+            aa_seconds = timed(factor)
+            result["antialias"][str(factor)] = {"render_fps": len(sample_indices) / aa_seconds,
+                                                "relative_cost": aa_seconds / aliased_seconds - 1}
+
+    # Ken Burns background: consecutive frames from the middle of the clip, where the zoom moves fastest and so
+    # each cached zoom step serves the fewest frames, relative to the same frames over a static background
+    if config.background_mode == "blur_image":
+        first = max(0, frame_count // 2 - frame_samples // 2)
+        motion_indices = np.arange(first, min(frame_count, first + frame_samples))
+        def timed_motion(motion):
+            motion_config = config.replace(background_motion=motion)
+            return compose_seconds(video_generation.precompute_assets(motion_config), motion_config, motion_indices)
+        static_seconds = timed_motion("none")
+        motion_seconds = timed_motion("ken_burns")
+        result["background_motion"] = {"render_fps": len(motion_indices) / motion_seconds,
+                                       "relative_cost": motion_seconds / static_seconds - 1}
+
+    # Short end-to-end encode
+    encode_config = config.replace(audio_end_time=min(case["duration"], encode_seconds))
+    encode_result = video_generation.render_video(encode_config, logger=None, profiler=RenderProfiler())
+    result["stages_seconds"]["encode"] = encode_result["encode_seconds"]
+    result["encode_fps"] = encode_result["frames"] / encode_result["encode_seconds"] if encode_result["encode_seconds"] else 0.0
+    result["encode_frame_stages_mean_ms"] = {name: stats["mean_ms"] for name, stats in encode_result["timings"]["frame_stages"].items()}
+
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return a list of human-readable regressions of results against a baseline results dict"""
+    baseline_cases = {case["name"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in results["cases"]:
+        base = baseline_cases.get(case["name"])
+        if not base:
+            continue
+        for metric in ("render_fps", "encode_fps"):
+            if base.get(metric) and case[metric] < base[metric] * (1 - threshold):
+                regressions.append(f"{case['name']}: {metric} {case[metric]:.1f} < baseline {base[metric]:.1f}")
+        if base.get("peak_rss_mb") and case["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append(f"{case['name']}: peak_rss_mb {case['peak_rss_mb']:.0f} > baseline {base['peak_rss_mb']:.0f}")
+        for stage, seconds in case["stages_seconds"].items():
+            base_seconds = base.get("stages_seconds", {}).get(stage)
+            if base_seconds is not None and seconds > MIN_STAGE_SECONDS and seconds > base_seconds * (1 + threshold) + MIN_STAGE_SECONDS:
+                regressions.append(f"{case['name']}: {stage} {seconds:.3f}s > baseline {base_seconds:.3f}s")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rendering on synthetic inputs")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the results JSON")
+    parser.add_argument("--profiles", default=None, help="Comma-separated profile keys (default: all in video_profiles.yaml)")
+    parser.add_argument("--image-sizes", default="1024,3000", help="Comma-separated square cover sizes in pixels")
+    parser.add_argument("--durations", default="15,180", help="Comma-separated audio durations in seconds")
+    parser.add_argument("--sample-rates", default="44100,96000", help="Comma-separated audio sample rates")
+    parser.add_argument("--channels", default="1,2", help="Comma-separated channel counts")
+    parser.add_argument("--frame-samples", type=int, default=120, help="Frames rendered per case for render fps")
+    parser.add_argument("--encode-seconds", type=float, default=2.0, help="Seconds of video encoded per case")
+    parser.add_argument("--antialias", default="2,4", help="Comma-separated waveform supersampling factors to compare with the aliased path")
+    parser.add_argument("--quick", action="store_true", help="Small matrix: 1024px cover, 15s 44.1 kHz stereo audio")
+    parser.add_argument("--baseline", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown before flagging a regression")
+    parser.add_argument("--save-baseline", default=None, help="Also write these results as a new baseline")
+    args = parser.parse_args(argv)
+
+    import render_config
+    profile_keys = args.profiles.split(",") if args.profiles else list(render_config.load_video_profiles().keys())
+    parse_list = lambda text, cast: [cast(value) for value in text.split(",") if value]
+    if args.quick:
+        args.image_sizes, args.durations, args.sample_rates, args.channels = "1024", "15", "44100", "2"
+    cases = build_cases(profile_keys, parse_list(args.image_sizes, int), parse_list(args.durations, int),
+                        parse_list(args.sample_rates, int), parse_list(args.channels, int))
+
+    with tempfile.TemporaryDirectory(prefix="render_bench_") as inputs_dir:
+        print(f"Generating synthetic inputs in {inputs_dir}")
+        for image_size in {case["image_size"] for case in cases}:
+            make_cover_image(os.path.join(inputs_dir, f"cover_{image_size}.png"), image_size)
+        for duration, sample_rate, channels in {(c["duration"], c["sample_rate"], c["channels"]) for c in cases}:
+            make_audio(os.path.join(inputs_dir, f"audio_{duration}s_{sample_rate}_{channels}ch.wav"), duration, sample_rate, channels)
+
+        # A fresh process per case keeps caches cold and peak RSS attributable to the case
+        context = multiprocessing.get_context("spawn")
+        results_cases = []
+        with context.Pool(processes=1, maxtasksperchild=1) as pool:
+            for case in cases:
+                print(f"Running {case['name']}...")
+                case_result = pool.apply(run_case, (case, inputs_dir, args.frame_samples, args.encode_seconds,
+                                                       parse_list(args.antialias, int)))
+                print(f"  render {case_result['render_fps']:.1f} fps, encode {case_result['encode_fps']:.1f} fps, "
+                      f"precompute {case_result['stages_seconds']['precompute_assets']:.2f}s, peak RSS {case_result['peak_rss_mb']:.0f} MB")
+                for factor, stats in case_result.get("antialias", {}).items():
+                    print(f"  waveform antialias x{factor}: {stats['render_fps']:.1f} fps ({stats['relative_cost']:+.0%} frame time vs aliased)")
+                if "background_motion" in case_result:
+                    stats = case_result["background_motion"]
+                    print(f"  ken burns background: {stats['render_fps']:.1f} fps ({stats['relative_cost']:+.0%} frame time vs static)")
+                results_cases.append(case_result)
+
+    import PIL
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pillow": PIL.__version__,
+            "frame_samples": args.frame_samples,
+            "encode_seconds": args.encode_seconds
+        },
+        "cases": results_cases
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_to_baseline(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
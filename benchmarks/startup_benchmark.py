@@ -0,0 +1,91 @@
+# Cold-start benchmark for the Streamlit app
+#
+# Each measurement runs in a fresh interpreter so nothing is already imported. With Streamlit's AppTest
+# available, the app script is run headlessly once (the first paint) and the heavy modules it pulled in
+# are listed; the import cost of each heavy module is measured separately for comparison.
+#
+# Usage:
+#   python benchmarks/startup_benchmark.py --repeats 5 --output startup_bench.json
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the app should only load once a render, analysis or upload happens
+HEAVY_MODULES = ["librosa", "moviepy.editor", "googleapiclient.discovery", "video_generation", "youtube_service"]
+
+FIRST_PAINT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import_seconds = time.perf_counter() - start
+start = time.perf_counter()
+app = AppTest.from_file("app.py", default_timeout=120).run()
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "apptest_import_seconds": import_seconds,
+                  "exceptions": [str(e.value) for e in app.exception],
+                  "loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+IMPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import %s
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+def run_fresh(code):
+    """Run code in a fresh interpreter in the repo root and return its JSON output line"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def summarize(samples):
+    return {"median_seconds": statistics.median(samples), "min_seconds": min(samples), "samples": samples}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app cold-start time and heavy import costs")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--output", default="startup_bench.json", help="Where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    results = {"first_paint": None, "imports": {}}
+    try:
+        runs = [run_fresh(FIRST_PAINT_SCRIPT % (HEAVY_MODULES,)) for _ in range(args.repeats)]
+        results["first_paint"] = {**summarize([run["seconds"] for run in runs]),
+                                  "heavy_modules_loaded": runs[-1]["loaded"], "exceptions": runs[-1]["exceptions"]}
+        print(f"First paint (AppTest run of app.py): {results['first_paint']['median_seconds']:.2f}s median")
+        print(f"  heavy modules loaded: {', '.join(runs[-1]['loaded']) or 'none'}")
+    except RuntimeError as e:
+        print(f"First paint not measured (streamlit.testing unavailable or app failed: {e})")
+
+    for module in ["streamlit", "render_config", "render_queue"] + HEAVY_MODULES:
+        try:
+            samples = [run_fresh(IMPORT_SCRIPT % module)["seconds"] for _ in range(args.repeats)]
+        except RuntimeError as e:
+            print(f"import {module}: failed ({e})")
+            continue
+        results["imports"][module] = summarize(samples)
+        print(f"import {module:<28}{results['imports'][module]['median_seconds'] * 1000:8.0f} ms median")
+
+    results["meta"] = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": args.repeats
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
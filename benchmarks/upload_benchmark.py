@@ -0,0 +1,202 @@
+# Upload benchmark against the local YouTube stub server (no real API calls, no quota spent)
+#
+# Measures single-upload throughput per chunk size, retry behaviour under injected 5xx faults and
+# aggregate throughput of upload_videos_batch as the worker count grows, all under a configurable
+# per-request latency and bandwidth limit. Also checks that upload_while_rendering completes files that end
+# exactly on a chunk boundary (exits non-zero if it doesn't).
+#
+# Usage:
+#   python benchmarks/upload_benchmark.py --output upload_bench.json
+#   python benchmarks/upload_benchmark.py --latency-ms 80 --bandwidth-mbps 100 --bandwidth-scope connection
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from google.oauth2.credentials import Credentials
+
+import youtube_service
+from youtube_quota import QuotaLedger
+from youtube_service import UploadJob, VideoMetadata, YouTubeService
+from youtube_stub_server import start_server
+
+def make_video_file(path, size_mb, seed=0):
+    """Write size_mb of deterministic bytes; only the .mp4 extension matters to validate_video_file"""
+    block = bytes((seed + i) % 256 for i in range(1024 * 1024))
+    with open(path, "wb") as file:
+        for _ in range(int(size_mb)):
+            file.write(block)
+
+def make_service(server, work_dir, chunk_mb):
+    # A token without expiry is treated as valid, so no refresh is attempted
+    credentials = Credentials(token="stub-token")
+    ledger = QuotaLedger(os.path.join(work_dir, "quota_ledger.json"), daily_limit=10 ** 9)
+    return YouTubeService(credentials, chunk_size=int(chunk_mb * 1024 * 1024), upload_state_dir=os.path.join(work_dir, "state"),
+                          quota_ledger=ledger, api_endpoint=server.endpoint)
+
+def make_metadata(title):
+    metadata = VideoMetadata()
+    metadata.title = title
+    metadata.privacy_status = "private"
+    return metadata
+
+def measure_single_upload(server, work_dir, video_path, size_mb, chunk_mb):
+    """Upload one file and return throughput, chunk count and retries"""
+    service = make_service(server, work_dir, chunk_mb)
+    chunk_rates, retries = [], []
+    server.reset_stats()
+    start = time.perf_counter()
+    try:
+        service._execute_resumable_upload(
+            video_path, service._build_video_body(make_metadata(f"bench {size_mb}MB")),
+            progress_callback=lambda sent, total, rate: chunk_rates.append(rate),
+            retry_callback=lambda attempt, error, delay: retries.append({"attempt": attempt, "delay": delay, "error": str(error)[:120]}))
+        error = None
+    except Exception as e:
+        error = str(e)
+    seconds = time.perf_counter() - start
+    return {
+        "size_mb": size_mb,
+        "chunk_mb": chunk_mb,
+        "seconds": seconds,
+        "mb_per_s": size_mb / seconds if seconds and error is None else 0.0,
+        "chunks": len(chunk_rates),
+        "mean_chunk_mb_per_s": sum(chunk_rates) / len(chunk_rates) if chunk_rates else 0.0,
+        "retries": len(retries),
+        "backoff_seconds": sum(retry["delay"] for retry in retries),
+        "faults_injected": server.stats["faults_injected"],
+        "requests": dict(server.stats["requests"]),
+        "error": error
+    }
+
+def measure_batch(server, work_dir, video_paths, size_mb, chunk_mb, workers):
+    """Upload every file with upload_videos_batch on `workers` threads"""
+    service = make_service(server, work_dir, chunk_mb)
+    jobs = [UploadJob(path, make_metadata(f"batch {i}")) for i, path in enumerate(video_paths)]
+    server.reset_stats()
+    start = time.perf_counter()
+    results = service.upload_videos_batch(jobs, max_workers=workers)
+    seconds = time.perf_counter() - start
+    uploaded = [result for result in results if result["status"] == "uploaded"]
+    return {
+        "workers": workers,
+        "videos": len(jobs),
+        "uploaded": len(uploaded),
+        "seconds": seconds,
+        "aggregate_mb_per_s": size_mb * len(uploaded) / seconds if seconds else 0.0,
+        "mean_upload_seconds": sum(result["upload_seconds"] for result in uploaded) / len(uploaded) if uploaded else 0.0,
+        "faults_injected": server.stats["faults_injected"],
+        "errors": [result["error"] for result in results if result["error"]]
+    }
+
+def check_growing_upload(server, work_dir, chunk_mb, chunks, tail_bytes, write_delay=0.6):
+    """upload_while_rendering on a file written in steps, ending chunks * chunk size + tail_bytes long.
+    tail_bytes=0 is the case where the file ends exactly on a chunk boundary after chunks were already
+    sent with an unknown total size."""
+    service = make_service(server, work_dir, chunk_mb)
+    chunk_bytes = int(chunk_mb * 1024 * 1024)
+    path = os.path.join(work_dir, f"growing_{chunks}x{chunk_mb:g}mb_{tail_bytes}.mp4")
+    def render():
+        with open(path, "ab") as file:
+            for i in range(chunks):
+                file.write(bytes([i % 256]) * chunk_bytes); file.flush()
+                time.sleep(write_delay)  # Leave the uploader waiting on the next chunk
+            file.write(b"\0" * tail_bytes)
+        return {"output": path}
+    server.reset_stats()
+    expected = chunks * chunk_bytes + tail_bytes
+    try:
+        _, upload = service.upload_while_rendering(render, path, make_metadata(f"growing {expected}"))
+        error = None if server.stats["bytes_received"] == expected else f"received {server.stats['bytes_received']} of {expected} bytes"
+    except Exception as e:
+        upload, error = None, str(e)[:200]
+    return {"bytes": expected, "chunk_mb": chunk_mb, "video_id": upload and upload["video_id"], "error": error}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark YouTube uploads against a local stub server")
+    parser.add_argument("--output", default="upload_bench.json", help="Where to write the results JSON")
+    parser.add_argument("--sizes-mb", default="8,64", help="Comma-separated video sizes in MB")
+    parser.add_argument("--chunk-sizes-mb", default="1,8,32", help="Comma-separated chunk sizes in MB")
+    parser.add_argument("--fault-rates", default="0.05,0.2", help="Comma-separated 5xx probabilities for the retry scenario")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts for the concurrency scenario")
+    parser.add_argument("--batch-videos", type=int, default=4, help="Videos per batch in the concurrency scenario")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Latency the stub adds to every request")
+    parser.add_argument("--bandwidth-mbps", type=float, default=400, help="Stub upload bandwidth in megabits/s (0 = unlimited)")
+    parser.add_argument("--bandwidth-scope", choices=["shared", "connection"], default="shared")
+    parser.add_argument("--max-backoff", type=float, default=2.0,
+                        help="Cap on retry backoff in seconds (the service default is much longer)")
+    args = parser.parse_args(argv)
+
+    parse_list = lambda text, cast: [cast(value) for value in text.split(",") if value]
+    sizes, chunk_sizes = parse_list(args.sizes_mb, float), parse_list(args.chunk_sizes_mb, float)
+    youtube_service.MAX_BACKOFF_SECONDS = args.max_backoff
+
+    server = start_server(latency_ms=args.latency_ms, bandwidth_mbps=args.bandwidth_mbps, bandwidth_scope=args.bandwidth_scope)
+    results = {"throughput": [], "retries": [], "concurrency": []}
+    with tempfile.TemporaryDirectory(prefix="upload_bench_") as work_dir:
+        video_paths = {}
+        for size_mb in sizes:
+            video_paths[size_mb] = os.path.join(work_dir, f"video_{size_mb:g}mb.mp4")
+            make_video_file(video_paths[size_mb], size_mb)
+
+        print(f"Stub at {server.endpoint}: {args.latency_ms:g} ms latency, {args.bandwidth_mbps:g} Mbit/s ({args.bandwidth_scope})")
+        print("\nThroughput")
+        for size_mb in sizes:
+            for chunk_mb in chunk_sizes:
+                result = measure_single_upload(server, work_dir, video_paths[size_mb], size_mb, chunk_mb)
+                results["throughput"].append(result)
+                print(f"  {size_mb:>6g} MB, {chunk_mb:>4g} MB chunks: {result['mb_per_s']:7.1f} MB/s in {result['chunks']} chunks")
+
+        print("\nRetries under injected 5xx faults")
+        retry_size, retry_chunk = sizes[0], min(chunk_sizes)
+        for fault_rate in parse_list(args.fault_rates, float):
+            server.fault_rate = fault_rate
+            result = measure_single_upload(server, work_dir, video_paths[retry_size], retry_size, retry_chunk)
+            result["fault_rate"] = fault_rate
+            results["retries"].append(result)
+            print(f"  fault rate {fault_rate:.0%}: {result['retries']} retries, {result['backoff_seconds']:.1f}s backoff, "
+                  f"{result['mb_per_s']:.1f} MB/s{' FAILED: ' + result['error'] if result['error'] else ''}")
+        server.fault_rate = 0.0
+
+        print("\nConcurrency scaling (upload_videos_batch)")
+        batch_paths = []
+        for i in range(args.batch_videos):
+            batch_paths.append(os.path.join(work_dir, f"batch_{i}.mp4"))
+            make_video_file(batch_paths[-1], sizes[0], seed=i)
+        for workers in parse_list(args.workers, int):
+            result = measure_batch(server, work_dir, batch_paths, sizes[0], max(chunk_sizes), workers)
+            results["concurrency"].append(result)
+            print(f"  {workers} worker(s): {result['aggregate_mb_per_s']:7.1f} MB/s aggregate, "
+                  f"{result['uploaded']}/{result['videos']} uploaded in {result['seconds']:.1f}s")
+
+        print("\nUpload while rendering (file ending on and off a chunk boundary)")
+        results["growing"] = []
+        for tail_bytes in (0, 1000):
+            result = check_growing_upload(server, work_dir, min(chunk_sizes), 2, tail_bytes)
+            results["growing"].append(result)
+            print(f"  {result['bytes']} bytes: {'FAILED: ' + result['error'] if result['error'] else 'ok'}")
+    server.shutdown()
+
+    results["meta"] = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency_ms": args.latency_ms,
+        "bandwidth_mbps": args.bandwidth_mbps,
+        "bandwidth_scope": args.bandwidth_scope,
+        "max_backoff_seconds": args.max_backoff
+    }
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {args.output}")
+    return 1 if any(result["error"] for result in results["growing"]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
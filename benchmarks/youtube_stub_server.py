@@ -0,0 +1,314 @@
+# Local stand-in for the parts of the YouTube Data API that YouTubeService uses
+#
+# Emulates resumable videos.insert (session POST, chunked PUTs, "bytes */total" status queries),
+# thumbnails.set, channels.list and videoCategories.list, with injectable latency, bandwidth limits,
+# 5xx faults and quota errors. Uploaded bytes are counted and discarded.
+#
+# Usage:
+#   python benchmarks/youtube_stub_server.py --port 8765 --latency-ms 30 --bandwidth-mbps 50 --fault-rate 0.05
+#   YOUTUBE_API_ENDPOINT=http://127.0.0.1:8765 streamlit run app.py
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from youtube_quota import QUOTA_COSTS
+
+READ_BLOCK_BYTES = 64 * 1024
+CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)")
+
+class BandwidthLimiter:
+    """Paces reads to bytes_per_second; shared by every connection (one uplink) or created per connection"""
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self._next_free = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, byte_count):
+        if not self.bytes_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + byte_count / self.bytes_per_second
+            wait = self._next_free - now
+        if wait > 0:
+            time.sleep(wait)
+
+class UploadSession:
+    def __init__(self, upload_id, body, total_size):
+        self.upload_id = upload_id
+        self.body = body
+        self.total_size = total_size
+        self.received = 0
+        self.video_id = None
+
+class StubYouTubeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0, bandwidth_mbps=0, bandwidth_scope="shared", fault_rate=0.0,
+                 quota_limit=None, seed=0):
+        super().__init__(address, StubRequestHandler)
+        self.latency_ms = latency_ms
+        self.bandwidth_scope = bandwidth_scope
+        self.fault_rate = fault_rate
+        self.quota_limit = quota_limit
+        self.random = random.Random(seed)
+        self.set_bandwidth(bandwidth_mbps)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.sessions = {}
+        self.reset_stats()
+
+    @property
+    def endpoint(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_bandwidth(self, bandwidth_mbps):
+        """Limit upload bandwidth in megabits per second (0 = unlimited)"""
+        self.bandwidth_mbps = bandwidth_mbps
+        self.shared_limiter = BandwidthLimiter(bandwidth_mbps * 1e6 / 8)
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"requests": {}, "faults_injected": 0, "quota_errors": 0, "bytes_received": 0,
+                          "videos_completed": 0, "quota_units": 0}
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def count_request(self, operation):
+        with self._lock:
+            self.stats["requests"][operation] = self.stats["requests"].get(operation, 0) + 1
+
+    def charge_quota(self, operation):
+        """Charge an operation's units; returns False if it would exceed quota_limit"""
+        with self._lock:
+            cost = QUOTA_COSTS[operation]
+            if self.quota_limit is not None and self.stats["quota_units"] + cost > self.quota_limit:
+                self.stats["quota_errors"] += 1
+                return False
+            self.stats["quota_units"] += cost
+            return True
+
+    def should_fault(self):
+        with self._lock:
+            return self.fault_rate > 0 and self.random.random() < self.fault_rate
+
+    def new_session(self, body, total_size):
+        with self._lock:
+            session = UploadSession(str(next(self._ids)), body, total_size)
+            self.sessions[session.upload_id] = session
+            return session
+
+    def next_video_id(self):
+        with self._lock:
+            return f"stub{next(self._ids):08d}"
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # httplib2 keeps connections alive
+
+    def log_message(self, format, *args):
+        pass
+
+    # Plumbing
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, reason, message):
+        self._send_json(status, {"error": {"code": status, "message": message,
+                                           "errors": [{"reason": reason, "message": message}]}})
+
+    def _read_body(self, throttle=False):
+        remaining = int(self.headers.get("Content-Length", 0))
+        limiter = None
+        if throttle and self.server.bandwidth_mbps:
+            limiter = (self.server.shared_limiter if self.server.bandwidth_scope == "shared"
+                       else BandwidthLimiter(self.server.bandwidth_mbps * 1e6 / 8))
+        chunks = []
+        while remaining > 0:
+            block = self.rfile.read(min(READ_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            if limiter:
+                limiter.consume(len(block))
+            chunks.append(block)
+        return b"".join(chunks)
+
+    def _prepare(self):
+        if self.server.latency_ms:
+            time.sleep(self.server.latency_ms / 1000.0)
+        url = urlparse(self.path)
+        return url.path, {key: values[0] for key, values in parse_qs(url.query).items()}
+
+    # Routes
+
+    def do_GET(self):
+        path, query = self._prepare()
+        if path.endswith("/youtube/v3/channels"):
+            self._handle_list("channels.list", [{
+                "id": "UCstubchannel",
+                "snippet": {"title": "Stub Channel", "description": "", "thumbnails": {"default": {"url": ""}}},
+                "statistics": {"subscriberCount": "0", "videoCount": str(self.server.stats["videos_completed"]), "viewCount": "0"},
+                "brandingSettings": {}
+            }])
+        elif path.endswith("/youtube/v3/videoCategories"):
+            self._handle_list("videoCategories.list", [
+                {"id": category_id, "snippet": {"title": title, "assignable": True}}
+                for category_id, title in (("10", "Music"), ("22", "People & Blogs"), ("24", "Entertainment"))
+            ])
+        else:
+            self._send_error(404, "notFound", f"No stub for GET {path}")
+
+    def do_POST(self):
+        path, query = self._prepare()
+        if path.endswith("/upload/youtube/v3/videos") and query.get("uploadType") == "resumable":
+            self._start_resumable_upload(query)
+        elif path.endswith("/upload/youtube/v3/thumbnails/set"):
+            self.server.count_request("thumbnails.set")
+            self._read_body(throttle=True)
+            if not self.server.charge_quota("thumbnails.set"):
+                return self._send_error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+            if self.server.should_fault():
+                self.server.count("faults_injected")
+                return self._send_error(503, "backendError", "Injected fault")
+            self._send_json(200, {"kind": "youtube#thumbnailSetResponse", "items": [{"default": {"url": ""}}]})
+        else:
+            self._read_body()
+            self._send_error(404, "notFound", f"No stub for POST {path}")
+
+    def do_PUT(self):
+        path, query = self._prepare()
+        session = self.server.sessions.get(query.get("upload_id", ""))
+        if session is None:
+            self._read_body()
+            return self._send_error(404, "notFound", "Unknown or expired upload session")
+        self._continue_resumable_upload(session)
+
+    def _handle_list(self, operation, items):
+        self.server.count_request(operation)
+        if not self.server.charge_quota(operation):
+            return self._send_error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+        if self.server.should_fault():
+            self.server.count("faults_injected")
+            return self._send_error(503, "backendError", "Injected fault")
+        self._send_json(200, {"items": items})
+
+    def _start_resumable_upload(self, query):
+        self.server.count_request("videos.insert")
+        body = json.loads(self._read_body() or b"{}")
+        if not self.server.charge_quota("videos.insert"):
+            return self._send_error(403, "quotaExceeded", "The request cannot be completed because you have exceeded your quota.")
+        if self.server.should_fault():
+            self.server.count("faults_injected")
+            return self._send_error(503, "backendError", "Injected fault")
+        total = self.headers.get("X-Upload-Content-Length")
+        session = self.server.new_session(body, int(total) if total else None)
+        location = f"{self.server.endpoint}/upload/youtube/v3/videos?uploadType=resumable&upload_id={session.upload_id}"
+        self.send_response(200)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _continue_resumable_upload(self, session):
+        self.server.count_request("videos.insert.chunk")
+        match = CONTENT_RANGE.fullmatch(self.headers.get("Content-Range", "").strip())
+        data = self._read_body(throttle=True)
+        if match is None:
+            return self._send_error(400, "badContent", "Missing or invalid Content-Range")
+        if match.group(3) != "*":
+            session.total_size = int(match.group(3))
+
+        if match.group(1) is not None:
+            first, last = int(match.group(1)), int(match.group(2))
+            if last < first:
+                # e.g. "bytes N-(N-1)/N" from an empty final read; the real API rejects these too
+                return self._send_error(400, "badContent", "Invalid Content-Range")
+            if self.server.should_fault():
+                # The chunk is lost; the client has to ask where to resume
+                self.server.count("faults_injected")
+                return self._send_error(503, "backendError", "Injected fault")
+            if first != session.received:
+                return self._send_resume_incomplete(session)
+            session.received = last + 1
+            self.server.count("bytes_received", len(data))
+
+        if session.total_size is not None and session.received >= session.total_size:
+            return self._send_completed(session)
+        self._send_resume_incomplete(session)
+
+    def _send_resume_incomplete(self, session):
+        self.send_response(308)
+        if session.received:
+            self.send_header("Range", f"bytes=0-{session.received - 1}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_completed(self, session):
+        if session.video_id is None:
+            session.video_id = self.server.next_video_id()
+            self.server.count("videos_completed")
+        snippet = session.body.get("snippet", {})
+        status = session.body.get("status", {})
+        self._send_json(200, {
+            "kind": "youtube#video",
+            "id": session.video_id,
+            "snippet": {"title": snippet.get("title", ""), "description": snippet.get("description", ""),
+                        "tags": snippet.get("tags", []), "categoryId": snippet.get("categoryId", "10")},
+            "status": {"uploadStatus": "uploaded", "privacyStatus": status.get("privacyStatus", "private"),
+                       **({"publishAt": status["publishAt"]} if status.get("publishAt") else {})}
+        })
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """Start a stub server on a background thread and return it (port 0 picks a free port)"""
+    server = StubYouTubeServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="youtube-stub", daemon=True).start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the YouTube Data API upload endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added latency per request")
+    parser.add_argument("--bandwidth-mbps", type=float, default=0, help="Upload bandwidth limit in megabits/s (0 = unlimited)")
+    parser.add_argument("--bandwidth-scope", choices=["shared", "connection"], default="shared",
+                        help="Apply the bandwidth limit to all connections together or to each one")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Probability of a 503 on each request")
+    parser.add_argument("--quota-limit", type=int, default=None, help="Quota units before requests fail with quotaExceeded")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = StubYouTubeServer((args.host, args.port), latency_ms=args.latency_ms, bandwidth_mbps=args.bandwidth_mbps,
+                               bandwidth_scope=args.bandwidth_scope, fault_rate=args.fault_rate,
+                               quota_limit=args.quota_limit, seed=args.seed)
+    print(f"YouTube stub listening on {server.endpoint} (set YOUTUBE_API_ENDPOINT to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
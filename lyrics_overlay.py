@@ -0,0 +1,152 @@
+# Timed lyrics / caption overlay
+#
+# Lines come from an LRC ([mm:ss.xx] text) or SRT file. Each distinct line is rendered once into an RGBA sprite
+# (repeated chorus lines share one), and the whole timeline is resolved per video frame at precompute time into
+# a line index and a quantized fade level. Drawing a frame is then one paste of the active sprite, through its
+# alpha scaled by a lookup table while fading; no text is laid out or rasterized per frame.
+import functools
+import math
+import os
+import re
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+LYRICS_FADE_STEPS = 16  # Fade levels; alpha is quantized so every fading frame is a table lookup
+LYRICS_MAX_WIDTH_FRACTION = 0.9  # Lines wrap to this fraction of the video width
+LYRICS_MARGIN_FRACTION = 0.02  # Gap between the lyrics and the image/waveform, as a fraction of the video height
+LYRICS_STROKE_FRACTION = 0.08  # Dark outline width relative to the font size, for legibility on any background
+
+_LRC_TIME = re.compile(r"\[(\d+):(\d+(?:\.\d+)?)\]")
+_SRT_TIME = re.compile(r"(\d+):(\d+):(\d+)[,.](\d+)\s*-->\s*(\d+):(\d+):(\d+)[,.](\d+)")
+
+# Per-level alpha tables: level 0 is invisible, LYRICS_FADE_STEPS is the sprite's own alpha
+_FADE_TABLES = [[a * level // LYRICS_FADE_STEPS for a in range(256)] for level in range(LYRICS_FADE_STEPS + 1)]
+
+def parse_lrc(text):
+    """(start, end, text) lines from LRC; a line lasts until the next timestamp (the last one gets end=None).
+    Lines with several timestamps repeat; empty lines only end the previous one."""
+    stamped = []
+    for raw_line in text.splitlines():
+        stamps = _LRC_TIME.findall(raw_line)
+        if not stamps: continue  # Metadata tags such as [ar:...] and untimed text
+        lyric = _LRC_TIME.sub("", raw_line).strip()
+        stamped.extend((int(minutes) * 60 + float(seconds), lyric) for minutes, seconds in stamps)
+    stamped.sort(key=lambda stamp: stamp[0])
+    lines = []
+    for i, (start, lyric) in enumerate(stamped):
+        if not lyric: continue
+        end = stamped[i + 1][0] if i + 1 < len(stamped) else None
+        lines.append((start, end, lyric))
+    return lines
+
+def parse_srt(text):
+    """(start, end, text) lines from SRT cues; multi-line cues are kept as one line with newlines"""
+    lines = []
+    for block in re.split(r"\n\s*\n", text.replace("\r\n", "\n").strip()):
+        rows = block.strip().split("\n")
+        for i, row in enumerate(rows):
+            match = _SRT_TIME.search(row)
+            if not match: continue
+            h1, m1, s1, ms1, h2, m2, s2, ms2 = (int(value) for value in match.groups())
+            lyric = "\n".join(row.strip() for row in rows[i + 1:] if row.strip())
+            if lyric:
+                lines.append((h1 * 3600 + m1 * 60 + s1 + ms1 / 1000, h2 * 3600 + m2 * 60 + s2 + ms2 / 1000, lyric))
+            break
+    return sorted(lines, key=lambda line: line[0])
+
+def load_lyrics(path):
+    """Parse an .lrc or .srt file (by extension; anything else is tried as LRC) into (start, end, text) lines"""
+    with open(path, encoding="utf-8-sig", errors="replace") as file:
+        text = file.read()
+    return parse_srt(text) if os.path.splitext(path)[1].lower() == ".srt" else parse_lrc(text)
+
+@functools.lru_cache(maxsize=8)
+def load_font(font, size):
+    # A TrueType font by path or name, else Pillow's built-in font (scalable on Pillow >= 10.1)
+    try:
+        return ImageFont.truetype(font, size)
+    except OSError:
+        print(f"Font {font!r} not found; using Pillow's default font")
+        try: return ImageFont.load_default(size=size)
+        except TypeError: return ImageFont.load_default()
+
+def wrap_text(text, font, max_width):
+    wrapped = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and font.getlength(candidate) > max_width:
+                wrapped.append(line); line = word
+            else: line = candidate
+        wrapped.append(line)
+    return "\n".join(wrapped)
+
+@functools.lru_cache(maxsize=256)
+def render_line_sprite(text, font, font_size, color, max_width):
+    """One lyric line as a tight RGBA sprite: wrapped, centered, filled with color and outlined in black.
+    Cached, so previews and re-renders of the same song reuse sprites; callers must not modify it."""
+    font_obj = load_font(font, font_size)
+    wrapped = wrap_text(text, font_obj, max_width)
+    stroke = max(1, round(font_size * LYRICS_STROKE_FRACTION))
+    measure = ImageDraw.Draw(Image.new("L", (1, 1)))
+    left, top, right, bottom = measure.multiline_textbbox((0, 0), wrapped, font=font_obj, align="center", stroke_width=stroke)
+    left, top, right, bottom = math.floor(left), math.floor(top), math.ceil(right), math.ceil(bottom)  # Floats on newer Pillow
+    sprite = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), tuple(color) + (0,))
+    ImageDraw.Draw(sprite).multiline_text((-left, -top), wrapped, font=font_obj, fill=tuple(color) + (255,), align="center",
+                                          stroke_width=stroke, stroke_fill=(0, 0, 0, 255))
+    return sprite
+
+class LyricsTrack:
+    """Sprites and the per-frame timeline of one render's lyrics; draw() composites the active line"""
+    def __init__(self, sprites, positions, frame_lines, frame_levels):
+        self.sprites = sprites  # Per distinct line: RGBA sprite
+        self.sprite_alphas = [sprite.getchannel("A") for sprite in sprites]
+        self.positions = positions  # Per distinct line: top-left (x, y) in the frame
+        self.frame_lines = frame_lines  # Per frame: index into sprites, -1 when no line is shown (int16)
+        self.frame_levels = frame_levels  # Per frame: fade level 0..LYRICS_FADE_STEPS (uint8)
+
+    def draw(self, frame, frame_idx):
+        if frame_idx >= len(self.frame_lines): return
+        line, level = self.frame_lines[frame_idx], self.frame_levels[frame_idx]
+        if line < 0 or level == 0: return
+        mask = self.sprite_alphas[line]
+        if level < LYRICS_FADE_STEPS: mask = mask.point(_FADE_TABLES[level])
+        frame.paste(self.sprites[line], self.positions[line], mask)
+
+def build_lyrics_track(lines, segment_start, num_frames, video_fps, fade_seconds, font, font_size, color,
+                       video_width, video_height, center_x, anchor_y, above):
+    """Resolve (start, end, text) lines (track time) for a segment starting at segment_start into a LyricsTrack.
+    Sprites are centered on center_x; anchor_y is the bottom edge of the lyrics when above, else their top."""
+    if not lines or num_frames <= 0: return None
+    starts = np.array([start for start, _, _ in lines]) - segment_start
+    ends = np.array([end if end is not None else np.inf for _, end, _ in lines]) - segment_start
+    texts = [text for _, _, text in lines]
+    # Active line per frame: the latest one started by the frame's time, if it hasn't ended yet
+    frame_times = np.arange(num_frames) / video_fps
+    line_idx = np.searchsorted(starts, frame_times, side="right") - 1
+    active = (line_idx >= 0) & (frame_times < ends[np.maximum(line_idx, 0)])
+    if not active.any(): return None
+    # Fade in after the start and out before the end, quantized to LYRICS_FADE_STEPS levels
+    safe_idx = np.maximum(line_idx, 0)
+    if fade_seconds > 0:
+        fade = np.minimum((frame_times - starts[safe_idx]) / fade_seconds, (ends[safe_idx] - frame_times) / fade_seconds)
+        fade = np.clip(fade, 0, 1)
+    else: fade = np.ones(num_frames)
+    frame_levels = np.where(active, np.ceil(fade * LYRICS_FADE_STEPS), 0).astype(np.uint8)
+    # One sprite per distinct text among the lines actually shown
+    distinct = {}
+    for idx in np.unique(line_idx[active]): distinct.setdefault(texts[idx], len(distinct))
+    sprite_of_line = np.full(len(lines), -1, dtype=np.int16)
+    for idx in range(len(lines)): sprite_of_line[idx] = distinct.get(texts[idx], -1)
+    frame_lines = np.where(active, sprite_of_line[safe_idx], -1).astype(np.int16)
+    max_width = int(video_width * LYRICS_MAX_WIDTH_FRACTION)
+    sprites, positions = [], []
+    for text in distinct:
+        sprite = render_line_sprite(text, font, font_size, tuple(color), max_width)
+        y = anchor_y - sprite.height if above else anchor_y
+        x = center_x - sprite.width // 2
+        positions.append((max(0, min(video_width - sprite.width, x)), max(0, min(video_height - sprite.height, y))))
+        sprites.append(sprite)
+    return LyricsTrack(sprites, positions, frame_lines, frame_levels)
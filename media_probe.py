@@ -0,0 +1,329 @@
+# Header-only media probes: read container metadata without starting a decoder
+import functools
+import os
+import struct
+
+# moov boxes are small (KBs to a few MBs); refuse anything unreasonable rather than reading it into memory
+_MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+def _iter_boxes(data, start=0, end=None):
+    """Yield (box_type, payload_start, box_end) for the ISO-BMFF boxes in data[start:end]"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+def _read_moov(file, file_size):
+    """Walk the top-level boxes with seeks (skipping mdat) and return the moov payload bytes, or None"""
+    offset = 0
+    first = True
+    while offset + 8 <= file_size:
+        file.seek(offset)
+        header = file.read(16)
+        if len(header) < 8:
+            return None
+        size, box_type = struct.unpack_from(">I4s", header, 0)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if first and box_type not in (b"ftyp", b"moov", b"free", b"wide", b"skip", b"mdat", b"pnot"):
+            return None  # Not an ISO-BMFF / QuickTime file
+        first = False
+        if size < header_size:
+            return None
+        if box_type == b"moov":
+            payload_size = size - header_size
+            if payload_size > _MAX_MOOV_BYTES:
+                return None
+            file.seek(offset + header_size)
+            payload = file.read(payload_size)
+            return payload if len(payload) == payload_size else None
+        offset += size
+    return None
+
+def _parse_tkhd(data, start):
+    version = data[start]
+    body = start + 4
+    body += 32 if version == 1 else 20  # creation/modification times, track id, reserved, duration
+    body += 8 + 2 + 2 + 2 + 2  # reserved, layer, alternate group, volume, reserved
+    matrix = struct.unpack_from(">9i", data, body)
+    width, height = struct.unpack_from(">II", data, body + 36)
+    width, height = width / 65536.0, height / 65536.0
+    # A 90/270 degree display matrix swaps the presented dimensions
+    if matrix[0] == 0 and abs(matrix[1]) == 65536:
+        width, height = height, width
+    return width, height
+
+def _parse_moov(moov):
+    timescale = duration = None
+    fragment_duration = None
+    video_size = None
+    for box_type, start, end in _iter_boxes(moov):
+        if box_type == b"mvhd":
+            version = moov[start]
+            if version == 1:
+                timescale, duration = struct.unpack_from(">IQ", moov, start + 4 + 16)
+            else:
+                timescale, duration = struct.unpack_from(">II", moov, start + 4 + 8)
+        elif box_type == b"mvex":
+            for sub_type, sub_start, _ in _iter_boxes(moov, start, end):
+                if sub_type == b"mehd":
+                    fmt = ">Q" if moov[sub_start] == 1 else ">I"
+                    fragment_duration = struct.unpack_from(fmt, moov, sub_start + 4)[0]
+        elif box_type == b"trak":
+            track_size = None
+            handler = None
+            for sub_type, sub_start, sub_end in _iter_boxes(moov, start, end):
+                if sub_type == b"tkhd":
+                    track_size = _parse_tkhd(moov, sub_start)
+                elif sub_type == b"mdia":
+                    for mdia_type, mdia_start, _ in _iter_boxes(moov, sub_start, sub_end):
+                        if mdia_type == b"hdlr":
+                            handler = moov[mdia_start + 8:mdia_start + 12]
+            if video_size is None and handler == b"vide" and track_size and track_size[0] > 0:
+                video_size = track_size
+    if not timescale or video_size is None:
+        return None
+    if not duration and fragment_duration:
+        duration = fragment_duration  # Fragmented MP4: mvhd duration is 0, mehd holds the total
+    if not duration:
+        return None
+    return {
+        "duration": duration / timescale,
+        "width": int(round(video_size[0])),
+        "height": int(round(video_size[1]))
+    }
+
+@functools.lru_cache(maxsize=256)
+def _probe_mp4_cached(path, mtime_ns, size):
+    try:
+        with open(path, "rb") as file:
+            moov = _read_moov(file, size)
+        return _parse_moov(moov) if moov else None
+    except (OSError, struct.error, IndexError):
+        return None
+
+def probe_mp4(path):
+    """Duration (seconds), width and height of an MP4/MOV from its moov/mvhd/tkhd boxes, or None if unparseable.
+    Results are cached per (path, mtime, size)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    info = _probe_mp4_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    return dict(info) if info else None
+
+# Audio
+
+_MP3_BITRATES_KBPS = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+_MP3_SYNC_SEARCH_BYTES = 64 * 1024
+# An MP3 without a Xing/VBRI header is treated as CBR if this many leading frames share a bitrate;
+# otherwise every frame header is walked
+_MP3_CONSISTENT_FRAMES = 8
+
+def _parse_mp3_header(header):
+    """Decode a 4-byte MPEG audio frame header; returns None if it is not a valid header"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = {0: 2.5, 2: 2, 3: 1}.get((header[1] >> 3) & 0x03)
+    layer = {1: 3, 2: 2, 3: 1}.get((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3 or header[3] & 0x03 == 2:
+        return None  # Reserved version/layer/sample rate/emphasis, or free-format/invalid bitrate
+    bitrate = _MP3_BITRATES_KBPS[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        samples_per_frame = 384
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 576 if layer == 3 and version != 1 else 1152
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    return {
+        "version": version, "layer": layer, "bitrate": bitrate, "sample_rate": sample_rate,
+        "channels": 1 if header[3] >> 6 == 3 else 2,
+        "samples_per_frame": samples_per_frame, "frame_length": frame_length
+    }
+
+def _mp3_same_stream(frame, following):
+    # Frames of one stream share version, layer and sample rate (only the bitrate may change, with VBR)
+    return following is not None and all(following[key] == frame[key] for key in ("version", "layer", "sample_rate"))
+
+def _mp3_vbr_frame_count(data, offset, frame):
+    """Frame count from a Xing/Info or VBRI header in the first frame, or None"""
+    if frame["version"] == 1:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", data, xing + 4)[0]
+        return struct.unpack_from(">I", data, xing + 8)[0] if flags & 0x1 else None
+    vbri = offset + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        return struct.unpack_from(">I", data, vbri + 14)[0]
+    return None
+
+def _probe_mp3(file, file_size):
+    header = file.read(10)
+    audio_start = 0
+    if header[:3] == b"ID3":
+        tag_size = (header[6] & 0x7F) << 21 | (header[7] & 0x7F) << 14 | (header[8] & 0x7F) << 7 | (header[9] & 0x7F)
+        audio_start = 10 + tag_size + (10 if header[5] & 0x10 else 0)  # Footer flag
+    file.seek(audio_start)
+    data = file.read(_MP3_SYNC_SEARCH_BYTES)
+
+    # First valid header followed, exactly one frame later, by another header of the same stream, so stray
+    # 0xFFE bytes in junk data or tag padding don't count; the second header is read from the file if it lies
+    # past the search window. No such pair (e.g. a single-frame file) leaves the file to the decoder.
+    for offset in range(max(0, len(data) - 4)):
+        frame = _parse_mp3_header(data[offset:offset + 4])
+        if not frame or frame["frame_length"] <= 0:
+            continue
+        next_offset = offset + frame["frame_length"]
+        if next_offset + 4 <= len(data):
+            next_header = data[next_offset:next_offset + 4]
+        else:
+            file.seek(audio_start + next_offset)
+            next_header = file.read(4)
+        if _mp3_same_stream(frame, _parse_mp3_header(next_header)):
+            break
+    else:
+        return None
+
+    info = {"format": "mp3", "sample_rate": frame["sample_rate"], "channels": frame["channels"]}
+    frame_count = _mp3_vbr_frame_count(data, offset, frame)
+    if frame_count:
+        info["duration"] = frame_count * frame["samples_per_frame"] / frame["sample_rate"]
+        return info
+
+    # No VBR header: CBR if the leading frames agree on the bitrate, otherwise count every frame
+    first_frame = audio_start + offset
+    file.seek(max(0, file_size - 128))
+    audio_end = file_size - 128 if file.read(3) == b"TAG" else file_size
+    bitrates, position = set(), offset
+    for _ in range(_MP3_CONSISTENT_FRAMES):
+        following = _parse_mp3_header(data[position:position + 4])
+        if not _mp3_same_stream(frame, following):
+            break
+        bitrates.add(following["bitrate"])
+        position += following["frame_length"]
+    if len(bitrates) == 1:
+        info["duration"] = (audio_end - first_frame) * 8 / frame["bitrate"]
+        return info
+
+    file.seek(first_frame)
+    data = file.read(audio_end - first_frame)
+    samples, position = 0, 0
+    while position + 4 <= len(data):
+        following = _parse_mp3_header(data[position:position + 4])
+        if not _mp3_same_stream(frame, following) or following["frame_length"] <= 0:
+            break
+        samples += following["samples_per_frame"]
+        position += following["frame_length"]
+    info["duration"] = samples / frame["sample_rate"]
+    return info
+
+def _probe_wav(file, file_size):
+    header = file.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    offset = 12
+    fmt = data = None
+    # Chunk order isn't fixed (some writers put fmt after data), so keep scanning until both are seen
+    while offset + 8 <= file_size and not (fmt and data):
+        file.seek(offset)
+        chunk_id, chunk_size = struct.unpack("<4sI", file.read(8))
+        if chunk_id == b"fmt ":
+            format_tag, channels, sample_rate, byte_rate, block_align, bits = struct.unpack("<HHIIHH", file.read(16))
+            if format_tag == 0xFFFE and chunk_size >= 40:  # WAVE_FORMAT_EXTENSIBLE: real tag leads the subformat GUID
+                file.seek(offset + 8 + 24)
+                format_tag = struct.unpack("<H", file.read(2))[0]
+            fmt = (format_tag, channels, sample_rate, byte_rate, block_align, bits)
+        elif chunk_id == b"data":
+            data_offset = offset + 8
+            data_size = min(chunk_size, file_size - data_offset)  # Streamed writers leave 0/0xFFFFFFFF sizes
+            if chunk_size == 0:
+                data_size = file_size - data_offset
+            data = (data_offset, data_size)
+        offset += 8 + chunk_size + (chunk_size & 1)  # Chunks are word aligned
+    if not (fmt and data):
+        return None
+    format_tag, channels, sample_rate, byte_rate, block_align, bits = fmt
+    data_offset, data_size = data
+    return {
+        "format": "wav", "sample_rate": sample_rate, "channels": channels,
+        "duration": data_size / byte_rate if byte_rate else 0.0,
+        "format_tag": format_tag, "bits_per_sample": bits, "block_align": block_align,
+        "data_offset": data_offset, "data_size": data_size
+    }
+
+def _probe_flac(file):
+    file.seek(4)
+    while True:
+        block_header = file.read(4)
+        if len(block_header) < 4:
+            return None
+        is_last, block_type = block_header[0] & 0x80, block_header[0] & 0x7F
+        block_size = int.from_bytes(block_header[1:4], "big")
+        if block_type == 0:  # STREAMINFO
+            streaminfo = file.read(block_size)
+            packed = int.from_bytes(streaminfo[10:18], "big")
+            sample_rate = packed >> 44
+            channels = ((packed >> 41) & 0x07) + 1
+            total_samples = packed & 0xFFFFFFFFF
+            if not sample_rate or not total_samples:
+                return None
+            return {"format": "flac", "sample_rate": sample_rate, "channels": channels,
+                    "duration": total_samples / sample_rate, "bits_per_sample": ((packed >> 36) & 0x1F) + 1}
+        if is_last:
+            return None
+        file.seek(block_size, os.SEEK_CUR)
+
+@functools.lru_cache(maxsize=256)
+def _probe_audio_cached(path, mtime_ns, size):
+    try:
+        with open(path, "rb") as file:
+            magic = file.read(12)
+            file.seek(0)
+            if magic[:4] == b"RIFF" and magic[8:12] == b"WAVE":
+                return _probe_wav(file, size)
+            if magic[:4] == b"fLaC":
+                return _probe_flac(file)
+            return _probe_mp3(file, size)
+    except (OSError, struct.error, IndexError, ValueError):
+        return None
+
+def probe_audio(path):
+    """Format, duration (seconds), sample rate and channel count of a WAV, MP3 or FLAC file from its headers
+    alone, or None if unrecognised. Results are cached per (path, mtime, size)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    info = _probe_audio_cached(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    return dict(info) if info else None
@@ -0,0 +1,76 @@
+# Parameter-sweep contact sheets
+#
+# Renders every combination of a grid of RenderConfig values at a few sample frames into one PNG, so settings
+# such as bar count, spacing, smoothing or colors can be compared side by side without rendering a video per
+# variant. All cells share one precompute_assets memo: the image decode, background blur, center image and the
+# segment's decode and STFT happen once, and each cell only redoes the stages its values change (band features
+# and smoothing, waveform geometry) before composing its frames.
+import io
+import itertools
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+import video_generation
+from render_config import rgb_to_hex
+
+SWEEP_THUMB_WIDTH = 216
+SWEEP_GAP = 8
+SWEEP_LABEL_HEIGHT = 16
+SWEEP_SHEET_COLOR = (24, 24, 24)
+SWEEP_LABEL_COLOR = (230, 230, 230)
+
+def sweep_configs(base_config, grid):
+    """[(values, config)] for every combination of grid ({field name: [values]}), the last field varying fastest"""
+    names = list(grid)
+    known = base_config.to_dict()
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown RenderConfig field(s): {', '.join(unknown)}")
+    if not names or any(len(grid[name]) == 0 for name in names):
+        raise ValueError("A sweep needs at least one parameter, each with at least one value")
+    cells = []
+    for combination in itertools.product(*(grid[name] for name in names)):
+        values = dict(zip(names, combination))
+        cells.append((values, base_config.replace(**values)))  # Validated like any config
+    return cells
+
+def _label(values):
+    def short(value):
+        if isinstance(value, tuple): return rgb_to_hex(value)
+        return f"{value:g}" if isinstance(value, float) else str(value)
+    return ", ".join(f"{name.removeprefix('waveform_')}={short(value)}" for name, value in values.items())
+
+def render_contact_sheet(base_config, grid, frame_indices, thumb_width=SWEEP_THUMB_WIDTH, progress_callback=None):
+    """Render a sweep as a contact sheet. Rows are the combinations of every parameter but the last, columns the
+    last parameter's values; each cell shows the sample frames side by side under a label of its values.
+    Returns {"png": bytes, "cells": int, "frames": int, "seconds": float}."""
+    start = time.perf_counter()
+    cells = sweep_configs(base_config, grid)
+    frame_indices = list(frame_indices) or [0]
+    columns = len(grid[list(grid)[-1]])
+    rows = len(cells) // columns
+    thumb_height = max(1, round(thumb_width * base_config.video_height / base_config.video_width))
+    cell_width = len(frame_indices) * thumb_width + (len(frame_indices) - 1) * SWEEP_GAP // 2
+    cell_height = SWEEP_LABEL_HEIGHT + thumb_height
+    sheet = Image.new("RGB", (SWEEP_GAP + columns * (cell_width + SWEEP_GAP), SWEEP_GAP + rows * (cell_height + SWEEP_GAP)), SWEEP_SHEET_COLOR)
+    draw = ImageDraw.Draw(sheet)
+    font = ImageFont.load_default()
+    shared = {}  # Reused stages across cells (see precompute_assets)
+    for cell_index, (values, config) in enumerate(cells):
+        assets = video_generation.precompute_assets(config, shared=shared)
+        left = SWEEP_GAP + (cell_index % columns) * (cell_width + SWEEP_GAP)
+        top = SWEEP_GAP + (cell_index // columns) * (cell_height + SWEEP_GAP)
+        draw.text((left, top + 2), _label(values), fill=SWEEP_LABEL_COLOR, font=font)
+        for i, frame_idx in enumerate(frame_indices):
+            frame_idx = max(0, min(int(frame_idx), config.num_video_frames - 1))
+            frame = video_generation.compose_frame(frame_idx, assets, config)
+            thumb = frame.convert("RGB").resize((thumb_width, thumb_height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+            sheet.paste(thumb, (left + i * (thumb_width + SWEEP_GAP // 2), top + SWEEP_LABEL_HEIGHT))
+        if progress_callback:
+            progress_callback(cell_index + 1, len(cells))
+    buffer = io.BytesIO()
+    sheet.save(buffer, format="PNG")
+    seconds = time.perf_counter() - start
+    print(f"Rendered a {rows}x{columns} sweep ({len(cells)} cells, {len(frame_indices)} frames each) in {seconds:.1f}s")
+    return {"png": buffer.getvalue(), "cells": len(cells), "frames": len(cells) * len(frame_indices), "seconds": seconds}
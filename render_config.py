@@ -0,0 +1,274 @@
+# Profile loading and the validated RenderConfig shared by the Streamlit app and the CLI tools
+import dataclasses
+import hashlib
+import json
+import os
+from dataclasses import dataclass, fields
+
+import yaml
+
+DEFAULT_PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "video_profiles.yaml")
+
+def load_video_profiles(path=DEFAULT_PROFILES_PATH):
+    """Load the profiles mapping from a video_profiles.yaml file"""
+    with open(path, 'r') as file:
+        return yaml.safe_load(file) or {}
+
+def get_profile_value(profile, path, default=None):
+    """Get a value from a profile dict using dot notation path"""
+    if not profile:
+        return default
+    value = profile
+    try:
+        for key in path.split('.'):
+            value = value[key]
+        return value
+    except (KeyError, TypeError):
+        return default
+
+def time_str_to_seconds(time_str):
+    """Convert MM:SS, HH:MM:SS or plain seconds to an int number of seconds"""
+    if isinstance(time_str, (int, float)):
+        return int(time_str)
+    try:
+        # Handle different formats
+        if ":" in time_str:
+            parts = time_str.split(":")
+            if len(parts) == 2:  # MM:SS
+                minutes, seconds = parts
+                return int(minutes) * 60 + int(seconds)
+            elif len(parts) == 3:  # HH:MM:SS
+                hours, minutes, seconds = parts
+                return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        # Handle direct seconds input
+        return int(time_str)
+    except ValueError:
+        return 0  # Default to 0 if parsing fails
+
+def hex_to_rgb(hex_color):
+    """Convert a #RRGGBB string to an (R, G, B) tuple"""
+    if isinstance(hex_color, (tuple, list)):
+        return tuple(hex_color)
+    return tuple(int(hex_color.lstrip('#')[i:i+2], 16) for i in (0, 2, 4))
+
+def rgb_to_hex(rgb):
+    """Convert an (R, G, B) tuple to a #RRGGBB string"""
+    return "#{:02X}{:02X}{:02X}".format(*rgb)
+
+def seconds_to_time_str(seconds):
+    """Convert seconds to MM:SS (HH:MM:SS from an hour up), the inverse of time_str_to_seconds"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+BACKGROUND_MODES = ("blur_image", "solid")
+BACKGROUND_IMAGE_FITS = ("stretch", "crop", "fill")
+BACKGROUND_MOTIONS = ("none", "ken_burns")
+WAVEFORM_ANALYSIS_MODES = ("melspectrogram", "rms")
+WAVEFORM_COLOR_MODES = ("contrast", "custom", "white", "black")
+WAVEFORM_STYLES = ("bars", "mirrored", "line", "radial")
+WAVEFORM_ANTIALIAS_FACTORS = (1, 2, 3, 4)
+LYRICS_POSITIONS = ("below", "above")
+
+# RenderConfig field -> (dotted path in video_profiles.yaml, default when the profile doesn't set it)
+PROFILE_PATHS = {
+    "audio_start_time": ('input_output.audio_start_time', "00:33"),
+    "audio_end_time": ('input_output.audio_end_time', "01:26"),
+    "output_filename": ('input_output.output_filename', "youtube_short.mp4"),
+    "video_fps": ('video.fps', 60),
+    "video_width": ('video.width', 1080),
+    "video_height": ('video.height', 1920),
+    "background_mode": ('background.mode', "blur_image"),
+    "background_blur_radius": ('background.blur_radius', 50),
+    "background_image_fit": ('background.image_fit', "stretch"),
+    "background_color": ('background.color', "#000000"),
+    "background_motion": ('background.motion', "none"),
+    "background_motion_zoom": ('background.motion_zoom', 1.1),
+    "image_width_percentage": ('image.width_percentage', 65),
+    "image_corner_radius": ('image.corner_radius', 30),
+    "image_x_position": ('image.x_position', -1),
+    "image_y_position": ('image.y_position', -1),
+    "image_pulse_scale": ('image.pulse_scale', 0.0),
+    "shadow_offset_x": ('shadow.offset_x', 10),
+    "shadow_offset_y": ('shadow.offset_y', 10),
+    "shadow_blur_radius": ('shadow.blur_radius', 15),
+    "shadow_darkness_factor": ('shadow.darkness_factor', 0.5),
+    "waveform_enabled": ('waveform.enabled', True),
+    "waveform_style": ('waveform.style', "bars"),
+    "waveform_antialias": ('waveform.antialias', 1),
+    "waveform_analysis_mode": ('waveform.analysis_mode', "melspectrogram"),
+    "waveform_color_mode": ('waveform.color_mode', "contrast"),
+    "waveform_color": ('waveform.color', "#FFFFFF"),
+    "waveform_height_percentage": ('waveform.height_percentage', 15),
+    "waveform_bar_count": ('waveform.bar_count', 50),
+    "waveform_bar_spacing_ratio": ('waveform.bar_spacing_ratio', 0.2),
+    "waveform_smoothing_factor": ('waveform.smoothing_factor', 0.35),
+    "spacing_image_waveform": ('waveform.spacing_from_image', 215),
+    "waveform_min_db": ('waveform.min_db', -80.0),
+    "waveform_max_db": ('waveform.max_db', 0.0),
+    "lyrics_position": ('lyrics.position', "below"),
+    "lyrics_font": ('lyrics.font', "DejaVuSans-Bold.ttf"),
+    "lyrics_font_size": ('lyrics.font_size', 56),
+    "lyrics_color": ('lyrics.color', "#FFFFFF"),
+    "lyrics_fade_seconds": ('lyrics.fade_seconds', 0.25),
+}
+
+@dataclass(frozen=True, slots=True)
+class RenderConfig:
+    """Every setting of one render, validated once; immutable, hashable and cheap to pickle"""
+    image_path: str
+    audio_path: str
+    audio_start_time: float
+    audio_end_time: float
+    output_filename: str
+    video_fps: int
+    video_width: int
+    video_height: int
+    background_mode: str
+    background_blur_radius: int
+    background_image_fit: str
+    background_color: tuple
+    image_width_percentage: int
+    image_corner_radius: int
+    image_x_position: int
+    image_y_position: int
+    shadow_offset_x: int
+    shadow_offset_y: int
+    shadow_blur_radius: int
+    shadow_darkness_factor: float
+    waveform_enabled: bool
+    waveform_analysis_mode: str
+    waveform_color_mode: str
+    waveform_color: tuple
+    waveform_height_percentage: int
+    waveform_bar_count: int
+    waveform_bar_spacing_ratio: float
+    waveform_smoothing_factor: float
+    spacing_image_waveform: int
+    waveform_min_db: float
+    waveform_max_db: float
+    # Settings added after the original set default so existing callers keep working
+    background_motion: str = "none"
+    background_motion_zoom: float = 1.1
+    image_pulse_scale: float = 0.0
+    waveform_style: str = "bars"
+    waveform_antialias: int = 1
+    lyrics_path: str = ""  # LRC/SRT file with timed lines; empty for no lyrics
+    lyrics_position: str = "below"
+    lyrics_font: str = "DejaVuSans-Bold.ttf"
+    lyrics_font_size: int = 56
+    lyrics_color: tuple = (255, 255, 255)
+    lyrics_fade_seconds: float = 0.25
+
+    def __post_init__(self):
+        # Normalize types so equal settings always compare, hash and pickle the same (60 == 60.0, "#fff" == (255, 255, 255))
+        for config_field in fields(self):
+            value = getattr(self, config_field.name)
+            try:
+                if config_field.type is tuple: value = hex_to_rgb(value)
+                elif config_field.type is str: value = str(value)
+                elif config_field.type is bool: value = bool(value)
+                elif config_field.type is int: value = int(value)
+                elif config_field.type is float: value = float(value)
+            except (TypeError, ValueError):
+                expected = "a #RRGGBB or (R, G, B) color" if config_field.type is tuple else config_field.type.__name__
+                raise ValueError(f"{config_field.name} must be {expected}, got {value!r}") from None
+            object.__setattr__(self, config_field.name, value)
+        self._validate()
+
+    def _validate(self):
+        choices = {"background_mode": BACKGROUND_MODES, "background_image_fit": BACKGROUND_IMAGE_FITS,
+                   "background_motion": BACKGROUND_MOTIONS, "waveform_analysis_mode": WAVEFORM_ANALYSIS_MODES, "waveform_color_mode": WAVEFORM_COLOR_MODES,
+                   "waveform_style": WAVEFORM_STYLES, "lyrics_position": LYRICS_POSITIONS}
+        for name, options in choices.items():
+            if getattr(self, name) not in options:
+                raise ValueError(f"{name} must be one of {', '.join(options)}, got {getattr(self, name)!r}")
+        for name in ("background_color", "waveform_color", "lyrics_color"):
+            color = getattr(self, name)
+            if len(color) != 3 or any(not 0 <= c <= 255 for c in color):
+                raise ValueError(f"{name} must be an (R, G, B) color with 0-255 channels, got {color!r}")
+        if self.audio_start_time < 0:
+            raise ValueError(f"audio_start_time must not be negative, got {self.audio_start_time:g}")
+        if self.audio_end_time <= self.audio_start_time:
+            raise ValueError(f"audio_end_time ({self.audio_end_time:g}s) must be after audio_start_time ({self.audio_start_time:g}s)")
+        positive = ("video_fps", "video_width", "video_height", "image_width_percentage", "waveform_bar_count", "lyrics_font_size")
+        non_negative = ("background_blur_radius", "image_corner_radius", "shadow_blur_radius",
+                        "waveform_height_percentage", "waveform_bar_spacing_ratio", "spacing_image_waveform",
+                        "lyrics_fade_seconds")
+        for name in positive:
+            if getattr(self, name) <= 0:
+                raise ValueError(f"{name} must be positive, got {getattr(self, name)}")
+        for name in non_negative:
+            if getattr(self, name) < 0:
+                raise ValueError(f"{name} must not be negative, got {getattr(self, name)}")
+        if self.image_width_percentage > 100:
+            raise ValueError(f"image_width_percentage must be at most 100, got {self.image_width_percentage}")
+        if self.image_x_position < -1 or self.image_y_position < -1:
+            raise ValueError("image_x_position and image_y_position must be -1 (auto-center) or a pixel offset")
+        for name in ("shadow_darkness_factor", "waveform_smoothing_factor"):
+            if not 0.0 <= getattr(self, name) <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1, got {getattr(self, name)}")
+        if self.waveform_antialias not in WAVEFORM_ANTIALIAS_FACTORS:
+            raise ValueError(f"waveform_antialias must be 1 (off) or a supersampling factor of 2-4, got {self.waveform_antialias}")
+        if not 0.0 <= self.image_pulse_scale <= 0.5:
+            raise ValueError(f"image_pulse_scale must be between 0 and 0.5, got {self.image_pulse_scale}")
+        if not 1.0 <= self.background_motion_zoom <= 2.0:
+            raise ValueError(f"background_motion_zoom must be between 1 and 2, got {self.background_motion_zoom}")
+        if self.waveform_min_db >= self.waveform_max_db:
+            raise ValueError(f"waveform_min_db ({self.waveform_min_db}) must be below waveform_max_db ({self.waveform_max_db})")
+
+    @classmethod
+    def from_profile(cls, profile, image_path, audio_path, audio_start_time=None, audio_end_time=None,
+                     output_filename=None, overrides=None):
+        """Build a config from a video_profiles.yaml profile plus overrides (dotted profile paths or field names)"""
+        overrides = overrides or {}
+        values = {}
+        for name, (path, default) in PROFILE_PATHS.items():
+            values[name] = overrides.get(name, overrides.get(path, get_profile_value(profile, path, default)))
+        if audio_start_time is not None: values["audio_start_time"] = audio_start_time
+        if audio_end_time is not None: values["audio_end_time"] = audio_end_time
+        if output_filename: values["output_filename"] = output_filename
+        for name in ("audio_start_time", "audio_end_time"):
+            if isinstance(values[name], str): values[name] = time_str_to_seconds(values[name])
+        return cls(image_path=image_path, audio_path=audio_path, **values)
+
+    def replace(self, **changes):
+        """Copy with some fields changed (validated like a new config)"""
+        return dataclasses.replace(self, **changes)
+
+    def to_dict(self):
+        return {config_field.name: getattr(self, config_field.name) for config_field in fields(self)}
+
+    def _hash_fields(self, names):
+        payload = json.dumps([[name, getattr(self, name)] for name in names], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @property
+    def content_hash(self):
+        """Stable digest of every setting; equal configs hash equal across processes and runs"""
+        return self._hash_fields([config_field.name for config_field in fields(self)])
+
+    @property
+    def assets_hash(self):
+        """Digest of only the settings precompute_assets reads, for caching precomputed assets"""
+        return self._hash_fields(PRECOMPUTE_FIELDS)
+
+    @property
+    def video_duration(self):
+        return self.audio_end_time - self.audio_start_time
+
+    @property
+    def num_video_frames(self):
+        return int(self.video_duration * self.video_fps)
+
+# The settings that shape precomputed assets; the rest only affect per-frame compositing or the encode
+PRECOMPUTE_FIELDS = (
+    "image_path", "audio_path", "audio_start_time", "audio_end_time", "video_fps", "video_width", "video_height",
+    "background_mode", "background_blur_radius", "background_image_fit", "background_motion", "background_motion_zoom",
+    "image_width_percentage", "image_corner_radius", "image_x_position", "image_y_position", "image_pulse_scale",
+    "shadow_darkness_factor", "shadow_blur_radius", "waveform_enabled", "waveform_style", "waveform_antialias", "waveform_height_percentage",
+    "waveform_bar_count", "waveform_bar_spacing_ratio", "spacing_image_waveform", "waveform_analysis_mode", "waveform_smoothing_factor",
+    "waveform_min_db", "waveform_max_db", "lyrics_path", "lyrics_position", "lyrics_font", "lyrics_font_size",
+    "lyrics_color", "lyrics_fade_seconds"
+)
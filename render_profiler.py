@@ -0,0 +1,105 @@
+# Per-stage and per-frame timing instrumentation for renders
+#
+# A RenderProfiler is activated for the rendering thread (`with profiler.activate():`). Stage code asks for
+# the active profiler through stage(); the per-frame hot path reads it once from VideoAssets.profiler and
+# only calls perf_counter when it is set, so a render without a profiler pays a few `is None` checks per frame.
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_active = threading.local()
+
+def active():
+    """The profiler activated on the current thread, or None"""
+    return getattr(_active, "profiler", None)
+
+def stage(name):
+    """Context manager timing a named stage on the active profiler; a no-op when none is active"""
+    profiler = active()
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+class RenderProfiler:
+    # Per-frame stages in render order, used to order the summary table
+    FRAME_STAGES = ["background_copy", "shadow_paste", "image_paste", "contrast_stat", "bar_draw",
+                    "waveform_blur", "waveform_paste", "array_conversion", "encoder_wait"]
+
+    def __init__(self):
+        self.stages = {}
+        self.frame_stats = {}
+        self.frame_count = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        previous = active()
+        _active.profiler = self
+        try:
+            yield self
+        finally:
+            _active.profiler = previous
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - start)
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def lap(self, name, start):
+        """Record a per-frame timing since `start` and return the current perf_counter for the next lap"""
+        now = time.perf_counter()
+        stats = self.frame_stats.get(name)
+        if stats is None:
+            stats = self.frame_stats[name] = [0, 0.0, 0.0]  # count, total, max
+        elapsed = now - start
+        stats[0] += 1
+        stats[1] += elapsed
+        if elapsed > stats[2]: stats[2] = elapsed
+        return now
+
+    def end_frame(self):
+        self.frame_count += 1
+
+    def report(self):
+        """JSON-serialisable timing report"""
+        ordered = [name for name in self.FRAME_STAGES if name in self.frame_stats]
+        ordered += sorted(name for name in self.frame_stats if name not in self.FRAME_STAGES)
+        return {
+            "stages_seconds": dict(self.stages),
+            "frame_count": self.frame_count,
+            "frame_stages": {
+                name: {
+                    "count": self.frame_stats[name][0],
+                    "total_seconds": self.frame_stats[name][1],
+                    "mean_ms": 1000.0 * self.frame_stats[name][1] / self.frame_stats[name][0],
+                    "max_ms": 1000.0 * self.frame_stats[name][2]
+                } for name in ordered
+            }
+        }
+
+    def to_json(self, path=None):
+        data = json.dumps(self.report(), indent=2)
+        if path:
+            with open(path, "w") as file:
+                file.write(data)
+        return data
+
+def summary_rows(report):
+    """Flatten a report into table rows (stage, total seconds, mean ms per frame, share of frame time)"""
+    frame_total = sum(stats["total_seconds"] for stats in report["frame_stages"].values())
+    rows = [{"stage": name, "total_s": round(seconds, 3), "mean_ms_per_frame": None, "share_of_frame_time": None}
+            for name, seconds in report["stages_seconds"].items()]
+    for name, stats in report["frame_stages"].items():
+        rows.append({
+            "stage": f"frame.{name}",
+            "total_s": round(stats["total_seconds"], 3),
+            "mean_ms_per_frame": round(stats["mean_ms"], 3),
+            "share_of_frame_time": f"{100.0 * stats['total_seconds'] / frame_total:.1f}%" if frame_total else None
+        })
+    return rows
@@ -0,0 +1,176 @@
+# Background render queue: a bounded worker pool shared by every Streamlit session
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from render_profiler import RenderProfiler
+
+def _input_paths(config):
+    return [path for path in (config.image_path, config.audio_path, config.lyrics_path) if path]
+
+class RenderJob:
+    def __init__(self, job_id, config, collect_timings=False):
+        self.job_id = job_id
+        self.config = config
+        self.collect_timings = collect_timings
+        self.status = "queued"  # queued, running, done, failed
+        self.frames_done = 0
+        self.total_frames = 0
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.encode_started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def progress(self):
+        """Fraction of frames encoded, 0.0 - 1.0"""
+        if self.status == "done":
+            return 1.0
+        return min(1.0, self.frames_done / self.total_frames) if self.total_frames else 0.0
+
+    @property
+    def fps(self):
+        """Frames rendered per second since the encoder started"""
+        if not self.encode_started_at or not self.frames_done:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.encode_started_at
+        return self.frames_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self):
+        """Estimated seconds until the job finishes, or None if unknown"""
+        if self.status != "running" or not self.fps or not self.total_frames:
+            return None
+        return max(0.0, (self.total_frames - self.frames_done) / self.fps)
+
+    @property
+    def is_active(self):
+        return self.status in ("queued", "running")
+
+class RenderQueue:
+    FINISHED_JOB_RETENTION_SECONDS = 6 * 3600
+    MAX_ESTIMATES = 64  # Render estimates kept per config content
+
+    def __init__(self, max_workers=2, warm=True, numba_cache_dir=None, upload_store=None):
+        self.max_workers = max_workers
+        self.upload_store = upload_store  # Inputs of queued and running jobs are pinned in it
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._estimates = OrderedDict()  # config content_hash -> Future of estimate_render
+        self.warmup = None  # render_workers.warm_up report once warm
+        self.first_job_latency_seconds = None  # Submit to first encoded frame of the first job
+        self._warm_event = threading.Event()
+        self._numba_cache_dir = numba_cache_dir
+        self._warm_thread = None
+        if not warm:
+            self._warm_event.set()
+
+    def start_warm_up(self):
+        """Start warming the render stack in the background, once. Not done on construction, so creating the
+        queue at app start stays cheap; the app calls this when a render becomes likely, and submit() does."""
+        with self._lock:
+            if self._warm_thread is not None or self._warm_event.is_set():
+                return
+            # Imports and numba JIT happen once, in the background, instead of inside the first user's render
+            self._warm_thread = threading.Thread(target=self._warm_up, args=(self._numba_cache_dir,),
+                                                 name="render-warmup", daemon=True)
+            self._warm_thread.start()
+
+    def _warm_up(self, numba_cache_dir):
+        import render_workers
+        try:
+            self.warmup = render_workers.warm_up(numba_cache_dir)
+        except Exception as e:
+            print(f"Render warm-up failed, the first job will warm up instead: {e}")
+        finally:
+            self._warm_event.set()
+
+    @property
+    def is_warm(self):
+        return self._warm_event.is_set()
+
+    def submit(self, config, collect_timings=False):
+        """Queue a render of a RenderConfig and return its job id"""
+        self.start_warm_up()
+        if self.upload_store is not None:
+            self.upload_store.pin(_input_paths(config))
+        with self._lock:
+            self._prune_finished()
+            job = RenderJob(next(self._ids), config, collect_timings)
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job)
+        return job.job_id
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def estimate(self, config):
+        """Future of video_generation.estimate_render(config), run on a render slot instead of the caller's thread.
+        Shared by every session per config content; a failed estimate is retried on the next call."""
+        self.start_warm_up()
+        with self._lock:
+            future = self._estimates.get(config.content_hash)
+            if future is None or (future.done() and future.exception() is not None):
+                if self.upload_store is not None:
+                    self.upload_store.pin(_input_paths(config))
+                future = self._estimates[config.content_hash] = self._executor.submit(self._run_estimate, config)
+            self._estimates.move_to_end(config.content_hash)
+            while len(self._estimates) > self.MAX_ESTIMATES:
+                self._estimates.popitem(last=False)
+            return future
+
+    def get_estimate(self, config):
+        """Future of an estimate already requested for this config's content, or None"""
+        return self._estimates.get(config.content_hash)
+
+    def queued_ahead(self, job_id):
+        """Number of queued jobs submitted before this one"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == "queued" and job.job_id < job_id)
+
+    def _prune_finished(self):
+        cutoff = time.time() - self.FINISHED_JOB_RETENTION_SECONDS
+        for job_id in [job.job_id for job in self._jobs.values() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        self._warm_event.wait()  # Jobs start on a warm process; waiting is never slower than warming inside the job
+        import video_generation  # Deferred so importing the queue (at app start) doesn't load librosa/moviepy
+        job.status = "running"
+        job.started_at = time.time()
+
+        def on_progress(frames_done, total_frames):
+            if job.encode_started_at is None:
+                job.encode_started_at = time.time()
+                if self.first_job_latency_seconds is None:
+                    self.first_job_latency_seconds = job.encode_started_at - job.submitted_at
+            job.frames_done = frames_done
+            job.total_frames = total_frames
+
+        try:
+            profiler = RenderProfiler() if job.collect_timings else None
+            job.result = video_generation.render_video(job.config, progress_callback=on_progress, logger=None,
+                                                       profiler=profiler)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"Error generating video: {str(e)}"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            if self.upload_store is not None:
+                self.upload_store.release(_input_paths(job.config))
+
+    def _run_estimate(self, config):
+        self._warm_event.wait()
+        import video_generation
+        try:
+            return video_generation.estimate_render(config)
+        finally:
+            if self.upload_store is not None:
+                self.upload_store.release(_input_paths(config))
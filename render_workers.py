@@ -0,0 +1,190 @@
+# Pre-warmed render workers
+#
+# A fresh process pays for importing librosa/moviepy and for numba JIT-compiling librosa's feature code on its
+# first analyze_audio call, which shows up as seconds of extra latency on the first job a worker gets.
+# warm_up() does that work up front on a tiny synthetic cover and tone; WarmProcessPool runs it in every
+# worker process before any job is sent there. Set numba_cache_dir (or NUMBA_CACHE_DIR) to keep numba's
+# compiled code on disk so even the warm-up is cheap after the first run.
+import multiprocessing
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+WARMUP_SAMPLE_RATE = 22050
+WARMUP_ANALYSIS_MODES = ("melspectrogram", "rms")
+
+_warmup_lock = threading.Lock()
+_warmup_report = None
+
+def _write_warmup_inputs(directory):
+    # A 1 s two-tone WAV and a small gradient cover; just enough for every analysis and compositing path
+    import numpy as np
+    from PIL import Image
+    audio_path = os.path.join(directory, "warmup.wav")
+    with wave.open(audio_path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(WARMUP_SAMPLE_RATE)
+        t = np.arange(WARMUP_SAMPLE_RATE) / WARMUP_SAMPLE_RATE
+        tone = 0.4 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 880 * t)
+        wav_file.writeframes((tone * 32767).astype("<i2").tobytes())
+    image_path = os.path.join(directory, "warmup.png")
+    Image.linear_gradient("L").resize((64, 64)).convert("RGBA").save(image_path)
+    return image_path, audio_path
+
+def enable_numba_cache(numba_cache_dir):
+    """Point numba's on-disk cache at numba_cache_dir; only effective before numba is first imported"""
+    os.makedirs(numba_cache_dir, exist_ok=True)
+    if "numba" in sys.modules and os.environ.get("NUMBA_CACHE_DIR") != numba_cache_dir:
+        print(f"Warning: numba is already imported; NUMBA_CACHE_DIR={numba_cache_dir} will not take effect in this process")
+    os.environ["NUMBA_CACHE_DIR"] = numba_cache_dir
+
+def warm_up(numba_cache_dir=None):
+    """Import the render stack and run a tiny analysis and render once per process; returns the timing report"""
+    global _warmup_report
+    with _warmup_lock:
+        if _warmup_report is not None:
+            return _warmup_report
+        if numba_cache_dir:
+            enable_numba_cache(numba_cache_dir)
+        start = time.perf_counter()
+        import librosa  # noqa: F401 (the import and numba setup are part of what is being warmed)
+        import moviepy.editor  # noqa: F401
+        import video_generation
+        from render_config import RenderConfig
+        import_seconds = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory(prefix="render_warmup_") as directory:
+            image_path, audio_path = _write_warmup_inputs(directory)
+            config = RenderConfig(
+                image_path=image_path, audio_path=audio_path, audio_start_time=0, audio_end_time=1,
+                output_filename=os.path.join(directory, "warmup.mp4"), video_fps=12, video_width=72, video_height=128,
+                background_mode="blur_image", background_blur_radius=4, background_image_fit="crop", background_color=(0, 0, 0),
+                image_width_percentage=65, image_corner_radius=4, image_x_position=-1, image_y_position=-1,
+                shadow_offset_x=2, shadow_offset_y=2, shadow_blur_radius=2, shadow_darkness_factor=0.5,
+                waveform_enabled=True, waveform_analysis_mode="melspectrogram", waveform_color_mode="contrast",
+                waveform_color=(255, 255, 255), waveform_height_percentage=15, waveform_bar_count=8,
+                waveform_bar_spacing_ratio=0.2, waveform_smoothing_factor=0.35, spacing_image_waveform=10,
+                waveform_min_db=-80.0, waveform_max_db=0.0)
+            analysis_start = time.perf_counter()
+            # The warm-up audio is identical every time, so skip the on-disk analysis cache or only the first
+            # warm-up would ever run librosa, the STFT and the beat tracker JIT
+            for mode in WARMUP_ANALYSIS_MODES:
+                video_generation.analyze_audio(**video_generation.analysis_args_for_render(config.replace(waveform_analysis_mode=mode)),
+                                               use_disk_cache=False)
+            video_generation.analyze_rhythm(audio_path, 0, 1, config.num_video_frames, config.video_fps, use_disk_cache=False)  # beat tracker JIT
+            analysis_seconds = time.perf_counter() - analysis_start
+            render_start = time.perf_counter()
+            assets = video_generation.precompute_assets(config)
+            video_generation.render_still(assets, config, 0)
+            render_seconds = time.perf_counter() - render_start
+
+        _warmup_report = {
+            "pid": os.getpid(),
+            "seconds": time.perf_counter() - start,
+            "import_seconds": import_seconds,
+            "analysis_seconds": analysis_seconds,
+            "render_seconds": render_seconds,
+            "numba_cache_dir": os.environ.get("NUMBA_CACHE_DIR")
+        }
+        print(f"Render worker {os.getpid()} warmed up in {_warmup_report['seconds']:.1f}s "
+              f"(imports {import_seconds:.1f}s, analysis {analysis_seconds:.1f}s, render {render_seconds:.1f}s)")
+        return _warmup_report
+
+def _init_worker(warm, numba_cache_dir, ready_queue=None):
+    try:
+        if warm:
+            warm_up(numba_cache_dir)
+        elif numba_cache_dir:
+            enable_numba_cache(numba_cache_dir)
+    finally:
+        if ready_queue is not None:
+            ready_queue.put(_worker_report())  # Every process reports itself once its initializer has run
+
+def _worker_report():
+    return dict(_warmup_report or {"pid": os.getpid(), "seconds": 0.0})
+
+def render_in_worker(config, collect_timings=False):
+    """Render one RenderConfig in the calling (worker) process; returns render_video's result dict"""
+    import video_generation
+    from render_profiler import RenderProfiler
+    result = video_generation.render_video(config, logger=None, profiler=RenderProfiler() if collect_timings else None)
+    result["worker_pid"] = os.getpid()
+    return result
+
+class WarmProcessPool:
+    """Process pool whose workers are warmed up (imports, numba JIT, one tiny render) before taking jobs"""
+    READY_POLL_SECONDS = 1.0
+
+    def __init__(self, max_workers=2, numba_cache_dir=None, warm=True):
+        self.max_workers = max_workers
+        self.warm = warm
+        self.workers = {}  # pid -> warm-up report
+        self.warmup_seconds = None
+        self.first_job_latency_seconds = None
+        self._first_job_submitted = None
+        self._lock = threading.Lock()
+        # spawn: workers start from a clean interpreter, never a fork of a process holding threads or locks
+        context = multiprocessing.get_context("spawn")
+        ready_queue = context.Queue()
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(warm, numba_cache_dir, ready_queue))
+        start = time.perf_counter()
+        # Probes submitted while no worker is idle make the executor start all max_workers processes. A probe
+        # can be served by whichever worker is ready first, though, so readiness comes from each process's own
+        # report on ready_queue: the pool is warm once every pid has reported.
+        probes = [self._executor.submit(_worker_report) for _ in range(max_workers)]
+        while len(self.workers) < max_workers:
+            try:
+                report = ready_queue.get(timeout=self.READY_POLL_SECONDS)
+            except queue.Empty:
+                failed = [probe for probe in probes if probe.done() and probe.exception()]
+                if failed:
+                    raise failed[0].exception()  # A worker died in its initializer
+                continue
+            self.workers[report["pid"]] = report
+        for probe in probes:
+            probe.result()
+        self.warmup_seconds = time.perf_counter() - start
+
+    def submit(self, fn, *args, **kwargs):
+        """Run a picklable top-level function in a warm worker. first_job_latency_seconds is the time from the
+        pool's first submission until its first job finishes (whichever job that is)"""
+        submitted_at = time.perf_counter()
+        with self._lock:
+            if self._first_job_submitted is None:
+                self._first_job_submitted = submitted_at
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._record_first_job_latency)
+        return future
+
+    def render(self, config, collect_timings=False):
+        """Queue a render of a RenderConfig and return its Future"""
+        return self.submit(render_in_worker, config, collect_timings)
+
+    def _record_first_job_latency(self, future):
+        with self._lock:
+            if self.first_job_latency_seconds is None:
+                self.first_job_latency_seconds = time.perf_counter() - self._first_job_submitted
+
+    def stats(self):
+        return {
+            "workers": list(self.workers.values()),
+            "warm": self.warm,
+            "warmup_seconds": self.warmup_seconds,
+            "first_job_latency_seconds": self.first_job_latency_seconds
+        }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
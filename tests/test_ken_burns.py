@@ -0,0 +1,33 @@
+import math
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import video_generation
+
+@pytest.mark.parametrize("video_size, zoom, num_frames", [((1080, 1920), 1.15, 300), ((720, 1280), 2.0, 30), ((73, 129), 1.01, 5), ((540, 960), 1.5, 1)])
+def test_boxes_stay_inside_the_source(video_size, zoom, num_frames):
+    video_width, video_height = video_size
+    source_width, source_height = math.ceil(video_width * zoom), math.ceil(video_height * zoom)
+    boxes = video_generation.ken_burns_boxes(num_frames, video_width, video_height, source_width, source_height)
+    assert boxes.shape == (max(1, num_frames), 4)
+    lefts, tops, widths, heights = boxes.T
+    assert (lefts >= 0).all() and (tops >= 0).all()
+    assert (lefts + widths <= source_width + 1e-6).all() and (tops + heights <= source_height + 1e-6).all()
+    assert (widths >= video_width - 1e-6).all() and (heights >= video_height - 1e-6).all()
+    if num_frames > 1:
+        np.testing.assert_allclose(boxes[0], (0, 0, source_width, source_height))  # Starts on the whole source
+        np.testing.assert_allclose(boxes[-1][2:], (video_width, video_height))  # Ends on a video-sized window
+        assert (np.diff(widths) <= 1e-9).all()  # Only ever zooms in
+
+def test_background_frames_are_video_sized_crops_of_the_source():
+    video_width, video_height, zoom = 90, 160, 1.5
+    source_width, source_height = math.ceil(video_width * zoom), math.ceil(video_height * zoom)
+    source = Image.new("RGB", (source_width, source_height), (200, 10, 10))
+    boxes = video_generation.ken_burns_boxes(40, video_width, video_height, source_width, source_height)
+    background = video_generation.KenBurnsBackground(source, boxes, video_width, video_height)
+    for frame_idx in range(45):  # Past the last frame holds the final window
+        frame = background.frame(frame_idx)
+        assert frame.size == (video_width, video_height)
+        assert frame.getextrema()[0] == (200, 200)  # Never padded past the source's edge
@@ -0,0 +1,22 @@
+import lyrics_overlay
+
+def test_parse_lrc():
+    text = "[ar:Artist]\n[00:12.50]First line\n[00:10.00]Zeroth line\n[00:15.00]\n[01:02.25][00:20.00]Chorus\n"
+    assert lyrics_overlay.parse_lrc(text) == [
+        (10.0, 12.5, "Zeroth line"),
+        (12.5, 15.0, "First line"),
+        (20.0, 62.25, "Chorus"),
+        (62.25, None, "Chorus"),
+    ]
+
+def test_parse_lrc_ignores_untimed_text():
+    assert lyrics_overlay.parse_lrc("no timestamps here\n[ti:Title]") == []
+
+def test_parse_srt():
+    text = ("2\r\n00:00:05,500 --> 00:00:07,000\r\nSecond\r\n\r\n"
+            "1\r\n00:00:01,000 --> 00:00:04.250\r\nFirst cue\r\non two lines\r\n\r\n"
+            "3\r\n01:00:00,000 --> 01:00:01,000\r\n\r\n")
+    assert lyrics_overlay.parse_srt(text) == [
+        (1.0, 4.25, "First cue\non two lines"),
+        (5.5, 7.0, "Second"),
+    ]
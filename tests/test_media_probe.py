@@ -0,0 +1,97 @@
+import struct
+
+import media_probe
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+# WAV
+
+def wav_chunk(chunk_id, payload):
+    return chunk_id + struct.pack("<I", len(payload)) + payload + b"\0" * (len(payload) & 1)
+
+def wav_file(chunks):
+    body = b"WAVE" + b"".join(chunks)
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+def pcm_fmt(channels=2, sample_rate=44100, bits=16):
+    block_align = channels * bits // 8
+    return wav_chunk(b"fmt ", struct.pack("<HHIIHH", 1, channels, sample_rate, sample_rate * block_align, block_align, bits))
+
+def test_wav(tmp_path):
+    path = write(tmp_path, "a.wav", wav_file([pcm_fmt(), wav_chunk(b"data", b"\0" * 44100 * 4 * 2)]))
+    info = media_probe.probe_audio(path)
+    assert (info["format"], info["sample_rate"], info["channels"], info["bits_per_sample"]) == ("wav", 44100, 2, 16)
+    assert info["duration"] == 2.0
+
+def test_wav_fmt_after_data_and_extra_chunks(tmp_path):
+    chunks = [wav_chunk(b"LIST", b"INFOjunk!"), wav_chunk(b"data", b"\0" * 22050 * 2), pcm_fmt(channels=1, sample_rate=22050)]
+    info = media_probe.probe_audio(write(tmp_path, "b.wav", wav_file(chunks)))
+    assert (info["sample_rate"], info["channels"], info["duration"]) == (22050, 1, 1.0)
+
+def test_wav_without_fmt_is_rejected(tmp_path):
+    assert media_probe.probe_audio(write(tmp_path, "c.wav", wav_file([wav_chunk(b"data", b"\0" * 100)]))) is None
+
+# MP3
+
+MP3_HEADER = b"\xff\xfb\x90\x00"  # MPEG-1 layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames
+MP3_FRAME_LENGTH = 417
+
+def mp3_frames(count, first_payload=b""):
+    first = MP3_HEADER + first_payload
+    return first + b"\0" * (MP3_FRAME_LENGTH - len(first)) + (MP3_HEADER + b"\0" * (MP3_FRAME_LENGTH - 4)) * (count - 1)
+
+def test_mp3_cbr(tmp_path):
+    id3 = b"ID3\x03\x00\x00\x00\x00\x00\x0a" + b"\0" * 10
+    info = media_probe.probe_audio(write(tmp_path, "a.mp3", id3 + mp3_frames(100)))
+    assert (info["format"], info["sample_rate"], info["channels"]) == ("mp3", 44100, 2)
+    assert abs(info["duration"] - 100 * MP3_FRAME_LENGTH * 8 / 128000) < 1e-9
+
+def test_mp3_xing_frame_count(tmp_path):
+    xing = b"\0" * 32 + b"Xing" + struct.pack(">II", 0x1, 1000)  # Side info, then the Xing tag with a frame count
+    info = media_probe.probe_audio(write(tmp_path, "b.mp3", mp3_frames(10, xing)))
+    assert abs(info["duration"] - 1000 * 1152 / 44100) < 1e-9
+
+def test_mp3_needs_two_consecutive_frames(tmp_path):
+    assert media_probe.probe_audio(write(tmp_path, "c.mp3", b"\0" * 50 + MP3_HEADER + b"\0" * 100)) is None
+
+# FLAC
+
+def flac_file(sample_rate, channels, bits, total_samples, last=True):
+    packed = sample_rate << 44 | (channels - 1) << 41 | (bits - 1) << 36 | total_samples
+    streaminfo = b"\0" * 10 + packed.to_bytes(8, "big") + b"\0" * 16
+    return b"fLaC" + bytes([0x80 if last else 0]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+
+def test_flac(tmp_path):
+    info = media_probe.probe_audio(write(tmp_path, "a.flac", flac_file(48000, 2, 24, 48000 * 3)))
+    assert (info["format"], info["sample_rate"], info["channels"], info["bits_per_sample"]) == ("flac", 48000, 2, 24)
+    assert info["duration"] == 3.0
+
+def test_flac_without_sample_count_is_rejected(tmp_path):
+    assert media_probe.probe_audio(write(tmp_path, "b.flac", flac_file(48000, 2, 16, 0))) is None
+
+# MP4
+
+def box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+def mp4_file(timescale, duration, width, height, rotated=False):
+    mvhd = box(b"mvhd", b"\0" * 12 + struct.pack(">II", timescale, duration) + b"\0" * 80)
+    matrix = (0, 65536, 0, -65536, 0, 0, 0, 0, 1 << 30) if rotated else (65536, 0, 0, 0, 65536, 0, 0, 0, 1 << 30)
+    tkhd = box(b"tkhd", b"\0" * (4 + 20 + 16) + struct.pack(">9i", *matrix) + struct.pack(">II", width << 16, height << 16))
+    mdia = box(b"mdia", box(b"hdlr", b"\0" * 8 + b"vide" + b"\0" * 12))
+    moov = box(b"moov", mvhd + box(b"trak", tkhd + mdia))
+    return box(b"ftyp", b"isom\0\0\0\0") + box(b"mdat", b"\0" * 1000) + moov
+
+def test_mp4(tmp_path):
+    info = media_probe.probe_mp4(write(tmp_path, "a.mp4", mp4_file(1000, 15500, 1080, 1920)))
+    assert info == {"duration": 15.5, "width": 1080, "height": 1920}
+
+def test_mp4_rotation_swaps_dimensions(tmp_path):
+    info = media_probe.probe_mp4(write(tmp_path, "b.mp4", mp4_file(600, 600, 1920, 1080, rotated=True)))
+    assert (info["width"], info["height"]) == (1080, 1920)
+
+def test_not_an_mp4(tmp_path):
+    assert media_probe.probe_mp4(write(tmp_path, "c.mp4", b"RIFF" + b"\0" * 100)) is None
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from render_config import RenderConfig
+
+def make_config(**overrides):
+    return RenderConfig.from_profile(None, "cover.png", "song.wav", audio_start_time=0, audio_end_time=30).replace(**overrides)
+
+def test_values_are_normalized():
+    config = make_config(video_fps=60.0, waveform_color="#ff8000", background_motion_zoom=1)
+    assert config.video_fps == 60 and isinstance(config.video_fps, int)
+    assert config.waveform_color == (255, 128, 0)
+    assert config == make_config(waveform_color=(255, 128, 0), background_motion_zoom=1.0)
+
+@pytest.mark.parametrize("overrides", [
+    {"background_mode": "gradient"},
+    {"waveform_style": "spiral"},
+    {"audio_end_time": 0},
+    {"audio_start_time": -1},
+    {"video_width": 0},
+    {"image_width_percentage": 101},
+    {"waveform_smoothing_factor": 1.5},
+    {"waveform_antialias": 5},
+    {"background_motion_zoom": 2.5},
+    {"waveform_min_db": 0.0, "waveform_max_db": -10.0},
+    {"waveform_color": (256, 0, 0)},
+    {"waveform_color": "not a color"},
+    {"video_fps": "fast"},
+])
+def test_invalid_settings_raise(overrides):
+    with pytest.raises(ValueError):
+        make_config(**overrides)
+
+def test_content_hash_tracks_every_setting():
+    config = make_config()
+    assert config.content_hash == make_config().content_hash
+    assert config.content_hash != make_config(waveform_bar_count=config.waveform_bar_count + 1).content_hash
+    assert config.content_hash != make_config(output_filename="other.mp4").content_hash
+
+def test_assets_hash_ignores_compositing_only_settings():
+    config = make_config()
+    assert config.assets_hash == make_config(waveform_color=(1, 2, 3), waveform_color_mode="custom").assets_hash
+    assert config.assets_hash != make_config(background_blur_radius=config.background_blur_radius + 1).assets_hash
+
+def test_content_hash_is_stable_across_processes():
+    script = ("from render_config import RenderConfig; "
+              "print(RenderConfig.from_profile(None, 'cover.png', 'song.wav', audio_start_time=0, audio_end_time=30).content_hash)")
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    hashes = {subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=repo_root,
+                             env={**os.environ, "PYTHONHASHSEED": seed}).stdout.strip()
+              for seed in ("1", "2")}
+    assert hashes == {make_config().content_hash}
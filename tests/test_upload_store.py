@@ -0,0 +1,53 @@
+import os
+
+from upload_store import UploadStore, detect_extension
+
+PNG = b"\x89PNG\r\n\x1a\n"
+
+def put_aged(store, data, age):
+    # Recency is the access time; set it explicitly so the eviction order doesn't depend on timing
+    path = store.put(data)
+    stat = os.stat(path)
+    os.utime(path, ns=(1_000_000_000 * (1000 - age), stat.st_mtime_ns))
+    return path
+
+def test_same_content_is_stored_once(tmp_path):
+    store = UploadStore(str(tmp_path), max_bytes=1 << 20)
+    first = store.put(PNG + b"cover", "cover.png")
+    again = store.put(PNG + b"cover", "renamed.jpeg")
+    assert first == again
+    assert os.listdir(tmp_path) == [os.path.basename(first)]
+    assert store.put(PNG + b"other", "x.png") != first
+
+def test_extension_comes_from_the_content():
+    assert detect_extension(PNG + b"data", "cover.jpg") == ".png"
+    assert detect_extension(b"RIFF\0\0\0\0WAVE", "song.mp3") == ".wav"
+    assert detect_extension(b"\xff\xfb\x90\x00", "") == ".mp3"
+    assert detect_extension(b"plain text", "lyrics.LRC") == ".lrc"
+    assert detect_extension(b"plain text", "cover.jpeg") == ".jpg"
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    store = UploadStore(str(tmp_path), max_bytes=250)
+    oldest = put_aged(store, b"a" * 100, age=3)
+    newer = put_aged(store, b"b" * 100, age=2)
+    newest = store.put(b"c" * 100)
+    assert not os.path.exists(oldest)
+    assert os.path.exists(newer) and os.path.exists(newest)
+    assert store.usage_bytes() == 200
+
+def test_pinned_and_kept_files_survive_eviction(tmp_path):
+    store = UploadStore(str(tmp_path), max_bytes=250)
+    pinned = put_aged(store, b"a" * 100, age=3)
+    kept = put_aged(store, b"b" * 100, age=2)
+    store.pin([pinned])
+    store.pin([pinned])
+    newest = store.put(b"c" * 100, keep=[kept])
+    assert all(os.path.exists(path) for path in (pinned, kept, newest))
+
+    store.release([pinned])  # Still held once
+    store.put(b"d" * 100)
+    assert os.path.exists(pinned) and not os.path.exists(kept)
+
+    store.release([pinned])
+    store.put(b"e" * 100)
+    assert not os.path.exists(pinned)
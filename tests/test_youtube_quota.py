@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytz
+
+import youtube_quota
+
+def utc(*args):
+    return pytz.utc.localize(datetime(*args))
+
+def test_quota_day_is_the_pacific_date():
+    assert youtube_quota.quota_day(utc(2024, 1, 15, 7, 59)) == "2024-01-14"  # 23:59 PST
+    assert youtube_quota.quota_day(utc(2024, 1, 15, 8, 0)) == "2024-01-15"
+    assert youtube_quota.quota_day(utc(2024, 7, 15, 6, 59)) == "2024-07-14"  # 23:59 PDT
+    assert youtube_quota.quota_day(utc(2024, 7, 15, 7, 0)) == "2024-07-15"
+
+def test_seconds_until_reset_across_dst():
+    assert youtube_quota.seconds_until_reset(utc(2024, 1, 15, 7, 0)) == 3600
+    assert youtube_quota.seconds_until_reset(utc(2024, 3, 10, 8, 0)) == 23 * 3600  # Spring forward: a 23-hour day
+    assert youtube_quota.seconds_until_reset(utc(2024, 11, 3, 7, 0)) == 25 * 3600  # Fall back: a 25-hour day
+
+def test_ledger_rolls_over_to_a_new_day(tmp_path, monkeypatch):
+    ledger = youtube_quota.QuotaLedger(str(tmp_path / "ledger.json"), daily_limit=3300)
+    monkeypatch.setattr(youtube_quota, "quota_day", lambda now=None: "2024-01-14")
+    assert ledger.reserve(["videos.insert", "thumbnails.set"])
+    assert ledger.reserve(["videos.insert", "thumbnails.set"])
+    assert not ledger.reserve(["videos.insert"])
+    assert ledger.spent == 3300
+
+    monkeypatch.setattr(youtube_quota, "quota_day", lambda now=None: "2024-01-15")
+    assert ledger.spent == 0
+    assert ledger.reserve(["videos.insert"])
+    assert ledger.summary()["day"] == "2024-01-15"
+    assert ledger.summary()["calls"] == {"videos.insert": 1}
+
+def test_release_refunds_reserved_calls(tmp_path):
+    ledger = youtube_quota.QuotaLedger(str(tmp_path / "ledger.json"), daily_limit=10000)
+    ledger.reserve(["videos.insert", "thumbnails.set"])
+    ledger.release(["thumbnails.set"])
+    assert ledger.spent == 1600
+    assert ledger.summary()["calls"] == {"videos.insert": 1, "thumbnails.set": 0}
@@ -0,0 +1,99 @@
+# Content-addressed store for files uploaded through the app
+#
+# Each distinct upload is written once to <sha256><ext>, so reruns and repeated uploads of the same file
+# reuse one stable path (and every cache keyed on that path keeps hitting). Files are evicted least
+# recently used first once the store exceeds its disk budget. Recency is kept in the access time so the
+# modification time, which downstream caches key on, never changes. Files pinned by queued or running
+# renders, and the ones a caller is still using (put's keep), are never evicted.
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_UPLOAD_STORE_DIR = os.environ.get("UPLOAD_STORE_DIR", os.path.join(tempfile.gettempdir(), "music_shorts_uploads"))
+DEFAULT_UPLOAD_STORE_MAX_BYTES = int(os.environ.get("UPLOAD_STORE_MAX_MB", 2048)) * 1024 * 1024
+
+# Leading bytes identifying the formats the app accepts; these win over a mislabeled file name
+_MAGIC_EXTENSIONS = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"fLaC", ".flac"),
+    (b"ID3", ".mp3"),
+]
+
+def detect_extension(data, filename=""):
+    """File extension from the content's magic bytes, falling back to the file name's"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return ".wav"
+    for magic, extension in _MAGIC_EXTENSIONS:
+        if data.startswith(magic):
+            return extension
+    if len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0:
+        return ".mp3"  # MPEG audio frame sync without an ID3 tag
+    extension = os.path.splitext(filename)[1].lower()
+    return ".jpg" if extension == ".jpeg" else extension
+
+class UploadStore:
+    def __init__(self, root=DEFAULT_UPLOAD_STORE_DIR, max_bytes=DEFAULT_UPLOAD_STORE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pins = {}  # path -> number of holders (e.g. render jobs) that need it to stay
+        os.makedirs(root, exist_ok=True)
+
+    def pin(self, paths):
+        """Protect paths from eviction until a matching release(); pins are counted, so holders can overlap"""
+        with self._lock:
+            for path in paths:
+                self._pins[path] = self._pins.get(path, 0) + 1
+
+    def release(self, paths):
+        with self._lock:
+            for path in paths:
+                count = self._pins.get(path, 0) - 1
+                if count > 0: self._pins[path] = count
+                else: self._pins.pop(path, None)
+
+    def put(self, data, filename="", keep=()):
+        """Store bytes (once per distinct content) and return their stable path. Eviction to make room spares
+        the new file, every pinned file and the paths in keep (e.g. the other inputs of the same submission)."""
+        path = os.path.join(self.root, hashlib.sha256(data).hexdigest() + detect_extension(data, filename))
+        with self._lock:
+            if os.path.exists(path):
+                self._touch(path)
+                return path
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)  # Readers never see a partial file
+            self._evict(keep={path, *keep})
+        return path
+
+    def _touch(self, path):
+        # Bump the access time only: mtime is part of downstream cache keys
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+
+    def _evict(self, keep):
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_atime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep or path in self._pins:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def usage_bytes(self):
+        return sum(os.path.getsize(os.path.join(self.root, name)) for name in os.listdir(self.root)
+                   if not name.endswith(".tmp"))
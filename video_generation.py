@@ -1,10 +1,54 @@
 # --- Script Start --- #
 from PIL import Image, ImageDraw, ImageFilter, ImageStat
-import moviepy.editor as mpe
 import numpy as np
 import os
-import librosa
+import io
+import math
+import hashlib
+import tempfile
+import time
+import threading
+from collections import OrderedDict
 import colorsys
+import render_profiler
+import media_probe
+import waveform_styles
+import lyrics_overlay
+
+# librosa (numba) and moviepy are slow to import, so they are imported inside the functions that analyze
+# audio or encode video; importing this module for previews or config does not pay for them.
+
+# In-process cache for expensive, input-derived stages (decoded images, audio analysis).
+# Keys include the file's mtime and size so edited files are picked up; concurrent
+# requests for the same key wait for the first computation instead of repeating it.
+_STAGE_CACHE_MAX_ENTRIES = 32
+_stage_cache = OrderedDict()
+_stage_cache_lock = threading.Lock()
+
+def _file_key(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def _cached_stage(key, compute):
+    with _stage_cache_lock:
+        entry = _stage_cache.get(key)
+        if entry is None:
+            entry = _stage_cache[key] = {"lock": threading.Lock(), "done": False, "value": None}
+            while len(_stage_cache) > _STAGE_CACHE_MAX_ENTRIES: _stage_cache.popitem(last=False)
+        else: _stage_cache.move_to_end(key)
+    with entry["lock"]:
+        if not entry["done"]:
+            entry["value"] = compute()
+            entry["done"] = True
+    return entry["value"]
+
+def load_image(image_path):
+    # Decoded RGBA image shared between stages and jobs; callers must not modify it in place
+    def decode():
+        img = Image.open(image_path).convert("RGBA")
+        img.load()
+        return img
+    return _cached_stage(("image", _file_key(image_path)), decode)
 
 def get_predominant_color(image_path):
     print(f"Reading image for predominant color: {image_path}")
@@ -12,7 +56,7 @@ def get_predominant_color(image_path):
         print(f"Error: Image file not found at {image_path}. Using default black.")
         return (0,0,0)
     try:
-        img = Image.open(image_path).convert("RGBA")
+        img = load_image(image_path)
     except Exception as e:
         print(f"Error opening image {image_path}: {e}. Using default black.")
         return (0,0,0)
@@ -76,178 +120,651 @@ def get_waveform_contrast_color(bg_r, bg_g, bg_b):
     print(f"Using fallback black/white for waveform: {fallback_color}")
     return fallback_color
 
-def analyze_audio(audio_path, start_time, end_time, num_video_frames, video_fps, waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db):
-    print(f"Analyzing audio ({waveform_analysis_mode} mode): {audio_path} from {start_time}s to {end_time}s for {num_video_frames} frames at {video_fps} FPS")
+# On-disk cache for analysis results (amplitude matrices, rhythm), keyed by the audio's content hash so it
+# survives restarts and renamed uploads. Oldest-accessed files are removed once it exceeds its budget.
+ANALYSIS_CACHE_DIR = os.environ.get("ANALYSIS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "music_shorts_analysis"))
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+def _audio_digest(audio_path):
+    def digest():
+        sha = hashlib.sha256()
+        with open(audio_path, "rb") as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""): sha.update(block)
+        return sha.hexdigest()
+    return _cached_stage(("audio_digest", _file_key(audio_path)), digest)
+
+def _disk_cache_path(kind, audio_path, *params):
+    key = hashlib.sha256(repr((_audio_digest(audio_path),) + params).encode()).hexdigest()
+    return os.path.join(ANALYSIS_CACHE_DIR, f"{kind}_{key}.npz")
+
+def _load_disk_cache(path):
+    try:
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+        os.utime(path)
+        return arrays
+    except Exception:
+        return None  # Missing, or written by an incompatible version: recompute
+
+def _save_disk_cache(path, **arrays):
+    try:
+        os.makedirs(ANALYSIS_CACHE_DIR, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, path)  # Readers never see a partial file
+        _prune_disk_cache()
+    except OSError as e:
+        print(f"Could not write analysis cache {path}: {e}")
+
+def _prune_disk_cache():
+    entries = []
+    for name in os.listdir(ANALYSIS_CACHE_DIR):
+        if name.endswith(".tmp.npz"): continue
+        stat = os.stat(os.path.join(ANALYSIS_CACHE_DIR, name))
+        entries.append((stat.st_atime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= ANALYSIS_CACHE_MAX_BYTES: break
+        try: os.remove(os.path.join(ANALYSIS_CACHE_DIR, name)); total -= size
+        except OSError: pass
+
+class SegmentSignal:
+    # Decoded samples and STFT power of one audio segment, computed on first use and shared by every
+    # analysis stage of a render, so amplitudes and rhythm cost one decode and one STFT between them
+    N_FFT = 2048
+
+    def __init__(self, audio_path, start_time, end_time, video_fps):
+        self.audio_path, self.start_time, self.end_time, self.video_fps = audio_path, start_time, end_time, video_fps
+        self._lock = threading.RLock()
+        self._samples = None
+        self._stft_power = None
+
+    def samples(self):
+        with self._lock:
+            if self._samples is None:
+                with render_profiler.stage("analysis.decode"):
+                    self._samples = load_audio_segment(self.audio_path, self.start_time, self.end_time - self.start_time)
+            return self._samples
+
+    def stft_power(self):
+        # (|STFT|^2, hop length) with one STFT frame per video frame, as librosa.feature.melspectrogram computes it
+        with self._lock:
+            if self._stft_power is None:
+                import librosa
+                y, sr = self.samples()
+                hop_length = _hop_length_for_fps(sr, self.video_fps)
+                with render_profiler.stage("analysis.stft"):
+                    self._stft_power = (np.abs(librosa.stft(y, n_fft=self.N_FFT, hop_length=hop_length)) ** 2, hop_length)
+            return self._stft_power
+
+def _analysis_cache_key(audio_path, start_time, end_time, num_video_frames, video_fps, waveform_analysis_mode,
+                        waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db):
+    return ("analysis", _file_key(audio_path), start_time, end_time, num_video_frames, video_fps,
+            waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db)
+
+def analyze_audio(audio_path, start_time, end_time, num_video_frames, video_fps, waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db, signal=None, use_disk_cache=True):
+    # Results are shared between jobs that analyze the same file with the same parameters (in memory, then on disk).
+    # signal: a SegmentSignal for this segment whose decode/STFT other stages may reuse.
+    # use_disk_cache=False neither reads nor writes ANALYSIS_CACHE_DIR, so the analysis really runs (warm-up, benchmarks).
+    if not os.path.exists(audio_path):
+        return _analyze_audio_uncached(audio_path, start_time, end_time, num_video_frames, video_fps, waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db)
+    key = _analysis_cache_key(audio_path, start_time, end_time, num_video_frames, video_fps, waveform_analysis_mode,
+                              waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db)
+    def compute():
+        disk_path = _disk_cache_path("amplitudes", audio_path, *key[2:]) if use_disk_cache else None
+        cached = _load_disk_cache(disk_path) if disk_path else None
+        if cached is not None:
+            audio_data = cached["amplitudes"]
+        else:
+            audio_data = _compute_amplitudes(signal or SegmentSignal(audio_path, start_time, end_time, video_fps), num_video_frames,
+                                             waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db)
+            if disk_path: _save_disk_cache(disk_path, amplitudes=audio_data)
+        audio_data.flags.writeable = False  # Shared across jobs
+        return audio_data
+    try:
+        return _cached_stage(key, compute)
+    except Exception as e:
+        # Failures are neither memoized nor written to disk, so a later render retries
+        print(f"Error analyzing audio: {e}")
+        return _zero_amplitudes(num_video_frames, waveform_bar_count)
+
+def _zero_amplitudes(num_video_frames, waveform_bar_count):
+    return np.zeros((num_video_frames, waveform_bar_count))
+
+def _analyze_audio_uncached(audio_path, start_time, end_time, num_video_frames, video_fps, waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db):
     if not os.path.exists(audio_path):
         print("Audio file not found.")
-        return np.zeros((num_video_frames, waveform_bar_count)) if waveform_analysis_mode == "melspectrogram" else np.zeros(num_video_frames)
+        return _zero_amplitudes(num_video_frames, waveform_bar_count)
     try:
-        y, sr = librosa.load(audio_path, sr=None, offset=start_time, duration=(end_time-start_time))
-        if len(y) == 0:
-            print("Warning: Loaded audio is empty.")
-            return np.zeros((num_video_frames, waveform_bar_count)) if waveform_analysis_mode == "melspectrogram" else np.zeros(num_video_frames)
-        hop_length = int(sr / video_fps)
-        if hop_length == 0: hop_length = int(sr / 24) if video_fps == 0 else 512 # fallback based on 24fps or fixed
-        if waveform_analysis_mode == "melspectrogram":
-            n_fft = 2048 
-            mel_spec = librosa.feature.melspectrogram(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length, n_mels=waveform_bar_count)
-            mel_spec_db = librosa.power_to_db(mel_spec, ref=np.max)
-            mel_spec_normalized = (mel_spec_db - waveform_min_db) / (waveform_max_db - waveform_min_db)
-            mel_spec_normalized = np.clip(mel_spec_normalized, 0, 1)
-            processed_audio_data = mel_spec_normalized.T 
-            if waveform_smoothing_factor > 0 and processed_audio_data.shape[0] > 1:
-                for i in range(processed_audio_data.shape[1]):
-                    band_data = processed_audio_data[:, i]
-                    smoothed_band = [band_data[0]]
-                    for j in range(1, len(band_data)):
-                        smoothed_band.append(smoothed_band[-1] * waveform_smoothing_factor + band_data[j] * (1 - waveform_smoothing_factor))
-                    processed_audio_data[:, i] = np.array(smoothed_band)
-        elif waveform_analysis_mode == "rms":
-            frame_length = hop_length * 2 
-            if frame_length == 0 : frame_length = 1024 
-            rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
-            rms_max = np.max(rms)
-            rms_normalized = rms / rms_max if rms_max > 0 else np.zeros_like(rms)
-            if waveform_smoothing_factor > 0 and len(rms_normalized) > 1:
-                rms_smoothed = [rms_normalized[0]]
-                for i in range(1, len(rms_normalized)):
-                    rms_smoothed.append(rms_smoothed[-1] * waveform_smoothing_factor + rms_normalized[i] * (1 - waveform_smoothing_factor))
-                rms_normalized = np.array(rms_smoothed)
-            processed_audio_data = np.tile(rms_normalized[:, np.newaxis], (1, waveform_bar_count))
+        return _compute_amplitudes(SegmentSignal(audio_path, start_time, end_time, video_fps), num_video_frames, waveform_analysis_mode,
+                                   waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db)
+    except Exception as e:
+        print(f"Error analyzing audio: {e}")
+        return _zero_amplitudes(num_video_frames, waveform_bar_count)
+
+def _compute_amplitudes(signal, num_video_frames, waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db):
+    print(f"Analyzing audio ({waveform_analysis_mode} mode): {signal.audio_path} from {signal.start_time}s to {signal.end_time}s for {num_video_frames} frames at {signal.video_fps} FPS")
+    y, sr = signal.samples()
+    if len(y) == 0:
+        print("Warning: Loaded audio is empty.")
+        return _zero_amplitudes(num_video_frames, waveform_bar_count)
+    if waveform_analysis_mode not in ("melspectrogram", "rms"):
+        print(f"Unknown waveform_analysis_mode: {waveform_analysis_mode}. Using zeros.")
+        return _zero_amplitudes(num_video_frames, waveform_bar_count)
+    with render_profiler.stage("analysis.features"):
+        stft_power = signal.stft_power()[0] if waveform_analysis_mode == "melspectrogram" else None
+        raw_features, _ = compute_band_features(y, sr, signal.video_fps, waveform_analysis_mode, waveform_bar_count, stft_power)
+    with render_profiler.stage("analysis.normalize"):
+        final_audio_data = normalize_band_features(raw_features, waveform_analysis_mode, num_video_frames, waveform_bar_count,
+                                                   waveform_smoothing_factor, waveform_min_db, waveform_max_db)
+    print(f"Audio analysis complete. Output shape: {final_audio_data.shape}")
+    return final_audio_data
+
+def get_audio_duration(audio_path):
+    # Header probe first (WAV/MP3/FLAC, no decode); librosa for anything it can't parse
+    info = media_probe.probe_audio(audio_path)
+    if info:
+        return info["duration"]
+    import librosa
+    return librosa.get_duration(path=audio_path)
+
+# PCM layouts sliced straight from the WAV data chunk: (format tag, bits per sample) -> dtype, scale
+_WAV_FAST_PATH_LAYOUTS = {(1, 16): ("<i2", 1.0 / 32768.0), (3, 32): ("<f4", None)}
+
+def load_audio_segment(audio_path, offset, duration):
+    # Mono float32 samples of [offset, offset + duration) at the native sample rate, like
+    # librosa.load(sr=None, offset=..., duration=...). 16-bit and float WAVs use the header probe's sample rate,
+    # channel count and data offset to read just the segment with numpy; other files go through librosa.
+    info = media_probe.probe_audio(audio_path)
+    layout = _WAV_FAST_PATH_LAYOUTS.get((info["format_tag"], info["bits_per_sample"])) if info and info["format"] == "wav" else None
+    if layout is None or info["block_align"] != info["channels"] * info["bits_per_sample"] // 8:
+        import librosa
+        return librosa.load(audio_path, sr=None, offset=offset, duration=duration)
+    dtype, scale = layout
+    sr, channels, block_align = info["sample_rate"], info["channels"], info["block_align"]
+    total_frames = info["data_size"] // block_align
+    first_frame = min(max(0, int(offset * sr)), total_frames)
+    frame_count = min(int(duration * sr), total_frames - first_frame)
+    if frame_count <= 0:
+        return np.zeros(0, dtype=np.float32), sr
+    samples = np.memmap(audio_path, dtype=dtype, mode="r", offset=info["data_offset"] + first_frame * block_align,
+                        shape=(frame_count, channels))
+    y = samples.astype(np.float32)
+    if scale is not None: y *= scale
+    return (y.mean(axis=1) if channels > 1 else y[:, 0]), sr
+
+def _hop_length_for_fps(sr, video_fps):
+    hop_length = int(sr / video_fps) if video_fps > 0 else 0
+    if hop_length == 0: hop_length = int(sr / 24) if video_fps == 0 else 512 # fallback based on 24fps or fixed
+    return hop_length
+
+def compute_band_features(y, sr, video_fps, waveform_analysis_mode, waveform_bar_count, stft_power=None):
+    # Un-normalized per-frame features: mel power (frames x bars) or RMS (frames,). Segment-independent, so a
+    # full-track result can be sliced for any segment before normalize_band_features. Returns (features, hop_length).
+    # stft_power: a precomputed SegmentSignal.stft_power() of y, so the mel bands skip their own STFT.
+    import librosa
+    hop_length = _hop_length_for_fps(sr, video_fps)
+    if waveform_analysis_mode == "melspectrogram":
+        n_fft = SegmentSignal.N_FFT
+        if stft_power is not None:
+            mel_spec = librosa.feature.melspectrogram(S=stft_power, sr=sr, n_fft=n_fft, n_mels=waveform_bar_count)
         else:
-            print(f"Unknown waveform_analysis_mode: {waveform_analysis_mode}. Using zeros.")
-            return np.zeros((num_video_frames, waveform_bar_count))
-        if processed_audio_data.shape[0] < num_video_frames:
-            padding_shape = (num_video_frames - processed_audio_data.shape[0], processed_audio_data.shape[1])
-            padding = np.zeros(padding_shape)
-            final_audio_data = np.concatenate((processed_audio_data, padding), axis=0)
+            mel_spec = librosa.feature.melspectrogram(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length, n_mels=waveform_bar_count)
+        return mel_spec.T, hop_length
+    frame_length = hop_length * 2 
+    if frame_length == 0 : frame_length = 1024 
+    return librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0], hop_length
+
+def normalize_band_features(raw_features, waveform_analysis_mode, num_video_frames, waveform_bar_count,
+                            waveform_smoothing_factor, waveform_min_db, waveform_max_db):
+    # Segment-relative normalization, smoothing and padding/trimming to the video's frame count
+    import librosa
+    if waveform_analysis_mode == "melspectrogram":
+        mel_spec_db = librosa.power_to_db(raw_features, ref=np.max)
+        mel_spec_normalized = (mel_spec_db - waveform_min_db) / (waveform_max_db - waveform_min_db)
+        processed_audio_data = np.clip(mel_spec_normalized, 0, 1)
+        if waveform_smoothing_factor > 0 and processed_audio_data.shape[0] > 1:
+            for i in range(processed_audio_data.shape[1]):
+                band_data = processed_audio_data[:, i]
+                smoothed_band = [band_data[0]]
+                for j in range(1, len(band_data)):
+                    smoothed_band.append(smoothed_band[-1] * waveform_smoothing_factor + band_data[j] * (1 - waveform_smoothing_factor))
+                processed_audio_data[:, i] = np.array(smoothed_band)
+    else:
+        rms = raw_features
+        rms_max = np.max(rms) if len(rms) > 0 else 0
+        rms_normalized = rms / rms_max if rms_max > 0 else np.zeros_like(rms)
+        if waveform_smoothing_factor > 0 and len(rms_normalized) > 1:
+            rms_smoothed = [rms_normalized[0]]
+            for i in range(1, len(rms_normalized)):
+                rms_smoothed.append(rms_smoothed[-1] * waveform_smoothing_factor + rms_normalized[i] * (1 - waveform_smoothing_factor))
+            rms_normalized = np.array(rms_smoothed)
+        processed_audio_data = np.tile(rms_normalized[:, np.newaxis], (1, waveform_bar_count))
+    if processed_audio_data.shape[0] < num_video_frames:
+        padding_shape = (num_video_frames - processed_audio_data.shape[0], processed_audio_data.shape[1])
+        padding = np.zeros(padding_shape)
+        return np.concatenate((processed_audio_data, padding), axis=0)
+    return processed_audio_data[:num_video_frames, :]
+
+def analysis_args_for_render(config):
+    # The exact analyze_audio arguments precompute_assets uses for a render_config.RenderConfig
+    return dict(audio_path=config.audio_path, start_time=config.audio_start_time, end_time=config.audio_end_time,
+                num_video_frames=config.num_video_frames, video_fps=config.video_fps,
+                waveform_analysis_mode=config.waveform_analysis_mode, waveform_bar_count=config.waveform_bar_count,
+                waveform_smoothing_factor=config.waveform_smoothing_factor, waveform_min_db=config.waveform_min_db,
+                waveform_max_db=config.waveform_max_db)
+
+def analyze_audio_shared(requests):
+    # Analyzes several segments/parameter sets of ONE audio file with a single decode of the union of the
+    # segments and one feature pass per (fps, mode, bar count). Each request is a dict of analyze_audio
+    # arguments; results are returned in order and primed into the analyze_audio cache.
+    if not requests: return []
+    audio_path = requests[0]["audio_path"]
+    if any(request["audio_path"] != audio_path for request in requests):
+        raise ValueError("analyze_audio_shared requires every request to use the same audio file")
+    if not os.path.exists(audio_path) or any(r["waveform_analysis_mode"] not in ("melspectrogram", "rms") for r in requests):
+        return [analyze_audio(**request) for request in requests]
+    union_start = min(request["start_time"] for request in requests)
+    union_end = max(request["end_time"] for request in requests)
+    print(f"Decoding {audio_path} once from {union_start}s to {union_end}s for {len(requests)} analyses")
+    y, sr = load_audio_segment(audio_path, union_start, union_end - union_start)
+    feature_cache = {}
+    results = []
+    for request in requests:
+        feature_key = (request["video_fps"], request["waveform_analysis_mode"], request["waveform_bar_count"])
+        if feature_key not in feature_cache:
+            feature_cache[feature_key] = compute_band_features(y, sr, *feature_key)
+        raw_features, hop_length = feature_cache[feature_key]
+        # Slice the segment's frames out of the union; a standalone analysis would yield len // hop + 1 frames
+        first_frame = int(round((request["start_time"] - union_start) * sr / hop_length))
+        segment_samples = int((request["end_time"] - request["start_time"]) * sr)
+        segment_features = raw_features[first_frame:first_frame + segment_samples // hop_length + 1]
+        audio_data = normalize_band_features(segment_features, request["waveform_analysis_mode"], request["num_video_frames"],
+                                             request["waveform_bar_count"], request["waveform_smoothing_factor"],
+                                             request["waveform_min_db"], request["waveform_max_db"])
+        audio_data.flags.writeable = False
+        key = _analysis_cache_key(**request)
+        _cached_stage(key, lambda: audio_data)
+        _save_disk_cache(_disk_cache_path("amplitudes", audio_path, *key[2:]), amplitudes=audio_data)
+        results.append(audio_data)
+    return results
+
+# Rhythm features for beat-driven effects. They depend only on the audio segment and fps (not on the waveform
+# settings), so one rhythm analysis per (audio content, segment, fps) serves every look rendered from it.
+RHYTHM_N_MELS = 128
+
+def analyze_rhythm(audio_path, start_time, end_time, num_video_frames, video_fps, signal=None, use_disk_cache=True):
+    # Per-frame onset strength (float32, 0-1), a per-frame beat mask (uint8) and the tempo in BPM, or None if the
+    # audio can't be analyzed. Cached like analyze_audio; signal: a SegmentSignal shared with the amplitude analysis.
+    if not os.path.exists(audio_path):
+        return None
+    key = ("rhythm", _file_key(audio_path), start_time, end_time, num_video_frames, video_fps)
+    def compute():
+        disk_path = _disk_cache_path("rhythm", audio_path, *key[2:]) if use_disk_cache else None
+        cached = _load_disk_cache(disk_path) if disk_path else None
+        if cached is not None:
+            rhythm = {"onset_strength": cached["onset_strength"], "beats": cached["beats"], "tempo": float(cached["tempo"])}
         else:
-            final_audio_data = processed_audio_data[:num_video_frames, :]
-        print(f"Audio analysis complete. Output shape: {final_audio_data.shape}")
-        return final_audio_data
+            rhythm = _compute_rhythm(signal or SegmentSignal(audio_path, start_time, end_time, video_fps), num_video_frames)
+            if disk_path: _save_disk_cache(disk_path, **rhythm)
+        rhythm["onset_strength"].flags.writeable = False; rhythm["beats"].flags.writeable = False
+        return rhythm
+    try:
+        return _cached_stage(key, compute)
     except Exception as e:
-        print(f"Error analyzing audio: {e}")
-        return np.zeros((num_video_frames, waveform_bar_count)) if waveform_analysis_mode == "melspectrogram" else np.zeros(num_video_frames)
-
-def draw_waveform_bars(audio_frame_amplitudes, canvas_width, canvas_height, bar_color_tuple, waveform_bar_count, waveform_bar_spacing_ratio):
-    num_bars = waveform_bar_count
-    if num_bars <= 0 or len(audio_frame_amplitudes) != num_bars: return None
-    bars_canvas = Image.new("RGBA", (canvas_width, canvas_height), (0,0,0,0))
-    draw_on_bars = ImageDraw.Draw(bars_canvas)
-    total_slot_width = canvas_width / num_bars
-    bar_width = int(total_slot_width / (1 + waveform_bar_spacing_ratio))
-    bar_spacing = int(bar_width * waveform_bar_spacing_ratio)
-    if bar_width < 1: bar_width = 1
-    if bar_spacing < 0: bar_spacing = 0
-    actual_waveform_width = num_bars * bar_width + max(0, num_bars - 1) * bar_spacing
-    current_x = (canvas_width - actual_waveform_width) // 2
-    for i in range(num_bars):
-        rms_value_for_bar = audio_frame_amplitudes[i]
-        bar_height = int(canvas_height * rms_value_for_bar)
-        if bar_height < 1: bar_height = 0
-        x0 = current_x; y0 = canvas_height - bar_height
-        x1 = x0 + bar_width; y1 = canvas_height
-        if bar_height > 0: draw_on_bars.rectangle([x0, y0, x1, y1], fill=bar_color_tuple)
-        current_x += (bar_width + bar_spacing)
-    return bars_canvas
+        print(f"Error analyzing rhythm: {e}")  # Not memoized, so a later render retries
+        return None
+
+def _compute_rhythm(signal, num_video_frames):
+    onset_strength = np.zeros(num_video_frames, dtype=np.float32)
+    beats = np.zeros(num_video_frames, dtype=np.uint8)
+    y, sr = signal.samples()
+    if len(y) == 0:
+        print("Warning: Loaded audio is empty.")
+        return {"onset_strength": onset_strength, "beats": beats, "tempo": 0.0}
+    import librosa
+    stft_power, hop_length = signal.stft_power()
+    with render_profiler.stage("analysis.rhythm"):
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=stft_power, sr=sr, n_mels=RHYTHM_N_MELS))
+        onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr, hop_length=hop_length)
+        tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
+    # One onset-envelope frame per video frame (same hop as the amplitudes); pad or trim like normalize_band_features
+    frames = min(num_video_frames, len(onset_env))
+    onset_strength[:frames] = onset_env[:frames]
+    peak = onset_strength.max()
+    if peak > 0: onset_strength /= peak
+    beat_frames = beat_frames[beat_frames < num_video_frames]
+    beats[beat_frames] = 1
+    tempo = float(np.atleast_1d(tempo)[0])
+    print(f"Rhythm analysis complete: {tempo:.1f} BPM, {len(beat_frames)} beats")
+    return {"onset_strength": onset_strength, "beats": beats, "tempo": tempo}
+
+# The radial style's shadow is blurred at 1/n resolution (n up to this, so the downscaled radius stays >= 4 px)
+# and scaled back up: a wide blur is smooth enough to survive it, and it keeps the large radial canvas cheap.
+# The band styles keep the full-resolution blur, so the default bars look exactly as they always have.
+WAVEFORM_SHADOW_MAX_DOWNSCALE = 4
+WAVEFORM_SHADOW_ALPHA = 180
+
+def waveform_shadow_mask(canvas, blur_radius, reduced=False):
+    # Paste mask for the waveform's black shadow: its alpha darkened and blurred (single channel, not RGBA)
+    shadow_alpha = canvas.getchannel("A").point(lambda a: a * WAVEFORM_SHADOW_ALPHA // 255)
+    downscale = max(1, min(WAVEFORM_SHADOW_MAX_DOWNSCALE, int(blur_radius // 4), canvas.width // 8, canvas.height // 8)) if reduced else 1
+    if downscale == 1: return shadow_alpha.filter(ImageFilter.GaussianBlur(blur_radius))
+    small = shadow_alpha.reduce(downscale).filter(ImageFilter.GaussianBlur(blur_radius / downscale))
+    return small.resize(canvas.size, Image.Resampling.BILINEAR)
+
+# Ken Burns: an eased zoom from the whole oversized background into a window of exactly the video size,
+# drifting toward this point (fractions of the spare width/height), over the length of the clip
+KEN_BURNS_FOCUS = (0.7, 0.3)
+
+def ken_burns_boxes(num_frames, video_width, video_height, source_width, source_height):
+    # Float (left, top, width, height) crop windows into the source, one row per frame
+    progress = np.linspace(0.0, 1.0, max(1, num_frames))
+    eased = progress * progress * (3 - 2 * progress)
+    widths = source_width + (video_width - source_width) * eased
+    heights = source_height + (video_height - source_height) * eased
+    lefts = (source_width - widths) * KEN_BURNS_FOCUS[0]
+    tops = (source_height - heights) * KEN_BURNS_FOCUS[1]
+    return np.stack([lefts, tops, widths, heights], axis=1)
+
+# Ken Burns windows are quantized to zoom steps of this many pixels of window width. Each step scales the part of
+# the blurred source its frames' windows cover (once, when its first frame is rendered) so the windows come out
+# exactly video-sized; a frame is then an integer crop of that region. Nearest-neighbour is enough on a heavily
+# blurred source and is ~10x cheaper than bilinear, which would cost more per step than all its frames' crops
+KEN_BURNS_STEP_PIXELS = 2
+KEN_BURNS_CACHED_STEPS = 2  # Frames are rendered in order, so only the current (and previous) step stay in memory
+
+class KenBurnsBackground:
+    """Per-frame background windows of a Ken Burns move, precomputed as (zoom step, integer offset) pairs.
+    frame() is an integer crop of the step's scaled region, so the per-frame work is one copy of a video-sized
+    image, the same as a static background (a PIL crop is also ~2x cheaper than Image.fromarray on a NumPy view)"""
+    def __init__(self, source, boxes, video_width, video_height):
+        self.source = source
+        self.video_width, self.video_height = video_width, video_height
+        spare = source.width - video_width
+        steps = max(1, math.ceil(spare / KEN_BURNS_STEP_PIXELS))
+        # Step 0 is a video-sized window (no scaling); the last step is the whole source
+        self.frame_steps = np.rint((boxes[:, 2] - video_width) / max(1, spare) * steps).astype(np.intp)
+        self.frame_offsets = np.zeros((len(boxes), 2), dtype=np.intp)
+        self.step_regions = {}  # step -> (source box, scaled size)
+        for step in np.unique(self.frame_steps):
+            frames = self.frame_steps == step
+            scale = video_width / (video_width + spare * step / steps)
+            lefts, tops = boxes[frames, 0], boxes[frames, 1]
+            box = (max(0, math.floor(lefts.min())), max(0, math.floor(tops.min())),
+                   min(source.width, math.ceil(lefts.max() + video_width / scale)), min(source.height, math.ceil(tops.max() + video_height / scale)))
+            size = (max(video_width, round((box[2] - box[0]) * scale)), max(video_height, round((box[3] - box[1]) * scale)))
+            self.step_regions[int(step)] = (box, size)
+            offsets = np.rint(np.stack([lefts - box[0], tops - box[1]], axis=1) * scale).astype(np.intp)
+            self.frame_offsets[frames] = np.clip(offsets, 0, (size[0] - video_width, size[1] - video_height))
+        self._step_images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _step_image(self, step):
+        with self._lock:
+            region = self._step_images.get(step)
+            if region is None:
+                box, size = self.step_regions[step]
+                if size == (box[2] - box[0], box[3] - box[1]): region = self.source.crop(box)
+                else: region = self.source.resize(size, Image.Resampling.NEAREST, box=box)
+                self._step_images[step] = region
+                while len(self._step_images) > KEN_BURNS_CACHED_STEPS: self._step_images.popitem(last=False)
+            else: self._step_images.move_to_end(step)
+            return region
+
+    def frame(self, frame_idx):
+        frame_idx = min(frame_idx, len(self.frame_steps) - 1)
+        left, top = self.frame_offsets[frame_idx]
+        return self._step_image(int(self.frame_steps[frame_idx])).crop((left, top, left + self.video_width, top + self.video_height))
+
+def build_center_image(img_orig, width, height, corner_radius, shadow_color_rgba, shadow_blur_radius):
+    # The rounded center image at one size, its blurred shadow and the shadow's (rounded) paste mask
+    center_img = add_rounded_corners(img_orig.resize((width, height), Image.Resampling.LANCZOS), corner_radius)
+    shadow = shadow_mask = None
+    # Create rounded shadow based on the processed image's alpha
+    if 'A' in center_img.getbands():
+        alpha_mask = center_img.split()[3]
+        shadow_silhouette = Image.new("RGBA", center_img.size, (0,0,0,0))
+        solid_shadow_img = Image.new("RGBA", center_img.size, shadow_color_rgba)
+        shadow_silhouette.paste(solid_shadow_img, mask=alpha_mask)
+        shadow = shadow_silhouette.filter(ImageFilter.GaussianBlur(shadow_blur_radius))
+        shadow_mask = add_rounded_corners(shadow, corner_radius).split()[3]
+    return center_img, shadow, shadow_mask
+
+# Center-image pulse: the pulse curve is quantized to this many pre-scaled variants, from 1x to 1 + pulse scale.
+# Frames only paste a variant; each one costs roughly three image-sized buffers, so only steps in use are built.
+PULSE_SCALE_STEPS = 32
+PULSE_DECAY_SECONDS = 0.15
+
+def loudness_onsets(audio_amplitudes):
+    # 0-1 per frame: rises in overall loudness; the pulse trigger when no rhythm analysis is available
+    loudness = audio_amplitudes.mean(axis=1)
+    rise = np.maximum(0.0, np.diff(loudness, prepend=loudness[:1]))
+    peak = np.percentile(rise, 98) if rise.size else 0
+    if peak <= 0: return np.zeros(len(loudness))
+    return np.clip(rise / peak, 0, 1)
+
+def beat_impulses(beats, onset_strength):
+    # 0-1 per frame: a kick on every beat, harder on strongly accented ones
+    return np.where(beats > 0, np.maximum(0.5, onset_strength), 0.0)
+
+def pulse_curve(impulses, video_fps):
+    # 0-1 per frame: jumps to each impulse and decays exponentially between them
+    decay = math.exp(-1.0 / (PULSE_DECAY_SECONDS * video_fps))
+    curve = np.empty(len(impulses)); level = 0.0
+    for i, impulse in enumerate(impulses):
+        level = max(impulse, level * decay); curve[i] = level
+    return curve
+
+def build_pulse_variants(img_orig, assets, steps, pulse_scale, corner_radius, shadow_color_rgba, shadow_blur_radius):
+    variants = [None] * PULSE_SCALE_STEPS
+    for step in steps:
+        scale = 1 + pulse_scale * step / (PULSE_SCALE_STEPS - 1)
+        width, height = round(assets.img_final_width * scale), round(assets.img_final_height * scale)
+        if step == 0:
+            center_img, shadow, shadow_mask = assets.center_img_processed, assets.center_img_shadow, assets.center_img_shadow_mask
+        else:
+            center_img, shadow, shadow_mask = build_center_image(img_orig, width, height, round(corner_radius * scale),
+                                                                 shadow_color_rgba, shadow_blur_radius)
+        variants[step] = (center_img, shadow, shadow_mask, (width - assets.img_final_width) // 2, (height - assets.img_final_height) // 2)
+    return variants
+
+def build_lyrics(config, assets):
+    # Lyrics go just below everything else (the image, or the waveform under it / around it), or just above it all
+    if not os.path.exists(config.lyrics_path):
+        print(f"Lyrics file {config.lyrics_path} not found."); return None
+    try:
+        lines = lyrics_overlay.load_lyrics(config.lyrics_path)
+    except (OSError, ValueError) as e:
+        print(f"Error reading lyrics: {e}"); return None
+    margin = int(config.video_height * lyrics_overlay.LYRICS_MARGIN_FRACTION)
+    content_top, content_bottom = assets.img_actual_pos_y, assets.img_actual_pos_y + assets.img_final_height
+    if config.waveform_enabled and assets.waveform_area_height > 0:
+        content_top = min(content_top, assets.waveform_area_top_y)
+        content_bottom = max(content_bottom, assets.waveform_area_top_y + assets.waveform_area_height)
+    above = config.lyrics_position == "above"
+    track = lyrics_overlay.build_lyrics_track(
+        lines, config.audio_start_time, config.num_video_frames, config.video_fps, config.lyrics_fade_seconds,
+        config.lyrics_font, config.lyrics_font_size, config.lyrics_color, config.video_width, config.video_height,
+        center_x=assets.img_actual_pos_x + assets.img_final_width // 2,
+        anchor_y=content_top - margin if above else content_bottom + margin, above=above)
+    if track is not None:
+        print(f"Pre-rendered {len(track.sprites)} distinct lyric lines from {len(lines)} timed lines")
+    return track
 
 # Asset storage class to replace global variables
 class VideoAssets:
     def __init__(self):
         self.bg_color_solid = (0,0,0)
-        self.blurred_bg_image = None
+        self.blurred_bg_image = None  # Oversized by background_motion_zoom when the background moves
+        self.bg_motion = None  # KenBurnsBackground producing each frame's window of blurred_bg_image
         self.center_img_processed = None
         self.center_img_shadow = None  # For rounded shadow
+        self.center_img_shadow_mask = None  # Paste mask for the shadow (rounded like the image), built once
+        self.pulse_steps = None  # Per-frame index into pulse_variants (uint8) when the image pulses
+        self.pulse_variants = None  # Per scale step: (image, shadow, shadow mask, grow x, grow y), None if unused
         self.img_final_width, self.img_final_height = 0, 0
         self.img_actual_pos_x, self.img_actual_pos_y = 0, 0
         self.waveform_area_start_x, self.waveform_area_top_y = 0, 0
         self.waveform_area_width, self.waveform_max_bar_h = 0, 0
+        self.waveform_area_height = 0  # Band height, or the whole ring around the cover for the radial style
+        self.waveform_geometry = None  # waveform_styles geometry for the configured style
+        self.lyrics = None  # lyrics_overlay.LyricsTrack when a lyrics file is set
         self.audio_amplitudes = None
+        self.onset_strength = None  # Per-frame onset strength, 0-1 (float32), when a beat-driven effect is enabled
+        self.beats = None  # Per-frame beat mask (uint8, 1 on beat frames)
+        self.tempo = None  # Estimated tempo in BPM
+        self.profiler = None  # RenderProfiler active while precomputing; None keeps the frame path uninstrumented
 
-def precompute_assets(image_path, video_width, video_height, background_mode, background_image_fit, background_blur_radius,
-                   image_width_percentage, image_corner_radius, image_x_position, image_y_position,
-                   shadow_darkness_factor, shadow_blur_radius, waveform_enabled, waveform_height_percentage,
-                   spacing_image_waveform, audio_path, audio_start_time, audio_end_time, video_fps,
-                   waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, waveform_min_db, waveform_max_db):
+def _reuse(shared, key, compute):
+    # Memoize compute() in the caller's `shared` dict (e.g. across the cells of a parameter sweep); None = no reuse
+    if shared is None: return compute()
+    if key not in shared: shared[key] = compute()
+    return shared[key]
+
+def precompute_assets(config, shared=None):
+    # Everything per-frame compositing reuses, built from a render_config.RenderConfig.
+    # shared: a dict kept across calls for related configs; stages whose inputs didn't change (background blur,
+    # center image, the decoded segment and its STFT) are reused from it instead of recomputed.
+    image_path, video_width, video_height = config.image_path, config.video_width, config.video_height
+    background_mode, background_image_fit, background_blur_radius = config.background_mode, config.background_image_fit, config.background_blur_radius
+    image_corner_radius, shadow_darkness_factor, shadow_blur_radius = config.image_corner_radius, config.shadow_darkness_factor, config.shadow_blur_radius
+    waveform_enabled, spacing_image_waveform = config.waveform_enabled, config.spacing_image_waveform
     assets = VideoAssets()
+    assets.profiler = render_profiler.active()
     print("\n--- Pre-computing assets ---")
-    assets.bg_color_solid = get_predominant_color(image_path)
+    with render_profiler.stage("precompute.predominant_color"):
+        assets.bg_color_solid = get_predominant_color(image_path)
+    def blurred_background():
+        img_to_blur = load_image(image_path).convert("RGB")
+        # A moving background is blurred once, oversized by the zoom factor, and only cropped per frame
+        moving = config.background_motion != "none"
+        zoom = config.background_motion_zoom if moving else 1.0
+        target_w, target_h = math.ceil(video_width * zoom), math.ceil(video_height * zoom); img_w, img_h = img_to_blur.size
+        if background_image_fit == "stretch": blurred_bg_image = img_to_blur.resize((target_w, target_h), Image.Resampling.LANCZOS)
+        elif background_image_fit == "fill" or background_image_fit == "crop":
+            img_aspect = img_w / img_h; target_aspect = target_w / target_h
+            if img_aspect > target_aspect: new_h = target_h; new_w = int(new_h * img_aspect)
+            else: new_w = target_w; new_h = int(new_w / img_aspect)
+            resized_img = img_to_blur.resize((new_w, new_h), Image.Resampling.LANCZOS)
+            crop_x = (new_w - target_w) / 2; crop_y = (new_h - target_h) / 2
+            blurred_bg_image = resized_img.crop((crop_x, crop_y, crop_x + target_w, crop_y + target_h))
+        else: blurred_bg_image = img_to_blur.resize((target_w, target_h), Image.Resampling.LANCZOS)
+        blurred_bg_image = blurred_bg_image.filter(ImageFilter.GaussianBlur(background_blur_radius * zoom))
+        bg_motion = None
+        if moving:
+            bg_motion = KenBurnsBackground(blurred_bg_image, ken_burns_boxes(config.num_video_frames, video_width, video_height, target_w, target_h),
+                                           video_width, video_height)
+        print(f"Pre-computed blurred background: Fit='{background_image_fit}', Radius={background_blur_radius}, Motion='{config.background_motion}'")
+        return blurred_bg_image, bg_motion
     if background_mode == "blur_image" and os.path.exists(image_path):
         try:
-            img_to_blur = Image.open(image_path).convert("RGB")
-            target_w, target_h = video_width, video_height; img_w, img_h = img_to_blur.size
-            if background_image_fit == "stretch": assets.blurred_bg_image = img_to_blur.resize((target_w, target_h), Image.Resampling.LANCZOS)
-            elif background_image_fit == "fill" or background_image_fit == "crop":
-                img_aspect = img_w / img_h; target_aspect = target_w / target_h
-                if img_aspect > target_aspect: new_h = target_h; new_w = int(new_h * img_aspect)
-                else: new_w = target_w; new_h = int(new_w / img_aspect)
-                resized_img = img_to_blur.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                crop_x = (new_w - target_w) / 2; crop_y = (new_h - target_h) / 2
-                assets.blurred_bg_image = resized_img.crop((crop_x, crop_y, crop_x + target_w, crop_y + target_h))
-            else: assets.blurred_bg_image = img_to_blur.resize((target_w, target_h), Image.Resampling.LANCZOS)
-            assets.blurred_bg_image = assets.blurred_bg_image.filter(ImageFilter.GaussianBlur(background_blur_radius))
-            print(f"Pre-computed blurred background: Fit='{background_image_fit}', Radius={background_blur_radius}")
+            with render_profiler.stage("precompute.blurred_background"):
+                assets.blurred_bg_image, assets.bg_motion = _reuse(shared, (
+                    "blurred_background", image_path, video_width, video_height, background_image_fit, background_blur_radius,
+                    config.background_motion, config.background_motion_zoom, config.num_video_frames), blurred_background)
         except Exception as e: print(f"Error pre-computing blurred background: {e}"); assets.blurred_bg_image = None
     if os.path.exists(image_path):
         try:
-            img_orig = Image.open(image_path).convert("RGBA")
-            assets.img_final_width = int(video_width * (image_width_percentage / 100.0))
-            assets.img_final_height = int(assets.img_final_width * (img_orig.height / img_orig.width))
-            img_resized = img_orig.resize((assets.img_final_width, assets.img_final_height), Image.Resampling.LANCZOS)
-            assets.center_img_processed = add_rounded_corners(img_resized, image_corner_radius)
-            # Create rounded shadow based on the processed image's alpha
-            img_shadow_color_base = tuple(int(c * (1 - shadow_darkness_factor)) for c in assets.bg_color_solid) if background_mode == "solid" else (0,0,0)
-            shadow_color_rgba = img_shadow_color_base + (255,)
-            if 'A' in assets.center_img_processed.getbands():
-                alpha_mask = assets.center_img_processed.split()[3]
-                shadow_silhouette = Image.new("RGBA", assets.center_img_processed.size, (0,0,0,0))
-                solid_shadow_img = Image.new("RGBA", assets.center_img_processed.size, shadow_color_rgba)
-                shadow_silhouette.paste(solid_shadow_img, mask=alpha_mask)
-                assets.center_img_shadow = shadow_silhouette.filter(ImageFilter.GaussianBlur(shadow_blur_radius))
-            print(f"Pre-processed main image & shadow: Size=({assets.img_final_width}x{assets.img_final_height}), Radius={image_corner_radius}")
-        except Exception as e: print(f"Error pre-processing main image/shadow: {e}"); assets.center_img_processed = None; assets.center_img_shadow = None
+            with render_profiler.stage("precompute.center_image_and_shadow"):
+                img_orig = load_image(image_path)
+                assets.img_final_width = int(video_width * (config.image_width_percentage / 100.0))
+                assets.img_final_height = int(assets.img_final_width * (img_orig.height / img_orig.width))
+                img_shadow_color_base = tuple(int(c * (1 - shadow_darkness_factor)) for c in assets.bg_color_solid) if background_mode == "solid" else (0,0,0)
+                shadow_color_rgba = img_shadow_color_base + (255,)
+                assets.center_img_processed, assets.center_img_shadow, assets.center_img_shadow_mask = _reuse(shared, (
+                    "center_image", image_path, assets.img_final_width, assets.img_final_height, image_corner_radius,
+                    shadow_color_rgba, shadow_blur_radius), lambda: build_center_image(
+                    img_orig, assets.img_final_width, assets.img_final_height, image_corner_radius, shadow_color_rgba, shadow_blur_radius))
+                print(f"Pre-processed main image & shadow: Size=({assets.img_final_width}x{assets.img_final_height}), Radius={image_corner_radius}")
+        except Exception as e: print(f"Error pre-processing main image/shadow: {e}"); assets.center_img_processed = None; assets.center_img_shadow = None; assets.center_img_shadow_mask = None
     else: print(f"Main image {image_path} not found.")
-    assets.img_actual_pos_x = (video_width - assets.img_final_width) // 2 if image_x_position == -1 else image_x_position
-    assets.waveform_max_bar_h = int(video_height * (waveform_height_percentage / 100.0)) if waveform_enabled else 0
-    total_content_height = assets.img_final_height + (spacing_image_waveform + assets.waveform_max_bar_h if waveform_enabled and assets.waveform_max_bar_h > 0 else 0)
-    assets.img_actual_pos_y = (video_height - total_content_height) // 2 if image_y_position == -1 else image_y_position
-    assets.waveform_area_top_y = assets.img_actual_pos_y + assets.img_final_height + spacing_image_waveform
-    assets.waveform_area_width = assets.img_final_width
-    assets.waveform_area_start_x = assets.img_actual_pos_x
+    assets.img_actual_pos_x = (video_width - assets.img_final_width) // 2 if config.image_x_position == -1 else config.image_x_position
+    assets.waveform_max_bar_h = int(video_height * (config.waveform_height_percentage / 100.0)) if waveform_enabled else 0
+    radial = config.waveform_style == "radial"
+    below_image = waveform_enabled and assets.waveform_max_bar_h > 0 and not radial  # A radial waveform surrounds the image instead
+    total_content_height = assets.img_final_height + (spacing_image_waveform + assets.waveform_max_bar_h if below_image else 0)
+    assets.img_actual_pos_y = (video_height - total_content_height) // 2 if config.image_y_position == -1 else config.image_y_position
+    if radial:
+        # The ring around the image, clipped to the frame (spokes past the edge are never seen)
+        inset = spacing_image_waveform + assets.waveform_max_bar_h
+        left, top = max(0, assets.img_actual_pos_x - inset), max(0, assets.img_actual_pos_y - inset)
+        right = min(video_width, assets.img_actual_pos_x + assets.img_final_width + inset)
+        bottom = min(video_height, assets.img_actual_pos_y + assets.img_final_height + inset)
+        assets.waveform_area_start_x, assets.waveform_area_top_y = left, top
+        assets.waveform_area_width, assets.waveform_area_height = max(0, right - left), max(0, bottom - top)
+    else:
+        assets.waveform_area_top_y = assets.img_actual_pos_y + assets.img_final_height + spacing_image_waveform
+        assets.waveform_area_width, assets.waveform_area_height = assets.img_final_width, assets.waveform_max_bar_h
+        assets.waveform_area_start_x = assets.img_actual_pos_x
+    if waveform_enabled:
+        with render_profiler.stage("precompute.waveform_geometry"):
+            assets.waveform_geometry = waveform_styles.build_waveform_geometry(
+                config.waveform_style, assets.waveform_area_width, assets.waveform_area_height, config.waveform_bar_count,
+                config.waveform_bar_spacing_ratio, gap=spacing_image_waveform, max_length=assets.waveform_max_bar_h,
+                cover_box=(assets.img_actual_pos_x - assets.waveform_area_start_x, assets.img_actual_pos_y - assets.waveform_area_top_y,
+                           assets.img_final_width, assets.img_final_height), supersample=config.waveform_antialias)
     print(f"Image pos: X={assets.img_actual_pos_x}, Y={assets.img_actual_pos_y}. Waveform top Y: {assets.waveform_area_top_y}, spacing: {spacing_image_waveform}")
-    video_duration = audio_end_time - audio_start_time; current_fps = video_fps
-    if video_duration <= 0: video_duration = 1
-    num_total_frames = int(video_duration * current_fps)
-    if waveform_enabled: 
-        assets.audio_amplitudes = analyze_audio(audio_path, audio_start_time, audio_end_time, num_total_frames, current_fps,
-                                             waveform_analysis_mode, waveform_bar_count, waveform_smoothing_factor, 
-                                             waveform_min_db, waveform_max_db)
+    # Amplitude and rhythm analysis share one decode and STFT of the segment
+    signal = _reuse(shared, ("signal", config.audio_path, config.audio_start_time, config.audio_end_time, config.video_fps),
+                    lambda: SegmentSignal(config.audio_path, config.audio_start_time, config.audio_end_time, config.video_fps))
+    if config.image_pulse_scale > 0:
+        with render_profiler.stage("precompute.rhythm_analysis"):
+            rhythm = analyze_rhythm(config.audio_path, config.audio_start_time, config.audio_end_time,
+                                    config.num_video_frames, config.video_fps, signal=signal)
+        if rhythm is not None:
+            assets.onset_strength, assets.beats, assets.tempo = rhythm["onset_strength"], rhythm["beats"], rhythm["tempo"]
+    if waveform_enabled or (config.image_pulse_scale > 0 and assets.beats is None):
+        with render_profiler.stage("precompute.audio_analysis"):
+            assets.audio_amplitudes = analyze_audio(**analysis_args_for_render(config), signal=signal)
+    if config.image_pulse_scale > 0 and assets.center_img_processed:
+        with render_profiler.stage("precompute.pulse_pyramid"):
+            if assets.beats is not None: impulses = beat_impulses(assets.beats, assets.onset_strength)
+            else: impulses = loudness_onsets(assets.audio_amplitudes)
+            assets.pulse_steps = np.rint(pulse_curve(impulses, config.video_fps) * (PULSE_SCALE_STEPS - 1)).astype(np.uint8)
+            assets.pulse_variants = build_pulse_variants(img_orig, assets, np.unique(assets.pulse_steps), config.image_pulse_scale,
+                                                         image_corner_radius, shadow_color_rgba, shadow_blur_radius)
+            print(f"Pre-computed {sum(v is not None for v in assets.pulse_variants)} pulse scale steps (max scale {1 + config.image_pulse_scale:.2f})")
+    if config.lyrics_path:
+        with render_profiler.stage("precompute.lyrics"):
+            assets.lyrics = build_lyrics(config, assets)
     print("--- Pre-computation finished ---")
     return assets
 
-def make_frame_for_moviepy(t, assets, video_fps, video_width, video_height, background_mode, image_corner_radius,
-                         shadow_offset_x, shadow_offset_y, shadow_blur_radius, waveform_enabled, waveform_color_mode,
-                         waveform_color, waveform_bar_count, waveform_bar_spacing_ratio):
-    current_fps = video_fps; frame_idx = int(t * current_fps)
-    if frame_idx % (current_fps * 5) == 0: print(f"Generating frame {frame_idx + 1} for time {t:.2f}s")
+def compose_frame(frame_idx, assets, config):
+    # Builds frame `frame_idx` as a PIL image; shared by the video encoder and the still renderer
+    video_width, video_height, background_mode = config.video_width, config.video_height, config.background_mode
+    shadow_offset_x, shadow_offset_y, shadow_blur_radius = config.shadow_offset_x, config.shadow_offset_y, config.shadow_blur_radius
+    prof = assets.profiler
+    if prof is not None: lap_start = time.perf_counter()
     current_frame_pil = None
-    if background_mode == "blur_image" and assets.blurred_bg_image: current_frame_pil = assets.blurred_bg_image.copy()
+    if background_mode == "blur_image" and assets.bg_motion is not None: current_frame_pil = assets.bg_motion.frame(frame_idx)
+    elif background_mode == "blur_image" and assets.blurred_bg_image: current_frame_pil = assets.blurred_bg_image.copy()
     else: current_frame_pil = Image.new("RGB", (video_width, video_height), assets.bg_color_solid)
-    if assets.center_img_shadow:
-        shadow_rounded = add_rounded_corners(assets.center_img_shadow, image_corner_radius)
-        current_frame_pil.paste(assets.center_img_shadow, (assets.img_actual_pos_x + shadow_offset_x, assets.img_actual_pos_y + shadow_offset_y), shadow_rounded)
-    if assets.center_img_processed:
-        current_frame_pil.paste(assets.center_img_processed, (assets.img_actual_pos_x, assets.img_actual_pos_y), assets.center_img_processed)
-    if waveform_enabled and assets.audio_amplitudes is not None and frame_idx < assets.audio_amplitudes.shape[0]:
+    if prof is not None: lap_start = prof.lap("background_copy", lap_start)
+    center_img, center_shadow, center_shadow_mask = assets.center_img_processed, assets.center_img_shadow, assets.center_img_shadow_mask
+    img_pos_x, img_pos_y = assets.img_actual_pos_x, assets.img_actual_pos_y
+    if assets.pulse_steps is not None:
+        # Beat pulse: paste the pre-scaled variant for this frame, grown around the image's center
+        center_img, center_shadow, center_shadow_mask, grow_x, grow_y = assets.pulse_variants[assets.pulse_steps[min(frame_idx, len(assets.pulse_steps) - 1)]]
+        img_pos_x -= grow_x; img_pos_y -= grow_y
+    if center_shadow:
+        current_frame_pil.paste(center_shadow, (img_pos_x + shadow_offset_x, img_pos_y + shadow_offset_y), center_shadow_mask)
+    if prof is not None: lap_start = prof.lap("shadow_paste", lap_start)
+    if center_img:
+        current_frame_pil.paste(center_img, (img_pos_x, img_pos_y), center_img)
+    if prof is not None: lap_start = prof.lap("image_paste", lap_start)
+    if config.waveform_enabled and assets.audio_amplitudes is not None and frame_idx < assets.audio_amplitudes.shape[0]:
         current_audio_frame_data = assets.audio_amplitudes[frame_idx, :]
-        actual_wave_color = waveform_color
+        waveform_color_mode = config.waveform_color_mode
+        actual_wave_color = config.waveform_color
         if waveform_color_mode == "white": actual_wave_color = (255,255,255)
         elif waveform_color_mode == "black": actual_wave_color = (0,0,0)
         elif waveform_color_mode == "contrast":
             try:
                 wave_bg_box = (assets.waveform_area_start_x, assets.waveform_area_top_y, 
                                assets.waveform_area_start_x + assets.waveform_area_width, 
-                               assets.waveform_area_top_y + assets.waveform_max_bar_h)
+                               assets.waveform_area_top_y + assets.waveform_area_height)
                 wave_bg_box = (max(0, wave_bg_box[0]), max(0, wave_bg_box[1]), 
                                min(video_width, wave_bg_box[2]), min(video_height, wave_bg_box[3]))
                 if wave_bg_box[2] > wave_bg_box[0] and wave_bg_box[3] > wave_bg_box[1]:
@@ -261,20 +778,226 @@ def make_frame_for_moviepy(t, assets, video_fps, video_width, video_height, back
             except Exception as e_contrast:
                 if frame_idx == 0: print(f"Error in contrast color: {e_contrast}. Defaulting.")
                 actual_wave_color = (255,255,255)
-        bars_canvas = draw_waveform_bars(current_audio_frame_data, assets.waveform_area_width, assets.waveform_max_bar_h, 
-                                       actual_wave_color, waveform_bar_count, waveform_bar_spacing_ratio)
+            if prof is not None: lap_start = prof.lap("contrast_stat", lap_start)
+        bars_canvas = assets.waveform_geometry.render(current_audio_frame_data, actual_wave_color) if assets.waveform_geometry else None
+        if prof is not None: lap_start = prof.lap("bar_draw", lap_start)
         if bars_canvas:
-            wave_shadow_color_rgba = (0,0,0, 180) 
-            if 'A' in bars_canvas.getbands():
-                bars_alpha_mask = bars_canvas.split()[3]
-                wave_shadow_sil = Image.new("RGBA", bars_canvas.size, (0,0,0,0))
-                wave_shadow_sil.paste(Image.new("RGBA", bars_canvas.size, wave_shadow_color_rgba), mask=bars_alpha_mask)
-                wave_shadow_blur = wave_shadow_sil.filter(ImageFilter.GaussianBlur(shadow_blur_radius))
-                current_frame_pil.paste(wave_shadow_blur, (assets.waveform_area_start_x + shadow_offset_x, assets.waveform_area_top_y + shadow_offset_y), wave_shadow_blur)
+            wave_shadow_blur = waveform_shadow_mask(bars_canvas, shadow_blur_radius, reduced=config.waveform_style == "radial")
+            current_frame_pil.paste((0, 0, 0), (assets.waveform_area_start_x + shadow_offset_x, assets.waveform_area_top_y + shadow_offset_y,
+                                                assets.waveform_area_start_x + shadow_offset_x + bars_canvas.width,
+                                                assets.waveform_area_top_y + shadow_offset_y + bars_canvas.height), wave_shadow_blur)
+            if prof is not None: lap_start = prof.lap("waveform_blur", lap_start)
             current_frame_pil.paste(bars_canvas, (assets.waveform_area_start_x, assets.waveform_area_top_y), bars_canvas)
-    return np.array(current_frame_pil)
+            if prof is not None: lap_start = prof.lap("waveform_paste", lap_start)
+    if assets.lyrics is not None:
+        assets.lyrics.draw(current_frame_pil, frame_idx)
+        if prof is not None: prof.lap("lyrics_paste", lap_start)
+    return current_frame_pil
+
+def make_frame_for_moviepy(t, assets, config):
+    current_fps = config.video_fps; frame_idx = int(t * current_fps)
+    if frame_idx % (current_fps * 5) == 0: print(f"Generating frame {frame_idx + 1} for time {t:.2f}s")
+    current_frame_pil = compose_frame(frame_idx, assets, config)
+    prof = assets.profiler
+    if prof is None: return np.array(current_frame_pil)
+    lap_start = time.perf_counter()
+    frame_array = np.array(current_frame_pil)
+    prof.lap("array_conversion", lap_start)
+    prof.end_frame()
+    return frame_array
+
+def render_still(assets, config, frame_indices, image_format="PNG", jpeg_quality=90):
+    # Renders one frame index (or a list of them) straight from precomputed assets, without touching the encoder.
+    # Returns encoded image bytes, or a list of bytes when a list of indices is given.
+    single = isinstance(frame_indices, (int, np.integer))
+    indices = [frame_indices] if single else list(frame_indices)
+    max_idx = assets.audio_amplitudes.shape[0] - 1 if assets.audio_amplitudes is not None and assets.audio_amplitudes.shape[0] > 0 else None
+    fmt = image_format.upper()
+    if fmt == "JPG": fmt = "JPEG"
+    stills = []
+    for frame_idx in indices:
+        frame_idx = max(0, int(frame_idx))
+        if max_idx is not None: frame_idx = min(frame_idx, max_idx)
+        frame_pil = compose_frame(frame_idx, assets, config)
+        buffer = io.BytesIO()
+        if fmt == "JPEG": frame_pil.convert("RGB").save(buffer, format="JPEG", quality=jpeg_quality)
+        elif fmt == "PNG": frame_pil.save(buffer, format="PNG", compress_level=1)  # Favour speed over size for previews
+        else: frame_pil.save(buffer, format=fmt)
+        stills.append(buffer.getvalue())
+    return stills[0] if single else stills
+
+# Encoder settings shared by render_video and estimate_render, so estimates measure the real encode
+VIDEO_CODEC = "libx264"
+AUDIO_CODEC = "aac"
+ENCODE_THREADS = 4
+
+# Render estimates: a few short windows of consecutive frames spread across the clip are composed and encoded
+# for real, and their cost per frame is extrapolated to the whole clip
+ESTIMATE_WINDOWS = 3
+ESTIMATE_WINDOW_SECONDS = 1.0
+ESTIMATE_AUDIO_BITRATE = 128_000  # moviepy/ffmpeg's default AAC bitrate, bits per second
+
+def estimate_render(config, windows=ESTIMATE_WINDOWS, window_seconds=ESTIMATE_WINDOW_SECONDS):
+    """Estimate a render's wall time and output size by precomputing the config's assets, then composing and
+    encoding `windows` runs of window_seconds of consecutive frames with the real encoder settings.
+    Each window is its own file starting on a keyframe, so the size estimate errs on the large side.
+    Returns {"estimated_seconds", "estimated_bytes", "precompute_seconds", "seconds_per_frame",
+    "bytes_per_frame", "sample_frames", "total_frames"}."""
+    import moviepy.editor as mpe
+    start = time.perf_counter()
+    assets = precompute_assets(config)
+    precompute_seconds = time.perf_counter() - start
+    video_fps = config.video_fps
+    total_frames = config.num_video_frames
+    window_frames = max(1, min(total_frames, int(round(window_seconds * video_fps))))
+    windows = max(1, min(windows, total_frames // window_frames))
+    # Windows evenly spaced from the first frame to the last, so quiet intros and busy choruses both count
+    last_start = total_frames - window_frames
+    window_starts = sorted({round(i * last_start / max(1, windows - 1)) for i in range(windows)})
+    sample_frames, sample_seconds, sample_bytes = 0, 0.0, 0
+    with tempfile.TemporaryDirectory(prefix="render_estimate_") as temp_dir:
+        for i, first_frame in enumerate(window_starts):
+            def frame_maker(t, first_frame=first_frame):
+                frame_idx = min(first_frame + int(t * video_fps), total_frames - 1)
+                return np.array(compose_frame(frame_idx, assets, config))
+            sample_path = os.path.join(temp_dir, f"sample_{i}.mp4")
+            window_start = time.perf_counter()
+            clip = mpe.VideoClip(frame_maker, duration=window_frames / video_fps)
+            clip.write_videofile(sample_path, fps=video_fps, codec=VIDEO_CODEC, threads=ENCODE_THREADS,
+                                 audio=False, logger=None)
+            sample_seconds += time.perf_counter() - window_start
+            sample_bytes += os.path.getsize(sample_path)
+            sample_frames += window_frames
+    seconds_per_frame = sample_seconds / sample_frames
+    bytes_per_frame = sample_bytes / sample_frames
+    audio_bytes = config.video_duration * ESTIMATE_AUDIO_BITRATE / 8 if os.path.exists(config.audio_path) else 0
+    estimate = {
+        "estimated_seconds": precompute_seconds + seconds_per_frame * total_frames,
+        "estimated_bytes": int(bytes_per_frame * total_frames + audio_bytes),
+        "precompute_seconds": precompute_seconds,
+        "seconds_per_frame": seconds_per_frame,
+        "bytes_per_frame": bytes_per_frame,
+        "sample_frames": sample_frames,
+        "total_frames": total_frames
+    }
+    print(f"Estimated render: {estimate['estimated_seconds']:.0f}s, {estimate['estimated_bytes'] / 1024**2:.1f}MB "
+          f"from {sample_frames} of {total_frames} frames")
+    return estimate
+
+# Fragmented MP4: moov up front, then self-contained moof/mdat fragments appended at each keyframe.
+# The file only ever grows, so it can be uploaded while it is still being written.
+FRAGMENTED_MP4_FFMPEG_PARAMS = ["-movflags", "frag_keyframe+empty_moov+default_base_moof"]
+
+def render_video(config, progress_callback=None, logger='bar', profiler=None, fragmented=False):
+    # Full render of one render_config.RenderConfig: precompute, composite, encode.
+    # progress_callback(frames_done, total_frames) is called from the encoder thread after every frame.
+    # With a render_profiler.RenderProfiler, its report is returned under "timings".
+    # fragmented=True writes an append-only fragmented MP4 (see YouTubeService.upload_while_rendering).
+    # Returns a dict with the output path, frame count and stage timings; raises on failure.
+    if profiler is None:
+        return _render_video(config, progress_callback, logger, fragmented)
+    with profiler.activate():
+        result = _render_video(config, progress_callback, logger, fragmented)
+    result["timings"] = profiler.report()
+    return result
+
+def _render_video(config, progress_callback, logger, fragmented=False):
+    import moviepy.editor as mpe
+    render_start = time.perf_counter()
+    output_filename = config.output_filename
+    output_dir = os.path.dirname(os.path.abspath(output_filename))
+    os.makedirs(output_dir, exist_ok=True)
+
+    with render_profiler.stage("precompute"):
+        assets = precompute_assets(config)
+    precompute_seconds = time.perf_counter() - render_start
+
+    video_fps = config.video_fps
+    video_duration = config.video_duration
+    frames_done = [0]
+    total_frames = [config.num_video_frames]
+    prof = assets.profiler
+    last_frame_returned = [None]
+
+    def frame_maker(t):
+        if prof is not None and last_frame_returned[0] is not None:
+            prof.lap("encoder_wait", last_frame_returned[0])  # Time spent in moviepy/ffmpeg since the previous frame
+        frame = make_frame_for_moviepy(t, assets, config)
+        frames_done[0] += 1
+        if progress_callback: progress_callback(frames_done[0], total_frames[0])
+        if prof is not None: last_frame_returned[0] = time.perf_counter()
+        return frame
+
+    video_clip = mpe.VideoClip(frame_maker, duration=video_duration)
+    audio_path = config.audio_path
+    if os.path.exists(audio_path):
+        audio_clip = mpe.AudioFileClip(audio_path)
+        actual_start = min(config.audio_start_time, audio_clip.duration)
+        actual_end = min(config.audio_end_time, audio_clip.duration)
+        if actual_start >= actual_end:
+            video_clip = video_clip.set_audio(None)
+        else:
+            trimmed_audio = audio_clip.subclip(actual_start, actual_end)
+            if trimmed_audio.duration < video_clip.duration:
+                video_clip = video_clip.set_duration(trimmed_audio.duration)
+            elif trimmed_audio.duration > video_clip.duration:
+                trimmed_audio = trimmed_audio.set_duration(video_clip.duration)
+            video_clip = video_clip.set_audio(trimmed_audio)
+    # VideoClip renders frame 0 on construction; only count frames produced by the encoder
+    frames_done[0] = 0
+    total_frames[0] = int(video_clip.duration * video_fps)
+    last_frame_returned[0] = None
+
+    encode_start = time.perf_counter()
+    with render_profiler.stage("encode"):
+        video_clip.write_videofile(
+            output_filename,
+            fps=video_fps,
+            codec=VIDEO_CODEC,
+            audio_codec=AUDIO_CODEC,
+            threads=ENCODE_THREADS,
+            ffmpeg_params=FRAGMENTED_MP4_FFMPEG_PARAMS if fragmented else None,
+            logger=logger
+        )
+    encode_seconds = time.perf_counter() - encode_start
+    return {
+        "output": os.path.abspath(output_filename),
+        "frames": frames_done[0],
+        "precompute_seconds": precompute_seconds,
+        "encode_seconds": encode_seconds,
+        "total_seconds": time.perf_counter() - render_start
+    }
+
+def render_profiles(configs, logger='bar', collect_timings=False):
+    # Renders the same image/audio with several profiles (one RenderConfig per output).
+    # Audio is decoded and analyzed once per audio file for all of them and the image is decoded once;
+    # each profile then only does its own layout and encode. Returns one result dict per config,
+    # holding "error" instead of timings when that render failed.
+    analysis_requests = {}
+    for config in configs:
+        if config.waveform_enabled:
+            request = analysis_args_for_render(config)
+            analysis_requests.setdefault(request["audio_path"], []).append(request)
+    shared_analysis_start = time.perf_counter()
+    for requests in analysis_requests.values():
+        try: analyze_audio_shared(requests)
+        except Exception as e: print(f"Shared audio analysis failed, profiles will analyze separately: {e}")
+    shared_analysis_seconds = time.perf_counter() - shared_analysis_start
+
+    results = []
+    for config in configs:
+        try:
+            profiler = render_profiler.RenderProfiler() if collect_timings else None
+            result = render_video(config, logger=logger, profiler=profiler)
+        except Exception as e:
+            result = {"output": os.path.abspath(config.output_filename), "error": f"{type(e).__name__}: {e}"}
+        result["shared_analysis_seconds"] = shared_analysis_seconds
+        results.append(result)
+    return results
 
 if __name__ == "__main__":
+    import moviepy.editor as mpe
+    from render_config import RenderConfig
     # Sample configuration for creating a YouTube Short
     # Image settings
     IMAGE_PATH = "/Users/josecosta/Downloads/ChatGPT Image Apr 29, 2025, 07_20_12 PM.png"
@@ -320,56 +1043,48 @@ if __name__ == "__main__":
     
     print(f"Starting YouTube Shorts script (v6 - User Prefs & New Contrast)...")
     
-    # Precompute all assets
-    assets = precompute_assets(
+    config = RenderConfig(
         image_path=IMAGE_PATH,
+        audio_path=AUDIO_PATH,
+        audio_start_time=AUDIO_START_TIME,
+        audio_end_time=AUDIO_END_TIME,
+        output_filename=OUTPUT_VIDEO_FILENAME,
+        video_fps=VIDEO_FPS,
         video_width=VIDEO_WIDTH,
         video_height=VIDEO_HEIGHT,
         background_mode=BACKGROUND_MODE,
-        background_image_fit=BACKGROUND_IMAGE_FIT,
         background_blur_radius=BACKGROUND_BLUR_RADIUS,
+        background_image_fit=BACKGROUND_IMAGE_FIT,
+        background_color=(0, 0, 0),
         image_width_percentage=IMAGE_WIDTH_PERCENTAGE,
         image_corner_radius=IMAGE_CORNER_RADIUS,
         image_x_position=IMAGE_X_POSITION,
         image_y_position=IMAGE_Y_POSITION,
-        shadow_darkness_factor=SHADOW_DARKNESS_FACTOR,
+        shadow_offset_x=SHADOW_OFFSET_X,
+        shadow_offset_y=SHADOW_OFFSET_Y,
         shadow_blur_radius=SHADOW_BLUR_RADIUS,
+        shadow_darkness_factor=SHADOW_DARKNESS_FACTOR,
         waveform_enabled=WAVEFORM_ENABLED,
-        waveform_height_percentage=WAVEFORM_HEIGHT_PERCENTAGE,
-        spacing_image_waveform=SPACING_IMAGE_WAVEFORM,
-        audio_path=AUDIO_PATH,
-        audio_start_time=AUDIO_START_TIME,
-        audio_end_time=AUDIO_END_TIME,
-        video_fps=VIDEO_FPS,
         waveform_analysis_mode=WAVEFORM_ANALYSIS_MODE,
+        waveform_color_mode=WAVEFORM_COLOR_MODE,
+        waveform_color=WAVEFORM_COLOR,
+        waveform_height_percentage=WAVEFORM_HEIGHT_PERCENTAGE,
         waveform_bar_count=WAVEFORM_BAR_COUNT,
+        waveform_bar_spacing_ratio=WAVEFORM_BAR_SPACING_RATIO,
         waveform_smoothing_factor=WAVEFORM_SMOOTHING_FACTOR,
+        spacing_image_waveform=SPACING_IMAGE_WAVEFORM,
         waveform_min_db=WAVEFORM_MIN_DB,
         waveform_max_db=WAVEFORM_MAX_DB
     )
     
-    # Create frame maker function with closure for all parameters
+    # Precompute all assets
+    assets = precompute_assets(config)
+    
+    # Create frame maker function with closure for the config
     def frame_maker(t):
-        return make_frame_for_moviepy(
-            t=t,
-            assets=assets,
-            video_fps=VIDEO_FPS,
-            video_width=VIDEO_WIDTH,
-            video_height=VIDEO_HEIGHT,
-            background_mode=BACKGROUND_MODE,
-            image_corner_radius=IMAGE_CORNER_RADIUS,
-            shadow_offset_x=SHADOW_OFFSET_X,
-            shadow_offset_y=SHADOW_OFFSET_Y,
-            shadow_blur_radius=SHADOW_BLUR_RADIUS,
-            waveform_enabled=WAVEFORM_ENABLED,
-            waveform_color_mode=WAVEFORM_COLOR_MODE,
-            waveform_color=WAVEFORM_COLOR,
-            waveform_bar_count=WAVEFORM_BAR_COUNT,
-            waveform_bar_spacing_ratio=WAVEFORM_BAR_SPACING_RATIO
-        )
+        return make_frame_for_moviepy(t, assets, config)
     
-    video_duration = AUDIO_END_TIME - AUDIO_START_TIME
-    if video_duration <= 0: video_duration = 1
+    video_duration = config.video_duration
     print(f"Target video duration: {video_duration}s, FPS: {VIDEO_FPS}")
     
     # Create video clip with our frame maker function
@@ -0,0 +1,130 @@
+# Waveform styles drawn from precomputed geometry
+#
+# Every style turns one row of bar amplitudes (0-1) into an alpha mask. Everything that only depends on the
+# layout (which bar each pixel column belongs to, each row's level, the spokes' directions and where they leave
+# the cover) is computed once per render by build_waveform_geometry, so a frame costs a few vectorized numpy
+# operations over the amplitude row (plus one polygon fill per spoke for radial), whatever the style.
+#
+#   bars      bottom-aligned vertical bars (the original look)
+#   mirrored  bars growing up and down from the middle of the waveform band
+#   line      a filled area under a line through the bar tops
+#   radial    spokes around the cover art, starting at its edge
+#
+# With supersampling (waveform.antialias 2-4) only the waveform canvas is laid out and drawn at that multiple of
+# its size, so bar edges and tops land on sub-pixel positions, and is box-filtered down before compositing.
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+def bar_slots(canvas_width, bar_count, bar_spacing_ratio):
+    # (x0, bar width) per bar across canvas_width, the same integer layout the bars have always used
+    total_slot_width = canvas_width / bar_count
+    bar_width = max(1, int(total_slot_width / (1 + bar_spacing_ratio)))
+    bar_spacing = max(0, int(bar_width * bar_spacing_ratio))
+    actual_waveform_width = bar_count * bar_width + max(0, bar_count - 1) * bar_spacing
+    start_x = (canvas_width - actual_waveform_width) // 2
+    return start_x + np.arange(bar_count) * (bar_width + bar_spacing), bar_width
+
+class WaveformGeometry:
+    """Precomputed layout of one waveform style; render() draws a frame's amplitude row into an RGBA canvas"""
+    def __init__(self, width, height, bar_count):
+        self.width, self.height, self.bar_count = width, height, bar_count
+        self.supersample = 1  # Laid out at this multiple of the output size; render() box-filters back down
+
+    def alpha(self, amplitudes):
+        # The frame's coverage as a (height, width) uint8 array or an "L" image
+        raise NotImplementedError
+
+    def render(self, amplitudes, color):
+        # None when there's nothing to draw (no area, or an amplitude row of the wrong length)
+        if self.width <= 0 or self.height <= 0 or len(amplitudes) != self.bar_count: return None
+        alpha = self.alpha(amplitudes)
+        if not isinstance(alpha, Image.Image): alpha = Image.fromarray(alpha, "L")
+        if self.supersample > 1: alpha = alpha.reduce(self.supersample)  # Coverage averaged per output pixel
+        canvas = Image.new("RGBA", alpha.size, tuple(color) + (0,))
+        canvas.putalpha(alpha)
+        return canvas
+
+class ColumnGeometry(WaveformGeometry):
+    # Styles where each pixel column has one height and each row one threshold: bars, mirrored, line
+    def __init__(self, style, width, height, bar_count, bar_spacing_ratio):
+        super().__init__(width, height, bar_count)
+        self.style = style
+        bar_x0, bar_width = bar_slots(width, bar_count, bar_spacing_ratio)
+        columns = np.arange(width)
+        if style == "line":
+            # Linear interpolation between bar centers: left bar index and weight of the right one per column
+            centers = bar_x0 + bar_width / 2
+            position = np.interp(columns + 0.5, centers, np.arange(bar_count))
+            self.left_bar = np.minimum(np.floor(position).astype(np.intp), bar_count - 1)
+            self.right_bar = np.minimum(self.left_bar + 1, bar_count - 1)
+            self.right_weight = (position - self.left_bar).astype(np.float32)
+        else:
+            # A bar covers columns x0..x0 + width inclusive, so with no spacing a column can belong to two bars;
+            # index bar_count is a padding slot of height 0 for columns in the gaps
+            self.column_bars = np.full((2, width), bar_count, dtype=np.intp)
+            for i, x0 in enumerate(bar_x0):
+                x_start, x_end = max(0, x0), min(width, x0 + bar_width + 1)
+                if x_start >= x_end: continue
+                slot = np.where(self.column_bars[0, x_start:x_end] == bar_count, 0, 1)
+                self.column_bars[slot, np.arange(x_start, x_end)] = i
+        rows = np.arange(height)
+        if style == "mirrored":
+            # A column of height h covers the h rows closest to the band's middle
+            self.row_levels = np.abs(2 * rows + 1 - height) + 1
+        else:
+            self.row_levels = height - rows  # Bottom row is level 1
+
+    def column_heights(self, amplitudes):
+        scaled = np.asarray(amplitudes, dtype=np.float32) * self.height
+        if self.style == "line":
+            return scaled[self.left_bar] * (1 - self.right_weight) + scaled[self.right_bar] * self.right_weight
+        heights = np.append(np.maximum(np.trunc(scaled), 0), 0)
+        return np.maximum(heights[self.column_bars[0]], heights[self.column_bars[1]])
+
+    def alpha(self, amplitudes):
+        covered = self.row_levels[:, None] <= self.column_heights(amplitudes)[None, :]
+        return covered.view(np.uint8) * np.uint8(255)
+
+class RadialGeometry(WaveformGeometry):
+    # One quad per spoke around the cover: both wedge sides' unit directions and where each side leaves the cover
+    # (plus gap) are tabulated once, so a frame only moves the outer corners out by the bar's length and fills the quads.
+    # The canvas may be clipped by the frame, so the cover's box is given in canvas coordinates.
+    def __init__(self, width, height, bar_count, bar_spacing_ratio, cover_box, gap, max_length):
+        super().__init__(width, height, bar_count)
+        cover_x, cover_y, cover_width, cover_height = cover_box
+        self.center = np.array([cover_x + cover_width / 2, cover_y + cover_height / 2])
+        # Clockwise from 12 o'clock; each bar owns a slot of 2pi / bar_count and fills its middle 1 / (1 + spacing)
+        angles = np.arange(bar_count) / bar_count * 2 * math.pi
+        half_width = math.pi / bar_count / (1 + bar_spacing_ratio)
+        sides = np.stack([angles - half_width, angles + half_width], axis=1)
+        self.directions = np.stack([np.sin(sides), -np.cos(sides)], axis=-1)  # (bars, 2 sides, xy)
+        with np.errstate(divide="ignore"):
+            edge = np.minimum(cover_width / 2 / np.abs(self.directions[..., 0]), cover_height / 2 / np.abs(self.directions[..., 1]))
+        self.inner_distances = edge + gap
+        self.inner_points = self.center + self.directions * self.inner_distances[..., None]
+        self.max_length = max_length
+
+    def alpha(self, amplitudes):
+        lengths = np.asarray(amplitudes, dtype=np.float64) * self.max_length
+        outer_points = self.center + self.directions * (self.inner_distances + lengths[:, None])[..., None]
+        quads = np.concatenate([self.inner_points, outer_points[:, ::-1]], axis=1)
+        mask = Image.new("L", (self.width, self.height), 0)
+        draw = ImageDraw.Draw(mask)
+        for quad in quads[lengths >= 0.5].tolist():
+            draw.polygon([tuple(point) for point in quad], fill=255)
+        return mask
+
+def build_waveform_geometry(style, width, height, bar_count, bar_spacing_ratio, cover_box=None, gap=0, max_length=0, supersample=1):
+    """Geometry for a width x height waveform canvas. "radial" also needs the cover's (x, y, width, height) in
+    canvas coordinates, the gap between the cover and the spokes and the full-amplitude spoke length.
+    supersample > 1 lays the style out at that multiple of the size and averages it back down (anti-aliasing)."""
+    k = supersample
+    if style == "radial":
+        geometry = RadialGeometry(width * k, height * k, bar_count, bar_spacing_ratio,
+                                  tuple(value * k for value in cover_box), gap * k, max_length * k)
+    else:
+        geometry = ColumnGeometry(style, width * k, height * k, bar_count, bar_spacing_ratio)
+    geometry.supersample = k
+    return geometry
@@ -0,0 +1,114 @@
+# Local ledger of YouTube Data API quota units
+#
+# The API charges a fixed number of units per call against a daily budget that resets at midnight
+# Pacific time. The ledger is a small JSON file so several processes (app, CLI) share one view of the day.
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytz
+
+DEFAULT_DAILY_QUOTA = int(os.environ.get("YOUTUBE_DAILY_QUOTA", 10000))
+DEFAULT_LEDGER_PATH = os.environ.get("YOUTUBE_QUOTA_LEDGER", os.path.join(".upload_state", "quota_ledger.json"))
+QUOTA_TIMEZONE = pytz.timezone("America/Los_Angeles")
+
+# Units charged per call (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'videos.insert': 1600,
+    'thumbnails.set': 50,
+    'channels.list': 1,
+    'videoCategories.list': 1
+}
+
+def quota_day(now=None):
+    """The quota day (Pacific date) containing `now` (an aware datetime, default: current time)"""
+    now = now or datetime.now(pytz.utc)
+    return now.astimezone(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+def seconds_until_reset(now=None):
+    """Seconds until the next Pacific midnight, when the daily quota resets"""
+    now = (now or datetime.now(pytz.utc)).astimezone(QUOTA_TIMEZONE)
+    next_midnight = QUOTA_TIMEZONE.localize(datetime(now.year, now.month, now.day) + timedelta(days=1))
+    return max(0.0, (next_midnight - now).total_seconds())
+
+class QuotaLedger:
+    def __init__(self, path=DEFAULT_LEDGER_PATH, daily_limit=DEFAULT_DAILY_QUOTA):
+        self.path = path
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Current day's entry, starting a fresh one when the quota day has rolled over"""
+        today = quota_day()
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('day') != today:
+            data = {'day': today, 'spent': 0, 'calls': {}}
+        return data
+
+    def _save(self, data):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(data, file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def _add(self, data, operation, count):
+        data['spent'] += QUOTA_COSTS[operation] * count
+        data['calls'][operation] = data['calls'].get(operation, 0) + count
+
+    @property
+    def spent(self):
+        with self._lock:
+            return self._load()['spent']
+
+    @property
+    def remaining(self):
+        return max(0, self.daily_limit - self.spent)
+
+    def cost(self, operations):
+        """Total units for an iterable of operation names"""
+        return sum(QUOTA_COSTS[operation] for operation in operations)
+
+    def record(self, operation, count=1):
+        """Charge a call that has already been made"""
+        with self._lock:
+            data = self._load()
+            self._add(data, operation, count)
+            self._save(data)
+
+    def reserve(self, operations):
+        """Charge several calls up front if they all fit in today's remaining budget; returns False otherwise"""
+        with self._lock:
+            data = self._load()
+            if data['spent'] + self.cost(operations) > self.daily_limit:
+                return False
+            for operation in operations:
+                self._add(data, operation, 1)
+            self._save(data)
+            return True
+
+    def release(self, operations):
+        """Refund reserved calls that were never made"""
+        with self._lock:
+            data = self._load()
+            for operation in operations:
+                data['spent'] = max(0, data['spent'] - QUOTA_COSTS[operation])
+                data['calls'][operation] = max(0, data['calls'].get(operation, 0) - 1)
+            self._save(data)
+
+    def summary(self):
+        with self._lock:
+            data = self._load()
+        return {
+            'day': data['day'],
+            'spent': data['spent'],
+            'remaining': max(0, self.daily_limit - data['spent']),
+            'daily_limit': self.daily_limit,
+            'calls': dict(data['calls']),
+            'seconds_until_reset': seconds_until_reset()
+        }
@@ -1,11 +1,46 @@
 import streamlit as st
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaUpload
+import httplib2
 import os
 import mimetypes
 from datetime import datetime, timezone
 import json
+import hashlib
+import random
+import socket
+import time
+import threading
+import http.client
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import media_probe
+from youtube_quota import QuotaLedger, seconds_until_reset
+
+# Resumable upload tuning. The API requires chunk sizes that are multiples of 256 KiB.
+UPLOAD_CHUNK_GRANULARITY = 256 * 1024
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_UPLOAD_RETRIES = 10
+MAX_BACKOFF_SECONDS = 64
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, IOError, ConnectionError, socket.timeout,
+                        http.client.NotConnected, http.client.IncompleteRead, http.client.ImproperConnectionState,
+                        http.client.CannotSendRequest, http.client.CannotSendHeader,
+                        http.client.ResponseNotReady, http.client.BadStatusLine)
+DEFAULT_UPLOAD_STATE_DIR = os.environ.get("YOUTUBE_UPLOAD_STATE_DIR", ".upload_state")
+# Point the client at a stand-in server (e.g. benchmarks/youtube_stub_server.py) instead of googleapis.com
+DEFAULT_API_ENDPOINT = os.environ.get("YOUTUBE_API_ENDPOINT")
+
+# Read-mostly data is cached on the service object; only uploads need to hit the API every time
+CHANNEL_INFO_TTL_SECONDS = 10 * 60
+CATEGORIES_TTL_SECONDS = 24 * 3600
+# A batch waiting for quota rechecks the shared ledger this often (other processes may refund units)
+QUOTA_POLL_SECONDS = 60
+# Largest file the API accepts
+MAX_VIDEO_FILE_BYTES = 128 * 1024 ** 3
 
 class VideoMetadata:
     def __init__(self):
@@ -18,14 +53,110 @@ class VideoMetadata:
         self.thumbnail = None
         self.shorts_format = False  # True for YouTube Shorts
 
+class UploadJob:
+    def __init__(self, video_path, metadata, thumbnail_path=None):
+        self.video_path = video_path
+        self.metadata = metadata
+        self.thumbnail_path = thumbnail_path  # Set as a follow-up task once the video is uploaded
+
+class RenderFailedError(Exception):
+    pass
+
+class GrowingFileUpload(MediaUpload):
+    """Resumable media for a file that is still being written. size() stays unknown until finish() is called,
+    so the upload is sent with "bytes a-b/*" ranges and completed with the real size. Call wait_for_chunk()
+    before each next_chunk(): the client reads size() before getbytes(), so the wait must happen first for the
+    last request to carry the real size."""
+    POLL_SECONDS = 0.25
+    
+    def __init__(self, path, chunksize=DEFAULT_UPLOAD_CHUNK_SIZE, mimetype='video/mp4'):
+        super().__init__()
+        self._path = path
+        self._chunksize = chunksize
+        self._mimetype = mimetype
+        self._done = threading.Event()
+        self._failed = False
+    
+    def finish(self, failed=False):
+        """Mark the file complete (or abandoned); wakes any reader waiting for bytes"""
+        self._failed = failed
+        self._done.set()
+    
+    def _available(self):
+        try:
+            return os.path.getsize(self._path)
+        except OSError:
+            return 0
+    
+    def wait_for_chunk(self, begin):
+        """Block until the chunk at begin can be sent: the file is complete, or extends past a full chunk.
+        Waiting for one byte beyond the chunk means a chunk sent while the size is unknown is never the last
+        one, so a file ending exactly on a chunk boundary doesn't end in an empty read (an invalid range)."""
+        while not self._done.is_set() and self._available() <= begin + self._chunksize:
+            self._done.wait(self.POLL_SECONDS)
+        if self._failed:
+            raise RenderFailedError(f"Rendering {self._path} failed; upload abandoned")
+    
+    def chunksize(self):
+        return self._chunksize
+    
+    def mimetype(self):
+        return self._mimetype
+    
+    def size(self):
+        return self._available() if self._done.is_set() and not self._failed else None
+    
+    def resumable(self):
+        return True
+    
+    def has_stream(self):
+        return False
+    
+    def getbytes(self, begin, length):
+        self.wait_for_chunk(begin)  # Normally already satisfied by the upload loop
+        with open(self._path, 'rb') as file:
+            file.seek(begin)
+            return file.read(length)
+
 class YouTubeService:
-    def __init__(self, credentials):
+    def __init__(self, credentials, chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE, upload_state_dir=DEFAULT_UPLOAD_STATE_DIR,
+                 quota_ledger=None, api_endpoint=DEFAULT_API_ENDPOINT):
         self.credentials = credentials
-        self.service = build('youtube', 'v3', credentials=credentials)
+        self.api_endpoint = api_endpoint
+        self.service = self._build_client()
+        self.chunk_size = normalize_chunk_size(chunk_size)
+        self.upload_state_dir = upload_state_dir
+        self.quota_ledger = quota_ledger or QuotaLedger()
+        self._thread_local = threading.local()
+        self._ttl_cache = {}
         
+    def _build_client(self):
+        # The discovery document bundled with google-api-python-client is used, so building needs no network call
+        if not self.api_endpoint:
+            return build('youtube', 'v3', credentials=self.credentials, static_discovery=True, cache_discovery=False)
+        # Rewrite the root URL rather than passing client_options, so media uploads also go to the override
+        document = json.loads(get_static_doc('youtube', 'v3'))
+        document['rootUrl'] = self.api_endpoint.rstrip('/') + '/'
+        document['baseUrl'] = document['rootUrl'] + document['servicePath']
+        return build_from_document(document, credentials=self.credentials)
+    
+    def _cached(self, key, ttl_seconds, fetch):
+        """Return fetch() cached for ttl_seconds; None results (failed calls) are not cached"""
+        entry = self._ttl_cache.get(key)
+        if entry and time.monotonic() - entry[0] < ttl_seconds:
+            return entry[1]
+        value = fetch()
+        if value is not None:
+            self._ttl_cache[key] = (time.monotonic(), value)
+        return value
+    
     def get_channel_info(self):
-        """Get authenticated user's channel information"""
+        """Get authenticated user's channel information (cached for CHANNEL_INFO_TTL_SECONDS)"""
+        return self._cached('channel_info', CHANNEL_INFO_TTL_SECONDS, self._fetch_channel_info)
+    
+    def _fetch_channel_info(self):
         try:
+            self.quota_ledger.record('channels.list')
             response = self.service.channels().list(
                 part='snippet,statistics,brandingSettings',
                 mine=True
@@ -48,16 +179,22 @@ class YouTubeService:
             st.error(f"Error fetching channel info: {e}")
             return None
     
+    @staticmethod
+    def check_video_size(size_bytes):
+        """Check a (real or estimated) file size against YouTube's upload limit"""
+        if size_bytes > MAX_VIDEO_FILE_BYTES:
+            return False, f"File too large: {size_bytes / (1024**3):.1f}GB (max {MAX_VIDEO_FILE_BYTES // 1024**3}GB)"
+        return True, "Valid"
+
     def validate_video_file(self, video_path):
         """Validate video file meets YouTube requirements"""
         if not os.path.exists(video_path):
             return False, "Video file not found"
             
         # Check file size (128GB max)
-        file_size = os.path.getsize(video_path)
-        max_size = 128 * 1024 * 1024 * 1024  # 128GB in bytes
-        if file_size > max_size:
-            return False, f"File too large: {file_size / (1024**3):.1f}GB (max 128GB)"
+        size_ok, size_message = self.check_video_size(os.path.getsize(video_path))
+        if not size_ok:
+            return False, size_message
         
         # Check file format
         mime_type, _ = mimetypes.guess_type(video_path)
@@ -74,30 +211,34 @@ class YouTubeService:
     def detect_shorts_format(self, video_path):
         """Detect if video meets YouTube Shorts criteria"""
         try:
-            from moviepy.editor import VideoFileClip
-            
-            with VideoFileClip(video_path) as clip:
-                duration = clip.duration
-                width, height = clip.size
-                
-                # YouTube Shorts criteria
-                is_vertical = height > width  # Vertical orientation
-                is_short_duration = duration <= 60  # 60 seconds or less
-                aspect_ratio = height / width if width > 0 else 0
-                is_correct_ratio = 1.5 <= aspect_ratio <= 2.0  # Roughly 9:16
+            # MP4/MOV: read duration and size from the moov header; anything else goes through ffmpeg
+            info = media_probe.probe_mp4(video_path)
+            if info:
+                duration, width, height = info['duration'], info['width'], info['height']
+            else:
+                from moviepy.editor import VideoFileClip
+                with VideoFileClip(video_path) as clip:
+                    duration = clip.duration
+                    width, height = clip.size
                 
-                return {
-                    'is_shorts': is_vertical and is_short_duration and is_correct_ratio,
-                    'duration': duration,
-                    'width': width,
-                    'height': height,
-                    'aspect_ratio': aspect_ratio,
-                    'reasons': {
-                        'vertical': is_vertical,
-                        'short_duration': is_short_duration,
-                        'correct_ratio': is_correct_ratio
-                    }
+            # YouTube Shorts criteria
+            is_vertical = height > width  # Vertical orientation
+            is_short_duration = duration <= 60  # 60 seconds or less
+            aspect_ratio = height / width if width > 0 else 0
+            is_correct_ratio = 1.5 <= aspect_ratio <= 2.0  # Roughly 9:16
+            
+            return {
+                'is_shorts': is_vertical and is_short_duration and is_correct_ratio,
+                'duration': duration,
+                'width': width,
+                'height': height,
+                'aspect_ratio': aspect_ratio,
+                'reasons': {
+                    'vertical': is_vertical,
+                    'short_duration': is_short_duration,
+                    'correct_ratio': is_correct_ratio
                 }
+            }
                 
         except Exception as e:
             st.error(f"Error analyzing video: {e}")
@@ -175,75 +316,33 @@ class YouTubeService:
                 st.error(f"Error validating timestamp: {e}")
                 return None
             
+        insert_charged = False
+        insert_confirmed = False
         try:
-            # Prepare video metadata
-            body = {
-                'snippet': {
-                    'title': metadata.title or "Untitled Video",
-                    'description': metadata.description or "",
-                    'tags': metadata.tags if metadata.tags else [],
-                    'categoryId': metadata.category_id
-                },
-                'status': {
-                    'privacyStatus': metadata.privacy_status
-                }
-            }
-            
-            # Add scheduling if specified
-            if metadata.publish_at:
-                body['status']['publishAt'] = metadata.publish_at
-            
-            # Add shorts-specific metadata if detected
-            if metadata.shorts_format:
-                if '#Shorts' not in metadata.tags:
-                    body['snippet']['tags'].append('#Shorts')
-                    
-                # Add shorts indicator to description if not present
-                if '#Shorts' not in metadata.description:
-                    body['snippet']['description'] += "\n\n#Shorts"
-            
-            # Create media upload object
-            media = MediaFileUpload(
-                video_path,
-                chunksize=-1,  # Upload in single chunk for simplicity
-                resumable=True
-            )
-            
-            # Execute upload
-            insert_request = self.service.videos().insert(
-                part=','.join(body.keys()),
-                body=body,
-                media_body=media
-            )
+            body = self._build_video_body(metadata)
             
             # Create progress bar
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            response = None
-            error = None
-            retry = 0
+            def on_progress(bytes_sent, total_bytes, chunk_mb_per_s):
+                fraction = bytes_sent / total_bytes if total_bytes else 0.0
+                progress_bar.progress(min(1.0, fraction))
+                status_text.text(f"Upload progress: {fraction * 100:.1f}% "
+                                 f"({bytes_sent / 1024**2:.1f}/{total_bytes / 1024**2:.1f} MB, {chunk_mb_per_s:.1f} MB/s)")
             
-            while response is None and retry < 3:
-                try:
-                    status, response = insert_request.next_chunk()
-                    if status:
-                        progress = status.progress() * 100
-                        progress_bar.progress(progress / 100)
-                        status_text.text(f"Upload progress: {progress:.1f}%")
-                        
-                except HttpError as e:
-                    if e.resp.status in [500, 502, 503, 504]:
-                        # Retriable error
-                        retry += 1
-                        st.warning(f"Upload error (retry {retry}/3): {e}")
-                    else:
-                        raise e
+            def on_retry(attempt, error, delay):
+                st.warning(f"Upload error (retry {attempt}/{MAX_UPLOAD_RETRIES}, waiting {delay:.1f}s): {error}")
+            
+            self.quota_ledger.record('videos.insert')
+            insert_charged = True
+            response = self._execute_resumable_upload(video_path, body, progress_callback=on_progress, retry_callback=on_retry)
                         
             progress_bar.progress(1.0)
             status_text.text("Upload completed!")
             
             if response:
+                insert_confirmed = True
                 video_id = response['id']
                 video_url = f"https://www.youtube.com/watch?v={video_id}"
                 
@@ -260,13 +359,288 @@ class YouTubeService:
                 return None
                 
         except HttpError as e:
-            error_content = json.loads(e.content.decode()) if e.content else {}
-            error_message = error_content.get('error', {}).get('message', str(e))
-            st.error(f"YouTube API Error: {error_message}")
+            st.error(f"YouTube API Error: {_http_error_message(e)}")
             return None
         except Exception as e:
             st.error(f"Unexpected error during upload: {str(e)}")
             return None
+        finally:
+            if insert_charged and not insert_confirmed:
+                self.quota_ledger.release(['videos.insert'])  # Don't count an unconfirmed insert against today's quota
+    
+    def _build_video_body(self, metadata):
+        """videos.insert request body for a VideoMetadata"""
+        body = {
+            'snippet': {
+                'title': metadata.title or "Untitled Video",
+                'description': metadata.description or "",
+                'tags': list(metadata.tags) if metadata.tags else [],
+                'categoryId': metadata.category_id
+            },
+            'status': {
+                'privacyStatus': metadata.privacy_status
+            }
+        }
+        
+        # Add scheduling if specified
+        if metadata.publish_at:
+            body['status']['publishAt'] = metadata.publish_at
+        
+        # Add shorts-specific metadata if detected
+        if metadata.shorts_format:
+            if '#Shorts' not in metadata.tags:
+                body['snippet']['tags'].append('#Shorts')
+                
+            # Add shorts indicator to description if not present
+            if '#Shorts' not in metadata.description:
+                body['snippet']['description'] += "\n\n#Shorts"
+        return body
+    
+    def _upload_state_path(self, video_path, body):
+        """State file for the resumable session of this exact file + metadata"""
+        stat = os.stat(video_path)
+        key = json.dumps([os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns, body], sort_keys=True)
+        return os.path.join(self.upload_state_dir, hashlib.sha256(key.encode()).hexdigest()[:32] + '.json')
+    
+    def _execute_resumable_upload(self, video_path, body, progress_callback=None, retry_callback=None, service=None,
+                                  media=None):
+        """Upload in chunks, retrying 5xx errors and dropped connections with exponential backoff and jitter.
+        The session URI and confirmed byte offset are kept in a state file so a restarted process resumes the
+        upload instead of starting over. Returns the videos.insert response; raises on non-retriable errors.
+        A custom media (e.g. GrowingFileUpload) is uploaded without a state file, and its total size may be
+        None until its last chunk has been read."""
+        service = service or self.service
+        state_path = None
+        if media is None:
+            media = MediaFileUpload(video_path, chunksize=self.chunk_size, resumable=True)
+            state_path = self._upload_state_path(video_path, body)
+        insert_request = service.videos().insert(
+            part=','.join(body.keys()),
+            body=body,
+            media_body=media
+        )
+        
+        state = _load_upload_state(state_path) if state_path else None
+        resumed = False
+        if state and state.get('resumable_uri'):
+            # In error state, the next call asks the server for the last confirmed byte before sending more
+            insert_request.resumable_uri = state['resumable_uri']
+            insert_request.resumable_progress = state.get('offset', 0)
+            insert_request._in_error_state = True
+            resumed = True
+        
+        response = None
+        retry = 0
+        while response is None:
+            error = None
+            try:
+                offset_before = insert_request.resumable_progress
+                if isinstance(media, GrowingFileUpload):
+                    media.wait_for_chunk(offset_before)
+                total_size = media.size()
+                if insert_request.resumable_uri and total_size is not None and offset_before >= total_size:
+                    # Every byte is already on the server but the upload isn't finalized (e.g. the response to
+                    # the last chunk was lost); an empty read would build an invalid range, so finalize with a
+                    # "bytes */total" status query instead (next_chunk sends one in error state)
+                    insert_request._in_error_state = True
+                chunk_start = time.perf_counter()
+                status, response = insert_request.next_chunk()
+                chunk_seconds = time.perf_counter() - chunk_start
+                retry = 0
+                if response is None and state_path:
+                    _save_upload_state(state_path, insert_request.resumable_uri, insert_request.resumable_progress)
+                if progress_callback:
+                    total_bytes = media.size()
+                    bytes_sent = total_bytes if response is not None else insert_request.resumable_progress
+                    chunk_bytes = max(0, bytes_sent - offset_before)
+                    progress_callback(bytes_sent, total_bytes, chunk_bytes / 1024**2 / chunk_seconds if chunk_seconds > 0 else 0.0)
+            except HttpError as e:
+                if e.resp.status in RETRIABLE_STATUS_CODES:
+                    error = e
+                elif resumed and e.resp.status in (404, 410):
+                    # The saved session expired; start a fresh one
+                    _clear_upload_state(state_path)
+                    insert_request.resumable_uri = None
+                    insert_request.resumable_progress = 0
+                    insert_request._in_error_state = False
+                    resumed = False
+                    continue
+                else:
+                    raise
+            except RETRIABLE_EXCEPTIONS as e:
+                error = e
+                if insert_request.resumable_uri:
+                    insert_request._in_error_state = True
+            
+            if error is not None:
+                retry += 1
+                if retry > MAX_UPLOAD_RETRIES:
+                    raise error
+                delay = random.uniform(0, min(MAX_BACKOFF_SECONDS, 2 ** retry))  # Full jitter
+                if retry_callback:
+                    retry_callback(retry, error, delay)
+                time.sleep(delay)
+        
+        if state_path:
+            _clear_upload_state(state_path)
+        return response
+    
+    def upload_while_rendering(self, render, video_path, metadata, progress_callback=None, retry_callback=None):
+        """Upload a video while it is still being encoded, so the total time is about max(render, upload).
+        render() runs on a background thread and must write an append-only fragmented MP4 to video_path
+        (video_generation.render_video(config, fragmented=True) with a render_config.RenderConfig). Bytes are
+        sent as the encoder produces them, and the last chunk (with the final fragments) once render() returns.
+        Returns (render result, upload result dict as from upload_video); raises if the render or upload fails.
+        render() is not interrupted when the upload fails: the upload error is only raised once the render has
+        finished (its file is then complete and can be uploaded again with upload_video).
+        Does not call Streamlit, so it can run off the script thread."""
+        if os.path.exists(video_path):
+            os.remove(video_path)  # Never stream stale bytes from a previous render
+        media = GrowingFileUpload(video_path, chunksize=self.chunk_size)
+        render_outcome = {}
+        
+        def run_render():
+            try:
+                render_outcome['result'] = render()
+            except BaseException as e:
+                render_outcome['error'] = e
+            finally:
+                media.finish(failed='error' in render_outcome)
+        
+        render_thread = threading.Thread(target=run_render, name="render-for-upload", daemon=True)
+        render_thread.start()
+        try:
+            self.quota_ledger.record('videos.insert')
+            try:
+                response = self._execute_resumable_upload(video_path, self._build_video_body(metadata),
+                                                          progress_callback=progress_callback,
+                                                          retry_callback=retry_callback, media=media)
+            except BaseException:
+                self.quota_ledger.release(['videos.insert'])
+                raise
+        finally:
+            render_thread.join()  # Also on upload failure, so no encoder is left writing video_path
+        if 'error' in render_outcome:
+            raise render_outcome['error']
+        return render_outcome['result'], {
+            'video_id': response['id'],
+            'video_url': f"https://www.youtube.com/watch?v={response['id']}",
+            'title': response['snippet']['title'],
+            'status': response['status']['privacyStatus'],
+            'publish_at': response['status'].get('publishAt'),
+            'upload_status': response['status']['uploadStatus']
+        }
+    
+    def upload_videos_batch(self, jobs, max_workers=3, progress_callback=None, max_quota_wait_seconds=None):
+        """Upload several UploadJobs concurrently on a bounded worker pool and return one result dict per job.
+        Quota for each job (insert plus optional thumbnail) is reserved from the ledger in job order. A job that
+        doesn't fit in today's remaining budget is held ('waiting_for_quota') and started once quota frees up:
+        an upload that fails is refunded, another process may refund to the shared ledger, and the budget resets
+        at Pacific midnight. Jobs still held after max_quota_wait_seconds of waiting (None: no limit, 0: don't
+        wait) come back as 'deferred' with the seconds until the quota resets.
+        Thumbnails are set as follow-up tasks after their video finishes. Does not call Streamlit, so it can run
+        off the script thread. progress_callback(index, bytes_sent, total_bytes, mb_per_s) is called per chunk."""
+        results = []
+        pending = deque()  # (job, result, operations) in job order, waiting to be reserved and started
+        for index, job in enumerate(jobs):
+            result = {'index': index, 'video_path': job.video_path, 'status': 'queued', 'video_id': None,
+                      'video_url': None, 'thumbnail': None, 'error': None}
+            results.append(result)
+            is_valid, message = self.validate_video_file(job.video_path)
+            if is_valid and job.metadata.publish_at:
+                is_valid, message = self.validate_scheduled_time(job.metadata.publish_at)
+            if not is_valid:
+                result.update(status='failed', error=message)
+                continue
+            operations = ['videos.insert'] + (['thumbnails.set'] if job.thumbnail_path else [])
+            if self.quota_ledger.cost(operations) > self.quota_ledger.daily_limit:
+                result.update(status='failed', error="The upload needs more API quota than a whole day's budget")
+                continue
+            pending.append((job, result, operations))
+        
+        uploads_finished = [0]
+        finished = threading.Condition()
+        def on_upload_done(_future):
+            with finished:
+                uploads_finished[0] += 1  # A failed upload has refunded its quota by now
+                finished.notify_all()
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="upload") as executor:
+            futures = []
+            wait_started = None
+            while pending:
+                job, result, operations = pending[0]
+                with finished:
+                    seen = uploads_finished[0]
+                if self.quota_ledger.reserve(operations):
+                    pending.popleft()
+                    wait_started = None
+                    future = executor.submit(self._run_batch_upload, executor, job, result, progress_callback)
+                    future.add_done_callback(on_upload_done)
+                    futures.append(future)
+                    continue
+                wait_started = wait_started or time.monotonic()
+                waited = time.monotonic() - wait_started
+                if max_quota_wait_seconds is not None and waited >= max_quota_wait_seconds:
+                    for _, held, _ in pending:
+                        held.update(status='deferred', error="Not enough API quota left today",
+                                    retry_after_seconds=seconds_until_reset())
+                    break
+                for _, held, _ in pending:
+                    held['status'] = 'waiting_for_quota'  # Visible to callers polling the result dicts
+                timeout = min(QUOTA_POLL_SECONDS, seconds_until_reset() + 1)
+                if max_quota_wait_seconds is not None:
+                    timeout = min(timeout, max_quota_wait_seconds - waited)
+                with finished:
+                    finished.wait_for(lambda: uploads_finished[0] != seen, timeout)
+            # Follow-up thumbnail tasks are submitted by the upload tasks, so wait on both before shutting down
+            for future in futures:
+                thumbnail_future = future.result()
+                if thumbnail_future is not None:
+                    thumbnail_future.result()
+        return results
+    
+    def _worker_service(self):
+        """Service object for the current worker thread (the shared one's HTTP client is not thread-safe)"""
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            service = self._thread_local.service = self._build_client()
+        return service
+    
+    def _run_batch_upload(self, executor, job, result, progress_callback):
+        """Upload one batch job; returns the follow-up thumbnail future, if any"""
+        result['status'] = 'uploading'
+        start = time.perf_counter()
+        on_progress = None
+        if progress_callback:
+            on_progress = lambda sent, total, rate: progress_callback(result['index'], sent, total, rate)
+        try:
+            body = self._build_video_body(job.metadata)
+            response = self._execute_resumable_upload(job.video_path, body, progress_callback=on_progress,
+                                                      service=self._worker_service())
+            result.update(status='uploaded', video_id=response['id'],
+                          video_url=f"https://www.youtube.com/watch?v={response['id']}",
+                          upload_status=response['status']['uploadStatus'])
+        except Exception as e:
+            result.update(status='failed', error=_http_error_message(e) if isinstance(e, HttpError) else str(e))
+            self.quota_ledger.release(['videos.insert'] + (['thumbnails.set'] if job.thumbnail_path else []))
+            return None
+        finally:
+            result['upload_seconds'] = time.perf_counter() - start
+        if job.thumbnail_path:
+            return executor.submit(self._run_batch_thumbnail, job, result)
+        return None
+    
+    def _run_batch_thumbnail(self, job, result):
+        try:
+            self._worker_service().thumbnails().set(
+                videoId=result['video_id'],
+                media_body=MediaFileUpload(job.thumbnail_path)
+            ).execute()
+            result['thumbnail'] = True
+        except Exception as e:
+            result['thumbnail'] = False
+            result['thumbnail_error'] = _http_error_message(e) if isinstance(e, HttpError) else str(e)
     
     def upload_thumbnail(self, video_id, thumbnail_path):
         """Upload custom thumbnail for video"""
@@ -277,6 +651,7 @@ class YouTubeService:
         try:
             media = MediaFileUpload(thumbnail_path)
             
+            self.quota_ledger.record('thumbnails.set')
             self.service.thumbnails().set(
                 videoId=video_id,
                 media_body=media
@@ -290,30 +665,30 @@ class YouTubeService:
             return False
     
     def validate_upload_quota(self):
-        """Check YouTube API quota (basic estimation)"""
-        # This is a simplified quota check
-        # In production, you'd want more sophisticated quota tracking
-        try:
-            # A simple API call to check if we can make requests
-            self.service.channels().list(
-                part='id',
-                mine=True,
-                maxResults=1
-            ).execute()
-            return True, "API quota available"
-            
-        except HttpError as e:
-            if e.resp.status == 403:
-                error_content = json.loads(e.content.decode()) if e.content else {}
-                if 'quotaExceeded' in str(error_content):
-                    return False, "YouTube API quota exceeded"
-            return False, f"API Error: {e}"
-        except Exception as e:
-            return False, f"Quota check failed: {e}"
+        """Check the local quota ledger has room for an upload (no API call)"""
+        summary = self.quota_ledger.summary()
+        if summary['remaining'] < self.quota_ledger.cost(['videos.insert']):
+            hours = summary['seconds_until_reset'] / 3600
+            return False, f"YouTube API quota exhausted for today ({summary['spent']}/{summary['daily_limit']} units, resets in {hours:.1f}h)"
+        return True, f"API quota available ({summary['remaining']} units left today)"
     
     def get_video_categories(self, region_code='US'):
-        """Get available video categories"""
+        """Get available video categories (cached for CATEGORIES_TTL_SECONDS)"""
+        categories = self._cached(('categories', region_code), CATEGORIES_TTL_SECONDS,
+                                  lambda: self._fetch_video_categories(region_code))
+        if categories is None:
+            # Return default categories
+            return {
+                '10': 'Music',
+                '22': 'People & Blogs',
+                '23': 'Comedy',
+                '24': 'Entertainment'
+            }
+        return categories
+    
+    def _fetch_video_categories(self, region_code):
         try:
+            self.quota_ledger.record('videoCategories.list')
             response = self.service.videoCategories().list(
                 part='snippet',
                 regionCode=region_code
@@ -327,10 +702,41 @@ class YouTubeService:
             
         except HttpError as e:
             st.warning(f"Could not fetch video categories: {e}")
-            # Return default categories
-            return {
-                '10': 'Music',
-                '22': 'People & Blogs',
-                '23': 'Comedy',
-                '24': 'Entertainment'
-            }
\ No newline at end of file
+            return None
+
+def _http_error_message(error):
+    """The API's error message from an HttpError, falling back to its string form"""
+    try:
+        error_content = json.loads(error.content.decode()) if error.content else {}
+    except ValueError:
+        error_content = {}
+    return error_content.get('error', {}).get('message', str(error))
+
+def normalize_chunk_size(chunk_size):
+    """Round a chunk size up to the 256 KiB granularity required for resumable uploads (-1 = single request)"""
+    if chunk_size is None or chunk_size == -1:
+        return -1
+    chunks = max(1, -(-int(chunk_size) // UPLOAD_CHUNK_GRANULARITY))
+    return chunks * UPLOAD_CHUNK_GRANULARITY
+
+def _load_upload_state(state_path):
+    try:
+        with open(state_path, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def _save_upload_state(state_path, resumable_uri, offset):
+    if not resumable_uri:
+        return
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    temp_path = state_path + '.tmp'
+    with open(temp_path, 'w') as file:
+        json.dump({'resumable_uri': resumable_uri, 'offset': offset, 'updated_at': time.time()}, file)
+    os.replace(temp_path, state_path)
+
+def _clear_upload_state(state_path):
+    try:
+        os.remove(state_path)
+    except OSError:
+        pass